@@ -0,0 +1,67 @@
+"""Measures the memory held per parsed PDML packet, with and without lazy XmlLayer fields.
+
+Parses the packets of the test pcap with tshark if it is available, otherwise the single packet in
+tests/data/packet.xml, and keeps all of them alive while measuring.
+
+Usage: python benchmarks/xml_layer_memory.py [pcap_path]
+"""
+import gc
+import pathlib
+import subprocess
+import sys
+import tracemalloc
+
+import lxml.objectify
+
+from pyshark.packet.layers.xml_layer import XmlLayer
+from pyshark.tshark import tshark
+from pyshark.tshark.output_parser import tshark_xml
+
+DATA_DIRECTORY = pathlib.Path(__file__).parent.parent.joinpath("tests", "data")
+# Parse each packet several times so the per-packet figure isn't dominated by constant overheads.
+REPEATS = 200
+
+
+def read_pdml_packets(pcap_path):
+    try:
+        pdml = subprocess.check_output([tshark.get_process_path(), "-n", "-T", "pdml", "-r", str(pcap_path)],
+                                       stderr=subprocess.DEVNULL)
+    except tshark.TSharkNotFoundException:
+        print("tshark not found, using tests/data/packet.xml")
+        return [DATA_DIRECTORY.joinpath("packet.xml").read_bytes()]
+
+    packets = []
+    while True:
+        packet, pdml = tshark_xml._extract_tag_from_xml_data(pdml)
+        if packet is None:
+            return packets
+        packets.append(packet)
+
+
+def bytes_per_packet(xml_packets, lazy_fields):
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    parsed = [[XmlLayer(proto, lazy_fields=lazy_fields) for proto in xml_packet.proto]
+              for xml_packet in xml_packets]
+    gc.collect()
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (end - start) / len(parsed)
+
+
+def main():
+    pcap_path = sys.argv[1] if len(sys.argv) > 1 else DATA_DIRECTORY.joinpath("capture_test.pcapng")
+    packets = read_pdml_packets(pcap_path)
+    parser = lxml.objectify.makeparser(huge_tree=True, recover=True)
+    xml_packets = [lxml.objectify.fromstring(packet, parser) for packet in packets] * REPEATS
+
+    eager = bytes_per_packet(xml_packets, lazy_fields=False)
+    lazy = bytes_per_packet(xml_packets, lazy_fields=True)
+    print(f"Packets: {len(packets)}")
+    print(f"Eager fields: {eager:,.0f} bytes per packet")
+    print(f"Lazy fields:  {lazy:,.0f} bytes per packet ({lazy / eager:.0%})")
+
+
+if __name__ == "__main__":
+    main()
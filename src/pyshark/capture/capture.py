@@ -7,13 +7,20 @@ import subprocess
 import concurrent.futures
 import sys
 import logging
+import time
 import warnings
 
 from pyshark import ek_field_mapping
+from pyshark import filters
+from pyshark.capture import capture_metrics
+from pyshark.capture import capture_profiler
+from pyshark.packet import layer_cache
 from pyshark.packet.packet import Packet
 from pyshark.tshark.output_parser import tshark_ek
 from pyshark.tshark.output_parser import tshark_json
+from pyshark.tshark.output_parser import tshark_tabs
 from pyshark.tshark.output_parser import tshark_xml
+from pyshark.tshark import stats
 from pyshark.tshark.tshark import get_process_path, get_tshark_display_filter_flag, \
     tshark_supports_json, TSharkVersionException, get_tshark_version, tshark_supports_duplicate_keys
 
@@ -36,6 +43,18 @@ class RawMustUseJsonException(Exception):
     """If the use_raw argument is True, so should the use_json argument"""
 
 
+class DictsMustUseJsonException(Exception):
+    """Packets can only be read as dicts if use_json or use_ek is True"""
+
+
+class MetricsNotCollectedException(Exception):
+    """Metrics, latencies and profiles are only available if the capture was created to collect them"""
+
+
+class PythonFilterNotSupportedException(Exception):
+    """Filter expressions which must partly run in Python are only supported when reading packets as Packets"""
+
+
 class StopCapture(Exception):
     """Exception that the user can throw anywhere in packet-handling to stop the capture process."""
     pass
@@ -51,7 +70,9 @@ class Capture:
                  decryption_key=None, encryption_type="wpa-pwd", output_file=None,
                  decode_as=None,  disable_protocol=None, tshark_path=None,
                  override_prefs=None, capture_filter=None, use_json=False, include_raw=False,
-                 use_ek=False, custom_parameters=None, debug=False):
+                 use_ek=False, custom_parameters=None, debug=False, typed_ek=False, intern_strings=False,
+                 intern_values=False, packet_store=None, lazy_packets=False, share_layers=False,
+                 summary_columns=None, collect_metrics=False, profile=None):
 
         self.loaded = False
         self.tshark_path = tshark_path
@@ -59,10 +80,40 @@ class Capture:
         self.debug = debug
         self.use_json = use_json
         self._use_ek = use_ek
+        self._typed_ek = typed_ek
+        self._intern_strings = intern_strings
+        self._intern_values = intern_strings and intern_values
+        self._lazy_packets = lazy_packets
+        self._layer_cache = layer_cache.LayerCache() if share_layers else None
+        self._metrics = capture_metrics.CaptureMetrics() if collect_metrics else None
+        # The CPU time of the exited child processes when each process started, to find the CPU time of processes
+        # which exit by themselves.
+        self._children_cpu_times = {}
+        # PacketLatencies, for captures which record them.
+        self._latencies = None
+        # Profilers given to the capture may be shared with other captures, so they are closed by their owner.
+        self._owns_profiler = profile is True or isinstance(profile, dict)
+        if profile is True:
+            self._profiler = capture_profiler.CaptureProfiler()
+        elif isinstance(profile, dict):
+            self._profiler = capture_profiler.CaptureProfiler(**profile)
+        else:
+            self._profiler = profile or None
         self.include_raw = include_raw
-        self._packets = []
+        # A list, or a PacketStore from pyshark.capture.packet_store.
+        self._packets = [] if packet_store is None else packet_store
         self._current_packet = 0
+        # Filter expressions are split to the display filter for tshark and the rest, which runs in Python.
+        self._python_filter = None
+        self._filter_expression = None
+        if isinstance(display_filter, filters.Expression):
+            self._filter_expression = display_filter
+            display_filter, self._python_filter = filters.split_filter(display_filter)
         self._display_filter = display_filter
+        # The (title, column format) of each column of the summary rows, if read as rows.
+        self._summary_columns = None
+        if summary_columns is not None:
+            self._summary_columns = tshark_tabs.get_summary_columns(summary_columns)
         self._capture_filter = capture_filter
         self._only_summaries = only_summaries
         self._output_file = output_file
@@ -81,6 +132,9 @@ class Capture:
         if include_raw and not (use_json or use_ek):
             raise RawMustUseJsonException(
                 "use_json/use_ek must be True if include_raw")
+        if self._summary_columns and self._python_filter is not None:
+            raise PythonFilterNotSupportedException("Filter expressions which can't run in tshark can't be used with "
+                                                    "summary columns")
 
         if self.debug:
             self.set_debug()
@@ -111,15 +165,29 @@ class Capture:
     # Allows for child classes to call next() from super() without 2to3 "fixing"
     # the call
     def next_packet(self) -> Packet:
-        if self._current_packet >= len(self._packets):
+        packet_count = len(self._packets)
+        # The current packet is counted from the first packet ever kept, since the store may have evicted packets.
+        # Iteration goes on from the oldest packet still kept if the current one was evicted.
+        index = max(self._current_packet - self._get_evicted_count(), 0)
+        if index >= packet_count:
             raise StopIteration()
-        cur_packet = self._packets[self._current_packet]
-        self._current_packet += 1
+        cur_packet = self._packets[index]
+        self._current_packet = self._get_evicted_count() + index + 1
         return cur_packet
 
+    def _get_evicted_count(self):
+        """The amount of packets the packet store evicted (i.e. a RingBuffer), which come before its index 0."""
+        return getattr(self._packets, "evicted_count", 0)
+
+    def _get_kept_count(self):
+        """The amount of packets ever kept, including those the packet store evicted."""
+        # The length comes first, as it may evict packets.
+        packet_count = len(self._packets)
+        return self._get_evicted_count() + packet_count
+
     def clear(self):
         """Empties the capture of any saved packets."""
-        self._packets = []
+        self._packets.clear()
         self._current_packet = 0
 
     def reset(self):
@@ -134,12 +202,15 @@ class Capture:
         :param packet_count: The amount of packets to add to the packet list (0 to read forever)
         :param timeout: If given, automatically stops after a given amount of time.
         """
-        initial_packet_amount = len(self._packets)
+        packets_kept = 0
 
         def keep_packet(pkt):
+            nonlocal packets_kept
             self._packets.append(pkt)
+            packets_kept += 1
 
-            if packet_count != 0 and len(self._packets) - initial_packet_amount >= packet_count:
+            # The packet store may evict packets, so its length can't be used for counting.
+            if packet_count != 0 and packets_kept >= packet_count:
                 raise StopCapture()
 
         try:
@@ -207,19 +278,39 @@ class Capture:
                     asyncio.get_child_watcher().attach_loop(self.eventloop)
                 # For Python 3.12+, child watchers are no longer needed
 
-    def _packets_from_tshark_sync(self, packet_count=None, existing_process=None):
+    def iter_dicts(self, packet_count=None):
+        """Returns a generator of the packets as plain dicts of {layer_name: layer_dict}, as decoded from tshark's
+        JSON/EK output, without creating Packet and layer objects. This is the fastest way to get the packets' data.
+
+        Packets are not kept in the capture. If typed_ek is set, the EK fields are casted to their types.
+
+        :param packet_count: If given, stops after this amount of packets is captured.
+        """
+        if not (self.use_json or self._use_ek):
+            raise DictsMustUseJsonException("use_json/use_ek must be True to read packets as dicts")
+        if self._python_filter is not None:
+            raise PythonFilterNotSupportedException("Filter expressions which can't run in tshark can't be used with "
+                                                    "dicts")
+        return self._packets_from_tshark_sync(packet_count=packet_count, as_dicts=True)
+
+    def _packets_from_tshark_sync(self, packet_count=None, existing_process=None, as_dicts=False):
         """Returns a generator of packets.
 
         This is the sync version of packets_from_tshark. It wait for the completion of each coroutine and
          reimplements reading packets in a sync way, yielding each packet as it arrives.
 
         :param packet_count: If given, stops after this amount of packets is captured.
+        :param as_dicts: Yields the packets as dicts instead of Packet objects (see iter_dicts).
         """
         # NOTE: This has code duplication with the async version, think about how to solve this
         tshark_process = existing_process or self.eventloop.run_until_complete(
             self._get_tshark_process())
-        parser = self._setup_tshark_output_parser()
+        parser = self._setup_tshark_output_parser(as_dicts=as_dicts)
+        latencies = self._latencies
+        instrumented = self._metrics is not None or latencies is not None or self._profiler is not None
+        parse_time = None
         packets_captured = 0
+        packets_matched = 0
 
         data = b""
         try:
@@ -236,8 +327,21 @@ class Capture:
 
                 if packet:
                     packets_captured += 1
-                    yield packet
-                if packet_count and packets_captured >= packet_count:
+                    if latencies is not None:
+                        parse_time = latencies.packet_parsed(packet)
+                    packet = self._process_and_filter_packet(packet)
+                    if packet is not None:
+                        packets_matched += 1
+                        if not instrumented:
+                            yield packet
+                        else:
+                            # The time until the next packet is requested is the time in the iterating code.
+                            callback_token = self._callback_started(packet, parse_time)
+                            try:
+                                yield packet
+                            finally:
+                                self._callback_finished(packet, callback_token)
+                if packet_count and packets_matched >= packet_count:
                     break
         finally:
             if tshark_process in self._running_processes:
@@ -284,6 +388,10 @@ class Capture:
         self._log.debug("Starting to go through packets")
 
         parser = self._setup_tshark_output_parser()
+        latencies = self._latencies
+        instrumented = self._metrics is not None or latencies is not None or self._profiler is not None
+        parse_time = None
+        packets_matched = 0
         data = b""
 
         while True:
@@ -297,6 +405,14 @@ class Capture:
 
             if packet:
                 packets_captured += 1
+                if latencies is not None:
+                    parse_time = latencies.packet_parsed(packet)
+                packet = self._process_and_filter_packet(packet)
+                if packet is None:
+                    continue
+                packets_matched += 1
+                if instrumented:
+                    callback_token = self._callback_started(packet, parse_time)
                 try:
                     if inspect.iscoroutinefunction(packet_callback):
                         await packet_callback(packet)
@@ -305,10 +421,86 @@ class Capture:
                 except StopCapture:
                     self._log.debug("User-initiated capture stop in callback")
                     break
+                finally:
+                    if instrumented:
+                        self._callback_finished(packet, callback_token)
 
-            if packet_count and packets_captured >= packet_count:
+            if packet_count and packets_matched >= packet_count:
                 break
 
+    def get_stats(self, taps, packet_count=None, duration=None, timeout=None):
+        """Runs tshark statistics taps (i.e. "conv,tcp", "io,stat,1", "phs" or "expert") on the capture, in a single
+        pass, and returns a dict of {tap: result}. See pyshark.tshark.stats.TsharkStats for the results of each tap.
+
+        Much faster than computing the same statistics from the packets in Python. Packets are not kept.
+        """
+        return stats.TsharkStats(self).run(taps, packet_count=packet_count, duration=duration, timeout=timeout)
+
+    def metrics(self) -> capture_metrics.CaptureMetrics:
+        """Returns the counters and timers of the stages packets went through in the capture so far: reading tshark's
+        output, finding and parsing the packets in it, processing and filtering them, and the callback.
+
+        See pyshark.capture.capture_metrics.CaptureMetrics for exporting them as JSON or Prometheus metrics.
+        """
+        if self._metrics is None:
+            raise MetricsNotCollectedException("The capture must be created with collect_metrics=True")
+        return self._metrics
+
+    def profile_report(self) -> capture_profiler.ProfileReport:
+        """Returns the profile of the parsing and dispatching of the packets so far, by output format and protocol
+        layer. See pyshark.capture.capture_profiler.CaptureProfiler.
+        """
+        if self._profiler is None:
+            raise MetricsNotCollectedException("The capture must be created with profile=True or a CaptureProfiler")
+        return self._profiler.report()
+
+    def _callback_started(self, packet, parse_time):
+        """Records the start of the callback for metrics, latencies and profiling.
+
+        :param parse_time: The time the packet was parsed (from PacketLatencies.packet_parsed), if recording latencies.
+        :return: A token to give _callback_finished.
+        """
+        start_time = time.perf_counter()
+        if self._latencies is not None:
+            self._latencies.parse_to_callback.record(start_time - parse_time)
+        profile_token = None
+        if self._profiler is not None:
+            profile_token = self._profiler.packet_started("dispatch", packet)
+        return start_time, profile_token
+
+    def _callback_finished(self, packet, callback_token):
+        start_time, profile_token = callback_token
+        seconds = time.perf_counter() - start_time
+        if self._metrics is not None:
+            self._metrics.add_time("callback", seconds)
+        if self._latencies is not None:
+            self._latencies.callback.record(seconds)
+        if self._profiler is not None:
+            self._profiler.packet_finished("dispatch", packet, self._get_output_format(), profile_token)
+
+    def _process_and_filter_packet(self, packet):
+        """Processes a packet parsed from tshark's output and applies the Python part of the display filter on it.
+
+        Returns the packet, or None if it was filtered out.
+        """
+        metrics = self._metrics
+        if metrics is not None:
+            start_time = time.perf_counter()
+        packet = self._process_packet(packet)
+        if self._python_filter is not None and not self._python_filter(packet):
+            packet = None
+        if metrics is not None:
+            metrics.add_time("processing", time.perf_counter() - start_time)
+            metrics.count("packets_delivered" if packet is not None else "packets_filtered_out")
+        return packet
+
+    def _process_packet(self, packet):
+        """Called on every packet parsed from tshark's output, before it is handed to the user.
+
+        Returns the packet to hand over. Subclasses may override it to add data to packets.
+        """
+        return packet
+
     def _create_stderr_handling_task(self, stderr):
         self._stderr_handling_tasks.append(asyncio.ensure_future(self._handle_process_stderr_forever(stderr)))
 
@@ -329,8 +521,21 @@ class Capture:
             self.__tshark_version = get_tshark_version(self.tshark_path)
         return self.__tshark_version
 
-    async def _get_tshark_process(self, packet_count=None, stdin=None):
-        """Returns a new tshark process with previously-set parameters."""
+    def _get_output_format(self):
+        """Returns the output format (-T) tshark is run with."""
+        if self._summary_columns:
+            return "tabs"
+        if self.use_json:
+            return "json"
+        if self._use_ek:
+            return "ek"
+        return "psml" if self._only_summaries else "pdml"
+
+    async def _get_tshark_process(self, packet_count=None, stdin=None, extra_parameters=None):
+        """Returns a new tshark process with previously-set parameters.
+
+        :param extra_parameters: More parameters to run tshark with, i.e. statistics taps.
+        """
         self._verify_capture_parameters()
 
         output_parameters = []
@@ -339,16 +544,14 @@ class Capture:
                 raise TSharkVersionException(
                     "JSON only supported on Wireshark >= 2.2.0")
 
-        if self.use_json:
-            output_type = "json"
-            if tshark_supports_duplicate_keys(self._get_tshark_version()):
-                output_parameters.append("--no-duplicate-keys")
-        elif self._use_ek:
-            output_type = "ek"
-        else:
-            output_type = "psml" if self._only_summaries else "pdml"
+        output_type = self._get_output_format()
+        if output_type == "tabs":
+            output_parameters += ["-o", "gui.column.format:" +
+                                  tshark_tabs.get_column_format_preference(self._summary_columns)]
+        elif output_type == "json" and tshark_supports_duplicate_keys(self._get_tshark_version()):
+            output_parameters.append("--no-duplicate-keys")
         parameters = [self._get_tshark_path(), "-l", "-n", "-T", output_type] + \
-            self.get_parameters(packet_count=packet_count) + output_parameters
+            self.get_parameters(packet_count=packet_count) + output_parameters + (extra_parameters or [])
 
         self._log.debug(
             "Creating TShark subprocess with parameters: " + " ".join(parameters))
@@ -364,6 +567,9 @@ class Capture:
     def _created_new_process(self, parameters, process, process_name="TShark"):
         self._log.debug(
             process_name + f" subprocess (pid {process.pid}) created")
+        if self._metrics is not None:
+            self._metrics.count("processes_started")
+            self._children_cpu_times[process] = capture_metrics.get_children_cpu_time()
         if process.returncode is not None and process.returncode != 0:
             raise TSharkCrashException(
                 f"{process_name} seems to have crashed. Try updating it. (command ran: '{' '.join(parameters)}')")
@@ -372,6 +578,8 @@ class Capture:
     async def _cleanup_subprocess(self, process):
         """Kill the given process and properly closes any pipes connected to it."""
         self._log.debug(f"Cleanup Subprocess (pid {process.pid})")
+        if self._metrics is not None:
+            self._record_process_cpu_time(process)
         if process.returncode is None:
             try:
                 process.kill()
@@ -390,14 +598,38 @@ class Capture:
                                            f"Last error line: {self._last_error_line}\n"
                                            "Try rerunning in debug mode [ capture_obj.set_debug() ] or try updating tshark.")
 
-    def _setup_tshark_output_parser(self):
-        if self.use_json:
-            return tshark_json.TsharkJsonParser(self._get_tshark_version())
-        if self._use_ek:
+    def _record_process_cpu_time(self, process):
+        children_cpu_time = self._children_cpu_times.pop(process, None)
+        if process.returncode is None:
+            cpu_time = capture_metrics.get_process_cpu_time(process.pid)
+        elif children_cpu_time is not None:
+            # The process was already waited for, so its CPU time was added to that of the exited children since it
+            # started. Other child processes which exited meanwhile are counted as well.
+            cpu_time = capture_metrics.get_children_cpu_time() - children_cpu_time
+        else:
+            cpu_time = None
+        if cpu_time is not None:
+            self._metrics.add_time("process_cpu", cpu_time)
+
+    def _setup_tshark_output_parser(self, as_dicts=False):
+        if self._summary_columns:
+            parser = tshark_tabs.TsharkTabsParser(self._summary_columns)
+        elif self.use_json:
+            parser = tshark_json.TsharkJsonParser(self._get_tshark_version(), intern_strings=self._intern_strings,
+                                                  intern_values=self._intern_values, lazy=self._lazy_packets,
+                                                  as_dicts=as_dicts, layer_cache=self._layer_cache)
+        elif self._use_ek:
             ek_field_mapping.MAPPING.load_mapping(str(self._get_tshark_version()),
                                                   tshark_path=self.tshark_path)
-            return tshark_ek.TsharkEkJsonParser()
-        return tshark_xml.TsharkXmlParser(parse_summaries=self._only_summaries)
+            parser = tshark_ek.TsharkEkJsonParser(cast_fields=self._typed_ek, intern_strings=self._intern_strings,
+                                                  intern_values=self._intern_values, lazy=self._lazy_packets,
+                                                  as_dicts=as_dicts, layer_cache=self._layer_cache)
+        else:
+            parser = tshark_xml.TsharkXmlParser(parse_summaries=self._only_summaries,
+                                                intern_values=self._intern_values)
+        parser.metrics = self._metrics
+        parser.profiler = self._profiler
+        return parser
 
     def close(self):
         self.eventloop.run_until_complete(self.close_async())
@@ -413,16 +645,29 @@ class Capture:
             with contextlib.suppress(asyncio.CancelledError):
                 await task
 
+        if self._owns_profiler:
+            self._profiler.close()
+
     def __del__(self):
         if self._running_processes:
             self.close()
 
     def __enter__(self): return self
     async def __aenter__(self): return self
-    def __exit__(self, exc_type, exc_val, exc_tb): self.close()
 
-    async def __aexit__(self, exc_type, exc_val,
-                        exc_tb): await self.close_async()
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        self._close_packet_store()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close_async()
+        self._close_packet_store()
+
+    def _close_packet_store(self):
+        # Not done in close(), since captures may be read again after it (i.e. by load_packets).
+        close_store = getattr(self._packets, "close", None)
+        if close_store is not None:
+            close_store()
 
     def get_parameters(self, packet_count=None):
         """Returns the special tshark parameters to be used according to the configuration of this class."""
@@ -435,7 +680,8 @@ class Capture:
         # Raw is only enabled when JSON is also enabled.
         if self.include_raw:
             params += ["-x"]
-        if packet_count:
+        # Packets filtered out in Python count for tshark as well.
+        if packet_count and self._python_filter is None:
             params += ["-c", str(packet_count)]
 
         if self._custom_parameters:
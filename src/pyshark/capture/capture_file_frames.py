@@ -0,0 +1,130 @@
+import mmap
+import pathlib
+import struct
+from array import array
+
+_PCAP_MAGICS = (0xa1b2c3d4, 0xa1b23c4d)
+_PCAPNG_SECTION_HEADER_BLOCK = 0x0a0d0d0a
+_PCAPNG_BYTE_ORDER_MAGIC = 0x1a2b3c4d
+_PCAPNG_OBSOLETE_PACKET_BLOCK = 0x2
+_PCAPNG_SIMPLE_PACKET_BLOCK = 0x3
+_PCAPNG_ENHANCED_PACKET_BLOCK = 0x6
+
+_PCAP_GLOBAL_HEADER_LENGTH = 24
+_PCAP_RECORD_HEADER_LENGTH = 16
+
+
+class UnsupportedCaptureFileException(Exception):
+    pass
+
+
+class CaptureFileFrames:
+    """Gives access to the frames of a PCAP or PCAPNG file by their frame number.
+
+    The file is memory-mapped and the frames are returned as memoryviews into it, so no data is copied.
+    Frame offsets are indexed lazily, only as far as the highest frame number requested.
+    """
+
+    def __init__(self, capture_file):
+        """
+        :param capture_file: Path of an uncompressed PCAP or PCAPNG file.
+        """
+        self.capture_file = pathlib.Path(capture_file)
+        with self.capture_file.open("rb") as f:
+            try:
+                self._mapped_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise UnsupportedCaptureFileException(f"{self.capture_file} is empty")
+        self._view = memoryview(self._mapped_file)
+        self._frame_offsets = array("Q")
+        self._frame_lengths = array("L")
+        self._next_offset = 0
+        self._byte_order = "<"
+
+        magic = self._mapped_file[:4]
+        if len(magic) < 4:
+            raise UnsupportedCaptureFileException(f"{self.capture_file} is not a PCAP or PCAPNG file")
+        if struct.unpack("<I", magic)[0] == _PCAPNG_SECTION_HEADER_BLOCK:
+            self._is_pcapng = True
+        else:
+            self._is_pcapng = False
+            for byte_order in ("<", ">"):
+                if struct.unpack(byte_order + "I", magic)[0] in _PCAP_MAGICS:
+                    self._byte_order = byte_order
+                    break
+            else:
+                raise UnsupportedCaptureFileException(f"{self.capture_file} is not a PCAP or PCAPNG file "
+                                                      "(compressed files are not supported)")
+            self._next_offset = _PCAP_GLOBAL_HEADER_LENGTH
+
+    def get_frame(self, frame_number) -> memoryview:
+        """Gets the data of the frame with the given number (starting from 1, like in tshark).
+
+        Raises KeyError if the file has no such frame.
+        """
+        while len(self._frame_offsets) < frame_number:
+            if not self._index_next_frame():
+                raise KeyError(f"Frame {frame_number} does not exist in {self.capture_file}")
+        offset = self._frame_offsets[frame_number - 1]
+        return self._view[offset:offset + self._frame_lengths[frame_number - 1]]
+
+    def close(self):
+        """Stops indexing the file. Frames which were already returned stay valid until they are released."""
+        self._view.release()
+        self._view = None
+        try:
+            self._mapped_file.close()
+        except BufferError:
+            # Frames still refer to the mapping, it is closed once they are garbage collected.
+            pass
+        self._mapped_file = None
+
+    def __len__(self):
+        """The amount of frames indexed so far."""
+        return len(self._frame_offsets)
+
+    def _index_next_frame(self):
+        """Adds the offset of the next frame to the index. Returns False if the end of the file was reached."""
+        if self._is_pcapng:
+            return self._index_next_pcapng_frame()
+        return self._index_next_pcap_frame()
+
+    def _index_next_pcap_frame(self):
+        record_offset = self._next_offset
+        data_offset = record_offset + _PCAP_RECORD_HEADER_LENGTH
+        if data_offset > len(self._mapped_file):
+            return False
+        _, _, captured_length, _ = struct.unpack_from(self._byte_order + "IIII", self._mapped_file, record_offset)
+        self._add_frame(data_offset, captured_length)
+        self._next_offset = data_offset + captured_length
+        return True
+
+    def _index_next_pcapng_frame(self):
+        while self._next_offset + 12 <= len(self._mapped_file):
+            block_offset = self._next_offset
+            if self._read_pcapng_uint(block_offset) == _PCAPNG_SECTION_HEADER_BLOCK:
+                # The block type reads the same in both byte orders, and every section may have a different one.
+                byte_order_magic, = struct.unpack_from("<I", self._mapped_file, block_offset + 8)
+                self._byte_order = "<" if byte_order_magic == _PCAPNG_BYTE_ORDER_MAGIC else ">"
+            block_type, block_length = struct.unpack_from(self._byte_order + "II", self._mapped_file, block_offset)
+            if block_length < 12:
+                raise UnsupportedCaptureFileException(f"Invalid block at offset {block_offset} in {self.capture_file}")
+            self._next_offset = block_offset + block_length
+
+            if block_type in (_PCAPNG_ENHANCED_PACKET_BLOCK, _PCAPNG_OBSOLETE_PACKET_BLOCK):
+                captured_length = self._read_pcapng_uint(block_offset + 20)
+                self._add_frame(block_offset + 28, captured_length)
+                return True
+            if block_type == _PCAPNG_SIMPLE_PACKET_BLOCK:
+                # Simple packet blocks have no captured length, the data is only padded to 32 bits.
+                original_length = self._read_pcapng_uint(block_offset + 8)
+                self._add_frame(block_offset + 12, min(original_length, block_length - 16))
+                return True
+        return False
+
+    def _read_pcapng_uint(self, offset):
+        return struct.unpack_from(self._byte_order + "I", self._mapped_file, offset)[0]
+
+    def _add_frame(self, offset, length):
+        self._frame_offsets.append(offset)
+        self._frame_lengths.append(length)
@@ -0,0 +1,242 @@
+"""Counters and timers for the stages packets go through in a capture, to find out where the time goes."""
+import collections
+import json
+import os
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+COUNTERS = ("bytes_read", "reads", "packets_framed", "packets_parsed", "parse_errors", "packets_filtered_out",
+            "packets_delivered", "processes_started")
+# In seconds
+TIMERS = ("read_wait", "framing", "parsing", "processing", "callback", "process_cpu")
+# The current value of each gauge, along with its maximum as max_<name>.
+GAUGES = ("buffered_bytes", "queued_packets")
+
+_DESCRIPTIONS = {
+    "bytes_read": "Bytes read from tshark's output",
+    "reads": "Reads from tshark's output",
+    "packets_framed": "Packets whose data was found in tshark's output",
+    "packets_parsed": "Packets parsed from tshark's output",
+    "parse_errors": "Packets which failed to parse",
+    "packets_filtered_out": "Packets dropped by the Python part of the display filter",
+    "packets_delivered": "Packets handed to the callback or iterator",
+    "processes_started": "tshark and dumpcap processes started",
+    "read_wait": "Time waiting for tshark's output",
+    "framing": "Time finding the packets in tshark's output",
+    "parsing": "Time decoding packets and creating their layers",
+    "processing": "Time in per-packet processing and the Python part of the display filter",
+    "callback": "Time in the callback, or the iterating code",
+    "process_cpu": "CPU time of the tshark and dumpcap processes, measured when they are closed",
+    "buffered_bytes": "Bytes of tshark's output read but not parsed yet",
+    "queued_packets": "Packets parsed but not handed over yet",
+}
+
+
+class CaptureMetrics:
+    """The counters, timers and gauges of a capture.
+
+    Only collected when the capture is created with collect_metrics=True, so that captures which don't use them pay
+    nothing but a check per stage.
+    """
+
+    def __init__(self):
+        self.counters = self.timers = self.gauges = None
+        self.reset()
+
+    def reset(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.timers = dict.fromkeys(TIMERS, 0.0)
+        self.gauges = dict.fromkeys(GAUGES + tuple(f"max_{name}" for name in GAUGES), 0)
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def add_time(self, name, seconds):
+        self.timers[name] += seconds
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+        max_name = "max_" + name
+        if value > self.gauges[max_name]:
+            self.gauges[max_name] = value
+
+    def snapshot(self) -> dict:
+        """Returns a copy of the metrics as {"counters": {...}, "timers_seconds": {...}, "gauges": {...}}."""
+        return {"counters": dict(self.counters), "timers_seconds": dict(self.timers), "gauges": dict(self.gauges)}
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, prefix="pyshark_capture_") -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, value in self.counters.items():
+            lines += _prometheus_metric(prefix + name + "_total", "counter", _DESCRIPTIONS[name], value)
+        for name, value in self.timers.items():
+            lines += _prometheus_metric(prefix + name + "_seconds_total", "counter", _DESCRIPTIONS[name], value)
+        for name, value in self.gauges.items():
+            description = _DESCRIPTIONS[name[len("max_"):]] + " (maximum)" if name.startswith("max_") \
+                else _DESCRIPTIONS[name]
+            lines += _prometheus_metric(prefix + name, "gauge", description, value)
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.snapshot()}>"
+
+
+def _prometheus_metric(name, metric_type, description, value):
+    return [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}", f"{name} {value}"]
+
+
+def get_process_cpu_time(pid):
+    """Returns the CPU time (user and system, in seconds) the process with the given pid has used so far, or None if
+    it can't be found (i.e. on systems without /proc, or if the process has exited).
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as stat_file:
+            stat = stat_file.read()
+    except OSError:
+        return None
+    # The process name, in parentheses, may contain spaces.
+    fields = stat[stat.rindex(")") + 2:].split()
+    # utime and stime, which are the 14th and 15th fields of the whole line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def get_children_cpu_time():
+    """Returns the CPU time (user and system, in seconds) all the child processes which exited and were waited for
+    have used, or None if it can't be found (i.e. on Windows).
+    """
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+LatencySummary = collections.namedtuple("LatencySummary", ["count", "min", "mean", "p50", "p90", "p99", "p999", "max"])
+
+# Values are bucketed by their highest bits, as in HdrHistogram, so that buckets are at most 1/128 of their values wide
+_SUB_BUCKET_BITS = 7
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_MICROSECONDS_IN_SECOND = 10 ** 6
+_NANOSECONDS_IN_SECOND = 10 ** 9
+
+
+class LatencyHistogram:
+    """A histogram of latencies with a relative error under 1%, at any scale, and a constant cost per value.
+
+    Latencies are given and returned in seconds, and kept in microseconds.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self.count = 0
+        self._total = 0
+        self._min = None
+        self._max = 0
+
+    def record(self, seconds):
+        # Latencies measured against clocks of other processes may come out (slightly) negative.
+        value = max(int(seconds * _MICROSECONDS_IN_SECOND), 0)
+        index = _get_bucket_index(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self.count += 1
+        self._total += value
+        if self._min is None or value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+    def percentile(self, percentile) -> float:
+        """Returns the latency (in seconds) which the given percentage of the recorded latencies are at most (up to
+        the width of its bucket), or 0 if none were recorded.
+        """
+        if not self.count:
+            return 0.0
+        # The rank of the value, rounded up
+        rank = max(-(-self.count * percentile // 100), 1)
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= rank:
+                return min(_get_bucket_highest_value(index), self._max) / _MICROSECONDS_IN_SECOND
+        return self._max / _MICROSECONDS_IN_SECOND
+
+    def summary(self) -> LatencySummary:
+        if not self.count:
+            return LatencySummary(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return LatencySummary(self.count, self._min / _MICROSECONDS_IN_SECOND,
+                              self._total / self.count / _MICROSECONDS_IN_SECOND, self.percentile(50),
+                              self.percentile(90), self.percentile(99), self.percentile(99.9),
+                              self._max / _MICROSECONDS_IN_SECOND)
+
+    def reset(self):
+        self._counts.clear()
+        self.count = 0
+        self._total = 0
+        self._min = None
+        self._max = 0
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.summary()}>"
+
+
+def _get_bucket_index(value):
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS - 1
+    return (shift << _SUB_BUCKET_BITS) + (value >> shift)
+
+
+def _get_bucket_highest_value(index):
+    if index < 2 * _SUB_BUCKET_COUNT:
+        return index
+    shift = (index >> _SUB_BUCKET_BITS) - 1
+    sub_bucket = index - (shift << _SUB_BUCKET_BITS)
+    return ((sub_bucket + 1) << shift) - 1
+
+
+class PacketLatencies:
+    """Latency histograms of the way of packets from the capture to the callback.
+
+    capture_to_parse: From the capture of the packet (its sniff time) until it was parsed from tshark's output. Grows
+    when tshark falls behind.
+    parse_to_callback: From the parsing of the packet until the callback was called with it.
+    callback: The duration of the callback (or of the iterating code, when iterating over the capture).
+    """
+    NAMES = ("capture_to_parse", "parse_to_callback", "callback")
+
+    def __init__(self):
+        self.histograms = {name: LatencyHistogram() for name in self.NAMES}
+        self.capture_to_parse = self.histograms["capture_to_parse"]
+        self.parse_to_callback = self.histograms["parse_to_callback"]
+        self.callback = self.histograms["callback"]
+
+    def packet_parsed(self, packet):
+        """Records the latency from the capture of the given packet until now, if it has a sniff time.
+
+        :return: The time of the parsing, to give parse_to_callback.
+        """
+        sniff_time_ns = getattr(packet, "sniff_time_ns", None)
+        if sniff_time_ns is not None:
+            self.capture_to_parse.record((time.time_ns() - sniff_time_ns) / _NANOSECONDS_IN_SECOND)
+        return time.perf_counter()
+
+    def summary(self) -> dict:
+        """Returns a dict of {histogram name: LatencySummary}."""
+        return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.summary()}>"
@@ -0,0 +1,174 @@
+"""Profiling of the parsing and dispatching of packets in a capture, by output format and protocol layer."""
+import collections
+import cProfile
+import pstats
+import time
+import tracemalloc
+
+from pyshark.packet.lazy_packet import LazyPacket
+from pyshark.packet.packet import Packet
+
+ProfileEntry = collections.namedtuple("ProfileEntry", ["packets", "seconds", "sampled_packets", "allocated_bytes"])
+ProfileReport = collections.namedtuple("ProfileReport", [
+    "parse_by_format", "parse_by_layer", "dispatch_by_format", "dispatch_by_layer", "stats"])
+
+STAGES = ("parse", "dispatch")
+SAMPLING_TOOLS = ("cprofile", "tracemalloc")
+
+
+class CaptureProfiler:
+    """Profiles the stages of every packet in a capture:
+      parse - decoding the packet from tshark's output.
+      dispatch - the callback (or the iterating code, when iterating over the capture).
+
+    Every packet is timed, and a percentage of them is sampled through cProfile (for a call profile of the sampled
+    packets) or tracemalloc (for the memory they allocate). The results are grouped by the output format and by the
+    highest protocol layer of the packets, so a single profiler can be given to several captures to compare formats.
+
+    Summary rows are parsed in batches, so only their dispatch is profiled.
+    """
+
+    def __init__(self, sample_percent=0, sampling_tool="cprofile", on_packet_start=None, on_packet_end=None):
+        """
+        :param sample_percent: The percentage of packets (in every stage) to sample.
+        :param sampling_tool: Either "cprofile" or "tracemalloc". tracemalloc is started if it's not tracing already
+        (until close() is called), which slows down all allocations, including those of packets which are not sampled.
+        :param on_packet_start: A function called with (stage, data) when a stage starts for a packet, where data is
+        tshark's output for the packet when parsing, and the packet when dispatching.
+        :param on_packet_end: A function called with (stage, packet, seconds) when a stage ends for a packet.
+        """
+        if sampling_tool not in SAMPLING_TOOLS:
+            raise ValueError(f"Unknown sampling tool {sampling_tool}, must be one of {', '.join(SAMPLING_TOOLS)}")
+        self.sample_percent = sample_percent
+        self.sampling_tool = sampling_tool
+        self.on_packet_start = on_packet_start
+        self.on_packet_end = on_packet_end
+        self._profile = None
+        # Whether tracemalloc was started by the profiler, and should be stopped by it
+        self._started_tracemalloc = False
+        if sample_percent and sampling_tool == "cprofile":
+            self._profile = cProfile.Profile()
+        elif sample_percent and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._sample_credits = dict.fromkeys(STAGES, 0)
+        # {(stage, output format, layer name): [packets, seconds, sampled packets, allocated bytes]}
+        self._entries = {}
+        self._has_samples = False
+
+    def packet_started(self, stage, data):
+        """Called when the given stage starts for a packet.
+
+        :return: A token to give packet_finished.
+        """
+        if self.on_packet_start is not None:
+            self.on_packet_start(stage, data)
+        sampled = self._should_sample(stage)
+        allocated_memory = None
+        if sampled:
+            if self._profile is not None:
+                self._profile.enable()
+            else:
+                allocated_memory = tracemalloc.get_traced_memory()[0]
+        return time.perf_counter(), sampled, allocated_memory
+
+    def packet_finished(self, stage, packet, output_format, token):
+        """Called when the given stage ends for a packet, with the token packet_started returned.
+
+        :param packet: The packet, or None if it failed to parse.
+        """
+        seconds = time.perf_counter() - token[0]
+        sampled, allocated_memory = token[1], token[2]
+        if sampled:
+            if self._profile is not None:
+                self._profile.disable()
+            else:
+                allocated_memory = tracemalloc.get_traced_memory()[0] - allocated_memory
+            self._has_samples = True
+
+        key = (stage, output_format, get_layer_name(packet))
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [0, 0.0, 0, 0]
+        entry[0] += 1
+        entry[1] += seconds
+        if sampled:
+            entry[2] += 1
+            entry[3] += allocated_memory or 0
+        if self.on_packet_end is not None:
+            self.on_packet_end(stage, packet, seconds)
+
+    def _should_sample(self, stage):
+        """Samples exactly sample_percent of the packets, evenly spread."""
+        if not self.sample_percent:
+            return False
+        if self._profile is None and not tracemalloc.is_tracing():
+            # tracemalloc was stopped (i.e. by close())
+            return False
+        self._sample_credits[stage] += self.sample_percent
+        if self._sample_credits[stage] >= 100:
+            self._sample_credits[stage] -= 100
+            return True
+        return False
+
+    def report(self) -> ProfileReport:
+        """Returns the totals of every stage by output format and by layer.
+
+        The stats are a pstats.Stats of the sampled packets when sampling through cProfile, otherwise None.
+        """
+        groups = {(stage, group): {} for stage in STAGES for group in ("format", "layer")}
+        for (stage, output_format, layer_name), entry in self._entries.items():
+            for group, key in (("format", output_format), ("layer", layer_name)):
+                totals = groups[stage, group].setdefault(key, [0, 0.0, 0, 0])
+                for i, value in enumerate(entry):
+                    totals[i] += value
+        stats = pstats.Stats(self._profile) if self._profile and self._has_samples else None
+        return ProfileReport(*[{key: ProfileEntry(*totals) for key, totals in groups[stage, group].items()}
+                               for stage in STAGES for group in ("format", "layer")], stats)
+
+    def format_report(self) -> str:
+        """Returns the report as a table, with the costliest groups first."""
+        report = self.report()
+        lines = []
+        for title, entries in (("Parse by format", report.parse_by_format), ("Parse by layer", report.parse_by_layer),
+                               ("Dispatch by format", report.dispatch_by_format),
+                               ("Dispatch by layer", report.dispatch_by_layer)):
+            if not entries:
+                continue
+            lines.append(f"{title}:")
+            for key, entry in sorted(entries.items(), key=lambda item: item[1].seconds, reverse=True):
+                line = f"  {key:<20} packets={entry.packets:<8} total={entry.seconds:.6f}s " \
+                       f"mean={entry.seconds / entry.packets * 10 ** 6:.1f}us"
+                if self.sampling_tool == "tracemalloc" and entry.sampled_packets:
+                    line += f" mean_allocated={entry.allocated_bytes / entry.sampled_packets:.0f}B"
+                lines.append(line)
+        return "\n".join(lines)
+
+    def close(self):
+        """Stops tracemalloc if the profiler started it, after which packets are no longer sampled through it. The
+        report stays available.
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def reset(self):
+        if self._profile is not None:
+            self._profile = cProfile.Profile()
+        self._sample_credits = dict.fromkeys(STAGES, 0)
+        self._entries.clear()
+        self._has_samples = False
+
+
+def get_layer_name(packet):
+    """Returns the name of the highest protocol layer of the packet, without decoding lazy packets."""
+    if packet is None:
+        return "unknown"
+    if isinstance(packet, LazyPacket) and not packet.decoded:
+        return (packet.frame_protocols or "unknown").rsplit(":", 1)[-1]
+    if isinstance(packet, Packet):
+        return packet.highest_layer.lower() if packet.layers else "unknown"
+    if isinstance(packet, dict):
+        return list(packet)[-1] if packet else "unknown"
+    # Summaries
+    return str(getattr(packet, "protocol", "unknown")).lower()
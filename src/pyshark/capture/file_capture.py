@@ -1,6 +1,7 @@
 import pathlib
 
 from pyshark.capture.capture import Capture
+from pyshark.capture.capture_file_frames import CaptureFileFrames
 from pyshark.packet.packet import Packet
 
 
@@ -12,13 +13,16 @@ class FileCapture(Capture):
                  disable_protocol=None, tshark_path=None, override_prefs=None,
                  use_json=False, use_ek=False,
                  output_file=None, include_raw=False, eventloop=None, custom_parameters=None,
-                 debug=False):
+                 debug=False, typed_ek=False, intern_strings=False, intern_values=False, raw_from_source=False,
+                 packet_store=None, lazy_packets=False, share_layers=False, summary_columns=None,
+                 collect_metrics=False, profile=None):
         """Creates a packet capture object by reading from file.
 
         :param keep_packets: Whether to keep packets after reading them via next(). Used to conserve memory when reading
         large caps (can only be used along with the "lazy" option!)
         :param input_file: File path of the capture (PCAP, PCAPNG)
         :param display_filter: A display (wireshark) filter to apply on the cap before reading it.
+        Can also be a filter expression (see pyshark.filters), of which only what tshark can't handle runs in Python.
         :param only_summaries: Only produce packet summaries, much faster but includes very little information.
         :param decryption_key: Optional key used to encrypt and decrypt captured traffic.
         :param encryption_type: Standard of encryption used in captured traffic (must be either 'WEP', 'WPA-PWD', or
@@ -34,6 +38,37 @@ class FileCapture(Capture):
         :param output_file: A string of a file to write every read packet into (useful when filtering).
         :param custom_parameters: A dict of custom parameters to pass to tshark, i.e. {"--param": "value"}
         or else a list of parameters in the format ["--foo", "bar", "--baz", "foo"].
+        :param typed_ek: When using EK, casts the values of all fields while parsing instead of on every access.
+        :param intern_strings: Intern field and layer names through a table shared by all packets (always done for PDML
+        field names). Saves memory when keeping many packets, at some parsing cost for JSON/EK.
+        :param intern_values: When interning strings, intern short field values as well. See
+        pyshark.packet.intern_table.get_stats() for the memory saved.
+        :param raw_from_source: Attaches the raw data of every packet (see Packet.get_raw_packet_view()) straight from
+        the capture file, without copying it. Unlike include_raw, doesn't need tshark to output the packets in hex or
+        JSON.
+        :param packet_store: Keeps the packets in the given PacketStore (from pyshark.capture.packet_store) instead of
+        a list. Use a SpillingPacketStore or a CompressedPacketStore to keep huge captures without running out of
+        memory, a RingBuffer to only keep the most recent packets, or an IndexedPacketStore to query the packets by
+        their field values, layers or sniff time. The store is closed (i.e. the temporary file of a SpillingPacketStore
+        is removed) when leaving the capture's with block, otherwise it should be closed by the caller.
+        :param lazy_packets: When using JSON/EK, only reads the number, length, sniff time and frame_protocols of each
+        packet when it is parsed, and decodes the rest on the first access to its layers. Makes filtering out most
+        packets much faster.
+        :param share_layers: When using JSON/EK, keeps a single object for identical layers of different packets (i.e.
+        the same Ethernet or IP headers) instead of one per packet. Saves a lot of memory when keeping packets of
+        steady traffic. Shared layers must not be modified.
+        :param summary_columns: Reads only the given summary columns of each packet, as named tuple rows, which is the
+        cheapest way to read packets. Either a list of default column titles (i.e. "Source", "Protocol", "Info") and
+        field names (i.e. "ip.ttl"), or a dict of {title: tshark column format} (i.e. {"TTL": "%Cus:ip.ttl"}). See
+        pyshark.tshark.output_parser.tshark_tabs.
+        :param collect_metrics: Collects counters and timers of every stage packets go through (see metrics()). Off by
+        default, since timing every packet has some cost.
+        :param profile: Profiles the parsing and dispatching of every packet, by output format and protocol layer (see
+        profile_report()). Either True, a dict of CaptureProfiler arguments to sample packets through cProfile or
+        tracemalloc (i.e. {"sample_percent": 5, "sampling_tool": "tracemalloc"}), or a CaptureProfiler (from
+        pyshark.capture.capture_profiler), which may be shared by several captures. A profiler the capture created
+        stops tracemalloc when the capture is closed, which is also done at the end of apply_on_packets() and
+        load_packets(), so a capture read again after that keeps profiling without sampling memory.
         """
         super(FileCapture, self).__init__(display_filter=display_filter, only_summaries=only_summaries,
                                           decryption_key=decryption_key, encryption_type=encryption_type,
@@ -41,12 +76,21 @@ class FileCapture(Capture):
                                           tshark_path=tshark_path, override_prefs=override_prefs,
                                           use_json=use_json, use_ek=use_ek, output_file=output_file,
                                           include_raw=include_raw, eventloop=eventloop,
-                                          custom_parameters=custom_parameters, debug=debug)
+                                          custom_parameters=custom_parameters, debug=debug, typed_ek=typed_ek,
+                                          intern_strings=intern_strings, intern_values=intern_values,
+                                          packet_store=packet_store, lazy_packets=lazy_packets,
+                                          share_layers=share_layers, summary_columns=summary_columns,
+                                          collect_metrics=collect_metrics, profile=profile)
         self.input_filepath = pathlib.Path(input_file)
         if not self.input_filepath.exists():
             raise FileNotFoundError(f"[Errno 2] No such file or directory: {self.input_filepath}")
         if not self.input_filepath.is_file():
             raise FileNotFoundError(f"{self.input_filepath} is a directory")
+        self._raw_from_source = raw_from_source
+        if raw_from_source:
+            self._source_frames = CaptureFileFrames(self.input_filepath)
+        else:
+            self._source_frames = None
 
         self.keep_packets = keep_packets
         self._packet_generator = self._packets_from_tshark_sync()
@@ -58,27 +102,56 @@ class FileCapture(Capture):
         """
         if not self.keep_packets:
             return self._packet_generator.send(None)
-        elif self._current_packet >= len(self._packets):
+        elif self._current_packet >= self._get_kept_count():
             packet = self._packet_generator.send(None)
-            self._packets += [packet]
+            self._packets.append(packet)
         return super(FileCapture, self).next_packet()
 
     def __getitem__(self, packet_index):
+        """Gets the packet in the given index of the file, reading the file up to it if needed.
+
+        With a packet store which evicts packets (i.e. a RingBuffer), only the most recent packets can be gotten.
+        """
         if not self.keep_packets:
             raise NotImplementedError("Cannot use getitem if packets are not kept")
-            # We may not yet have this packet
-        while packet_index >= len(self._packets):
+        if packet_index < 0:
+            return super(FileCapture, self).__getitem__(packet_index)
+        # We may not yet have this packet
+        while packet_index >= self._get_kept_count():
             try:
                 self.next()
             except StopIteration:
                 # We read the whole file, and there's still not such packet.
                 raise KeyError(f"Packet of index {packet_index} does not exist in capture")
-        return super(FileCapture, self).__getitem__(packet_index)
+        store_index = packet_index - self._get_evicted_count()
+        if store_index < 0:
+            raise KeyError(f"Packet of index {packet_index} was evicted from the packet store")
+        return super(FileCapture, self).__getitem__(store_index)
 
     def get_parameters(self, packet_count=None):
         return super(FileCapture, self).get_parameters(packet_count=packet_count) + [
             "-r", self.input_filepath.as_posix()]
 
+    def _process_packet(self, packet):
+        packet = super(FileCapture, self)._process_packet(packet)
+        # Summaries have no raw data
+        if self._raw_from_source and isinstance(packet, Packet):
+            if self._source_frames is None:
+                # Reopened when the capture is read again after it was closed
+                self._source_frames = CaptureFileFrames(self.input_filepath)
+            try:
+                packet.set_raw_packet(self._source_frames.get_frame(int(packet.number)))
+            except KeyError:
+                self._log.warning("Frame %s is not in %s, its raw data is not attached", packet.number,
+                                  self.input_filepath)
+        return packet
+
+    async def close_async(self):
+        await super(FileCapture, self).close_async()
+        if self._source_frames is not None:
+            self._source_frames.close()
+            self._source_frames = None
+
     def _verify_capture_parameters(self):
         try:
             with self.input_filepath.open("rb"):
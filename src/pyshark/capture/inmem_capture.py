@@ -9,6 +9,7 @@ import warnings
 from packaging import version
 
 from pyshark.capture.capture import Capture, StopCapture
+from pyshark.packet.packet import Packet
 
 DEFAULT_TIMEOUT = 30
 
@@ -27,13 +28,16 @@ class InMemCapture(Capture):
                  decryption_key=None, encryption_type='wpa-pwk', decode_as=None,
                  disable_protocol=None, tshark_path=None, override_prefs=None, use_json=False, use_ek=False,
                  linktype=LinkTypes.ETHERNET, include_raw=False, eventloop=None, custom_parameters=None,
-                 debug=False):
+                 debug=False, typed_ek=False, intern_strings=False, intern_values=False, raw_from_source=False,
+                 packet_store=None, lazy_packets=False, share_layers=False, summary_columns=None,
+                 collect_metrics=False, profile=None):
         """Creates a new in-mem capture, a capture capable of receiving binary packets and parsing them using tshark.
 
         Significantly faster if packets are added in a batch.
 
         :param bpf_filter: BPF filter to use on packets.
         :param display_filter: Display (wireshark) filter to use.
+        Can also be a filter expression (see pyshark.filters), of which only what tshark can't handle runs in Python.
         :param only_summaries: Only produce packet summaries, much faster but includes very little information
         :param decryption_key: Key used to encrypt and decrypt captured traffic.
         :param encryption_type: Standard of encryption used in captured traffic (must be either 'WEP', 'WPA-PWD',
@@ -46,6 +50,37 @@ class InMemCapture(Capture):
         :param disable_protocol: Tells tshark to remove a dissector for a specifc protocol.
         :param custom_parameters: A dict of custom parameters to pass to tshark, i.e. {"--param": "value"}
         or else a list of parameters in the format ["--foo", "bar", "--baz", "foo"].
+        :param typed_ek: When using EK, casts the values of all fields while parsing instead of on every access.
+        :param intern_strings: Intern field and layer names through a table shared by all packets (always done for PDML
+        field names). Saves memory when keeping many packets, at some parsing cost for JSON/EK.
+        :param intern_values: When interning strings, intern short field values as well. See
+        pyshark.packet.intern_table.get_stats() for the memory saved.
+        :param raw_from_source: Attaches the raw data of every packet (see Packet.get_raw_packet_view()) straight from
+        the given binary packets, without copying it. Unlike include_raw, doesn't need tshark to output the packets in
+        hex or JSON.
+        :param packet_store: Keeps the packets in the given PacketStore (from pyshark.capture.packet_store) instead of
+        a list. Use a SpillingPacketStore or a CompressedPacketStore to keep huge captures without running out of
+        memory, a RingBuffer to only keep the most recent packets, or an IndexedPacketStore to query the packets by
+        their field values, layers or sniff time. The store is closed (i.e. the temporary file of a SpillingPacketStore
+        is removed) when leaving the capture's with block, otherwise it should be closed by the caller.
+        :param lazy_packets: When using JSON/EK, only reads the number, length, sniff time and frame_protocols of each
+        packet when it is parsed, and decodes the rest on the first access to its layers. Makes filtering out most
+        packets much faster.
+        :param share_layers: When using JSON/EK, keeps a single object for identical layers of different packets (i.e.
+        the same Ethernet or IP headers) instead of one per packet. Saves a lot of memory when keeping packets of
+        steady traffic. Shared layers must not be modified.
+        :param summary_columns: Reads only the given summary columns of each packet, as named tuple rows, which is the
+        cheapest way to read packets. Either a list of default column titles (i.e. "Source", "Protocol", "Info") and
+        field names (i.e. "ip.ttl"), or a dict of {title: tshark column format} (i.e. {"TTL": "%Cus:ip.ttl"}). See
+        pyshark.tshark.output_parser.tshark_tabs.
+        :param collect_metrics: Collects counters and timers of every stage packets go through (see metrics()). Off by
+        default, since timing every packet has some cost.
+        :param profile: Profiles the parsing and dispatching of every packet, by output format and protocol layer (see
+        profile_report()). Either True, a dict of CaptureProfiler arguments to sample packets through cProfile or
+        tracemalloc (i.e. {"sample_percent": 5, "sampling_tool": "tracemalloc"}), or a CaptureProfiler (from
+        pyshark.capture.capture_profiler), which may be shared by several captures. A profiler the capture created
+        stops tracemalloc when the capture is closed, which is also done at the end of apply_on_packets() and
+        load_packets(), so a capture read again after that keeps profiling without sampling memory.
         """
         super(InMemCapture, self).__init__(display_filter=display_filter, only_summaries=only_summaries,
                                            decryption_key=decryption_key, encryption_type=encryption_type,
@@ -53,11 +88,20 @@ class InMemCapture(Capture):
                                            tshark_path=tshark_path, override_prefs=override_prefs,
                                            use_json=use_json, use_ek=use_ek,
                                            include_raw=include_raw, eventloop=eventloop,
-                                           custom_parameters=custom_parameters, debug=debug)
+                                           custom_parameters=custom_parameters, debug=debug, typed_ek=typed_ek,
+                                           intern_strings=intern_strings, intern_values=intern_values,
+                                           packet_store=packet_store, lazy_packets=lazy_packets,
+                                           share_layers=share_layers, summary_columns=summary_columns,
+                                           collect_metrics=collect_metrics, profile=profile)
         self.bpf_filter = bpf_filter
         self._packets_to_write = None
         self._current_linktype = linktype
         self._current_tshark = None
+        self._raw_from_source = raw_from_source
+        # The amount of packets written to the current tshark process, and the written packets which were not parsed
+        # yet by their frame number (only when attaching their raw data).
+        self._written_frame_count = 0
+        self._unparsed_binary_packets = {}
 
     def get_parameters(self, packet_count=None):
         """Returns the special tshark parameters to be used according to the configuration of this class."""
@@ -66,6 +110,10 @@ class InMemCapture(Capture):
         params += ['-i', '-']
         return params
 
+    def get_stats(self, taps, packet_count=None, duration=None, timeout=None):
+        # The tshark process parses the packets given to it as they come, its input never ends.
+        raise NotImplementedError("Statistics taps are not supported for in-memory captures")
+
     async def _get_tshark_process(self, packet_count=None):
         if self._current_tshark:
             return self._current_tshark
@@ -104,6 +152,9 @@ class InMemCapture(Capture):
         self._current_tshark.stdin.write(struct.pack(
             "IIII", secs, usecs, len(packet), len(packet)))
         self._current_tshark.stdin.write(packet)
+        self._written_frame_count += 1
+        if self._raw_from_source:
+            self._unparsed_binary_packets[self._written_frame_count] = packet
 
     def parse_packet(self, binary_packet, sniff_time=None, timeout=DEFAULT_TIMEOUT):
         """Parses a single binary packet and returns its parsed version.
@@ -145,9 +196,21 @@ class InMemCapture(Capture):
             if len(parsed_packets) == len(binary_packets):
                 raise StopCapture()
 
-        await self._get_parsed_packet_from_tshark(callback, timeout)
+        try:
+            await self._get_parsed_packet_from_tshark(callback, timeout)
+        finally:
+            # Packets which did not pass the display filter are never parsed.
+            self._unparsed_binary_packets.clear()
         return parsed_packets
 
+    def _process_packet(self, packet):
+        packet = super(InMemCapture, self)._process_packet(packet)
+        if self._raw_from_source and isinstance(packet, Packet):
+            binary_packet = self._unparsed_binary_packets.pop(int(packet.number), None)
+            if binary_packet is not None:
+                packet.set_raw_packet(binary_packet)
+        return packet
+
     async def _get_parsed_packet_from_tshark(self, callback, timeout):
         await self._current_tshark.stdin.drain()
         try:
@@ -160,6 +223,8 @@ class InMemCapture(Capture):
 
     async def close_async(self):
         self._current_tshark = None
+        self._written_frame_count = 0
+        self._unparsed_binary_packets.clear()
         await super(InMemCapture, self).close_async()
 
     def feed_packet(self, binary_packet, linktype=LinkTypes.ETHERNET, timeout=DEFAULT_TIMEOUT):
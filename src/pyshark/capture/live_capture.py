@@ -4,11 +4,16 @@ import subprocess
 
 from packaging import version
 
-from pyshark.capture.capture import Capture
+from pyshark import filters
+from pyshark.capture import capture_metrics
+from pyshark.capture.capture import Capture, MetricsNotCollectedException
 from pyshark.tshark import tshark
 from pyshark.tshark.tshark import get_tshark_interfaces, get_process_path
 
 
+_NOT_DERIVED = object()
+
+
 class UnknownInterfaceException(Exception):
     pass
 
@@ -21,12 +26,15 @@ class LiveCapture(Capture):
                  disable_protocol=None, tshark_path=None, override_prefs=None, capture_filter=None,
                  monitor_mode=False, use_json=False, use_ek=False,
                  include_raw=False, eventloop=None, custom_parameters=None,
-                 debug=False):
+                 debug=False, typed_ek=False, intern_strings=False, intern_values=False, packet_store=None,
+                 lazy_packets=False, share_layers=False, derive_bpf_filter=False, summary_columns=None,
+                 collect_metrics=False, record_latency=False, profile=None):
         """Creates a new live capturer on a given interface. Does not start the actual capture itself.
 
         :param interface: Name of the interface to sniff on or a list of names (str). If not given, runs on all interfaces.
         :param bpf_filter: BPF filter to use on packets.
         :param display_filter: Display (wireshark) filter to use.
+        Can also be a filter expression (see pyshark.filters), of which only what tshark can't handle runs in Python.
         :param only_summaries: Only produce packet summaries, much faster but includes very little information
         :param decryption_key: Optional key used to encrypt and decrypt captured traffic.
         :param encryption_type: Standard of encryption used in captured traffic (must be either 'WEP', 'WPA-PWD', or
@@ -43,6 +51,41 @@ class LiveCapture(Capture):
         :param use_json: DEPRECATED. Use use_ek instead.
         :param custom_parameters: A dict of custom parameters to pass to tshark, i.e. {"--param": "value"} or
         else a list of parameters in the format ["--foo", "bar", "--baz", "foo"].
+        :param typed_ek: When using EK, casts the values of all fields while parsing instead of on every access.
+        :param intern_strings: Intern field and layer names through a table shared by all packets (always done for PDML
+        field names). Saves memory when keeping many packets, at some parsing cost for JSON/EK.
+        :param intern_values: When interning strings, intern short field values as well. See
+        pyshark.packet.intern_table.get_stats() for the memory saved.
+        :param packet_store: Keeps the packets in the given PacketStore (from pyshark.capture.packet_store) instead of
+        a list. Use a SpillingPacketStore or a CompressedPacketStore to keep huge captures without running out of
+        memory, a RingBuffer to only keep the most recent packets, or an IndexedPacketStore to query the packets by
+        their field values, layers or sniff time. The store is closed (i.e. the temporary file of a SpillingPacketStore
+        is removed) when leaving the capture's with block, otherwise it should be closed by the caller.
+        :param lazy_packets: When using JSON/EK, only reads the number, length, sniff time and frame_protocols of each
+        packet when it is parsed, and decodes the rest on the first access to its layers. Makes filtering out most
+        packets much faster.
+        :param share_layers: When using JSON/EK, keeps a single object for identical layers of different packets (i.e.
+        the same Ethernet or IP headers) instead of one per packet. Saves a lot of memory when keeping packets of
+        steady traffic. Shared layers must not be modified.
+        :param derive_bpf_filter: When no bpf_filter is given, derives a BPF filter which matches all the packets the
+        display filter may match (from its hosts, ports and protocols), so that dumpcap drops the rest before tshark
+        dissects them. The display filter is still applied as is. The derived filter only looks at the outermost
+        headers (and a single VLAN tag, on link types which have them), so don't use this when filtering on
+        encapsulated headers, i.e. in tunnels. If the filter can't be compiled for the interfaces, none is used.
+        :param summary_columns: Reads only the given summary columns of each packet, as named tuple rows, which is the
+        cheapest way to read packets. Either a list of default column titles (i.e. "Source", "Protocol", "Info") and
+        field names (i.e. "ip.ttl"), or a dict of {title: tshark column format} (i.e. {"TTL": "%Cus:ip.ttl"}). See
+        pyshark.tshark.output_parser.tshark_tabs.
+        :param collect_metrics: Collects counters and timers of every stage packets go through (see metrics()). Off by
+        default, since timing every packet has some cost.
+        :param record_latency: Records latency histograms of the packets from their capture to the callback (see
+        latencies()). Adds some cost to every packet.
+        :param profile: Profiles the parsing and dispatching of every packet, by output format and protocol layer (see
+        profile_report()). Either True, a dict of CaptureProfiler arguments to sample packets through cProfile or
+        tracemalloc (i.e. {"sample_percent": 5, "sampling_tool": "tracemalloc"}), or a CaptureProfiler (from
+        pyshark.capture.capture_profiler), which may be shared by several captures. A profiler the capture created
+        stops tracemalloc when the capture is closed, which is also done at the end of apply_on_packets() and
+        load_packets(), so a capture read again after that keeps profiling without sampling memory.
         """
         super(LiveCapture, self).__init__(display_filter=display_filter, only_summaries=only_summaries,
                                           decryption_key=decryption_key, encryption_type=encryption_type,
@@ -51,8 +94,16 @@ class LiveCapture(Capture):
                                           capture_filter=capture_filter, use_json=use_json, use_ek=use_ek,
                                           include_raw=include_raw,
                                           eventloop=eventloop, custom_parameters=custom_parameters,
-                                          debug=debug)
+                                          debug=debug, typed_ek=typed_ek,
+                                          intern_strings=intern_strings, intern_values=intern_values,
+                                          packet_store=packet_store, lazy_packets=lazy_packets,
+                                          share_layers=share_layers, summary_columns=summary_columns,
+                                          collect_metrics=collect_metrics, profile=profile)
         self.bpf_filter = bpf_filter
+        self.derive_bpf_filter = derive_bpf_filter
+        self._derived_bpf_filter = _NOT_DERIVED
+        if record_latency:
+            self._latencies = capture_metrics.PacketLatencies()
         self.monitor_mode = monitor_mode
 
         all_interfaces = get_tshark_interfaces(tshark_path)
@@ -63,6 +114,16 @@ class LiveCapture(Capture):
         else:
             self.interfaces = interface
 
+    def latencies(self) -> capture_metrics.PacketLatencies:
+        """Returns the latency histograms of the packets captured so far: from their capture until they were parsed,
+        from their parsing until the callback was called with them, and of the callback.
+
+        Use summary() for their percentiles and reset() to start over, i.e. once per reporting interval.
+        """
+        if self._latencies is None:
+            raise MetricsNotCollectedException("The capture must be created with record_latency=True")
+        return self._latencies
+
     def get_parameters(self, packet_count=None):
         """Returns the special tshark parameters to be used according to the configuration of this class."""
         params = super(LiveCapture, self).get_parameters(packet_count=packet_count)
@@ -90,8 +151,9 @@ class LiveCapture(Capture):
         if self._get_tshark_version() < version.parse("2.5.0"):
             # Tshark versions older than 2.5 don't support pcapng. This flag forces dumpcap to output pcap.
             params += ["-P"]
-        if self.bpf_filter:
-            params += ["-f", self.bpf_filter]
+        bpf_filter = self._get_bpf_filter()
+        if bpf_filter:
+            params += ["-f", bpf_filter]
         if self.monitor_mode:
             params += ["-I"]
         for interface in self.interfaces:
@@ -100,7 +162,31 @@ class LiveCapture(Capture):
         params += ["-w", "-"]
         return params
 
-    async def _get_tshark_process(self, packet_count=None, stdin=None):
+    def _get_bpf_filter(self):
+        """Gets the BPF filter for dumpcap: bpf_filter if given, or else one derived from the display filter."""
+        if self.bpf_filter or not self.derive_bpf_filter:
+            return self.bpf_filter
+        if self._derived_bpf_filter is _NOT_DERIVED:
+            self._derived_bpf_filter = self._derive_bpf_filter()
+        return self._derived_bpf_filter
+
+    def _derive_bpf_filter(self):
+        expression = self._filter_expression
+        if expression is None and self._display_filter:
+            expression = filters.parse_display_filter(self._display_filter)
+        if expression is None or expression.to_bpf() is None:
+            return None
+        # Only allows for VLAN tags on the link types which have them.
+        for bpf_filter in (expression.to_bpf(), expression.to_bpf(vlan=False)):
+            if all(tshark.bpf_filter_compiles(bpf_filter, interface, tshark_path=self.tshark_path)
+                   for interface in self.interfaces):
+                self._log.info("Using BPF filter derived from the display filter: %s", bpf_filter)
+                return bpf_filter
+        self._log.warning("The BPF filter derived from the display filter can't be compiled for the interfaces, "
+                          "capturing without it: %s", expression.to_bpf(vlan=False))
+        return None
+
+    async def _get_tshark_process(self, packet_count=None, stdin=None, extra_parameters=None):
         read, write = os.pipe()
 
         dumpcap_params = [get_process_path(process_name="dumpcap", tshark_path=self.tshark_path)] + self._get_dumpcap_parameters()
@@ -111,7 +197,8 @@ class LiveCapture(Capture):
         self._create_stderr_handling_task(dumpcap_process.stderr)
         self._created_new_process(dumpcap_params, dumpcap_process, process_name="Dumpcap")
 
-        tshark = await super(LiveCapture, self)._get_tshark_process(packet_count=packet_count, stdin=read)
+        tshark = await super(LiveCapture, self)._get_tshark_process(packet_count=packet_count, stdin=read,
+                                                                    extra_parameters=extra_parameters)
         return tshark
 
     # Backwards compatibility
@@ -9,7 +9,9 @@ class LiveRingCapture(LiveCapture):
                  encryption_type='wpa-pwk', decode_as=None, disable_protocol=None,
                  tshark_path=None, override_prefs=None, capture_filter=None, 
                  use_json=False, use_ek=False, include_raw=False, eventloop=None, 
-                 custom_parameters=None, debug=False):
+                 custom_parameters=None, debug=False, typed_ek=False, intern_strings=False, intern_values=False,
+                 packet_store=None, lazy_packets=False, share_layers=False, derive_bpf_filter=False,
+                 summary_columns=None, collect_metrics=False, record_latency=False, profile=None):
         """
         Creates a new live capturer on a given interface. Does not start the actual capture itself.
         :param ring_file_size: Size of the ring file in kB, default is 1024
@@ -18,6 +20,7 @@ class LiveRingCapture(LiveCapture):
         :param interface: Name of the interface to sniff on or a list of names (str). If not given, runs on all interfaces.
         :param bpf_filter: BPF filter to use on packets.
         :param display_filter: Display (wireshark) filter to use.
+        Can also be a filter expression (see pyshark.filters), of which only what tshark can't handle runs in Python.
         :param only_summaries: Only produce packet summaries, much faster but includes very little information
         :param decryption_key: Optional key used to encrypt and decrypt captured traffic.
         :param encryption_type: Standard of encryption used in captured traffic (must be either 'WEP', 'WPA-PWD', or
@@ -33,13 +36,53 @@ class LiveRingCapture(LiveCapture):
         :param use_json: DEPRECATED. Use use_ek instead.
         :param custom_parameters:  A dict of custom parameters to pass to tshark, i.e. {"--param": "value"}
         or else a list of parameters in the format ["--foo", "bar", "--baz", "foo"]. or else a list of parameters in the format ["--foo", "bar", "--baz", "foo"].
+        :param typed_ek: When using EK, casts the values of all fields while parsing instead of on every access.
+        :param intern_strings: Intern field and layer names through a table shared by all packets (always done for PDML
+        field names). Saves memory when keeping many packets, at some parsing cost for JSON/EK.
+        :param intern_values: When interning strings, intern short field values as well. See
+        pyshark.packet.intern_table.get_stats() for the memory saved.
+        :param packet_store: Keeps the packets in the given PacketStore (from pyshark.capture.packet_store) instead of
+        a list. Use a SpillingPacketStore or a CompressedPacketStore to keep huge captures without running out of
+        memory, a RingBuffer to only keep the most recent packets, or an IndexedPacketStore to query the packets by
+        their field values, layers or sniff time. The store is closed (i.e. the temporary file of a SpillingPacketStore
+        is removed) when leaving the capture's with block, otherwise it should be closed by the caller.
+        :param lazy_packets: When using JSON/EK, only reads the number, length, sniff time and frame_protocols of each
+        packet when it is parsed, and decodes the rest on the first access to its layers. Makes filtering out most
+        packets much faster.
+        :param share_layers: When using JSON/EK, keeps a single object for identical layers of different packets (i.e.
+        the same Ethernet or IP headers) instead of one per packet. Saves a lot of memory when keeping packets of
+        steady traffic. Shared layers must not be modified.
+        :param derive_bpf_filter: When no bpf_filter is given, derives a BPF filter which matches all the packets the
+        display filter may match (from its hosts, ports and protocols), so that dumpcap drops the rest before tshark
+        dissects them. The display filter is still applied as is. The derived filter only looks at the outermost
+        headers (and a single VLAN tag, on link types which have them), so don't use this when filtering on
+        encapsulated headers, i.e. in tunnels. If the filter can't be compiled for the interfaces, none is used.
+        :param summary_columns: Reads only the given summary columns of each packet, as named tuple rows, which is the
+        cheapest way to read packets. Either a list of default column titles (i.e. "Source", "Protocol", "Info") and
+        field names (i.e. "ip.ttl"), or a dict of {title: tshark column format} (i.e. {"TTL": "%Cus:ip.ttl"}). See
+        pyshark.tshark.output_parser.tshark_tabs.
+        :param collect_metrics: Collects counters and timers of every stage packets go through (see metrics()). Off by
+        default, since timing every packet has some cost.
+        :param record_latency: Records latency histograms of the packets from their capture to the callback (see
+        latencies()). Adds some cost to every packet.
+        :param profile: Profiles the parsing and dispatching of every packet, by output format and protocol layer (see
+        profile_report()). Either True, a dict of CaptureProfiler arguments to sample packets through cProfile or
+        tracemalloc (i.e. {"sample_percent": 5, "sampling_tool": "tracemalloc"}), or a CaptureProfiler (from
+        pyshark.capture.capture_profiler), which may be shared by several captures. A profiler the capture created
+        stops tracemalloc when the capture is closed, which is also done at the end of apply_on_packets() and
+        load_packets(), so a capture read again after that keeps profiling without sampling memory.
         """
         super(LiveRingCapture, self).__init__(interface, bpf_filter=bpf_filter, display_filter=display_filter, only_summaries=only_summaries,
                                               decryption_key=decryption_key, encryption_type=encryption_type,
                                               tshark_path=tshark_path, decode_as=decode_as, disable_protocol=disable_protocol,
                                               override_prefs=override_prefs, capture_filter=capture_filter, 
                                               use_json=use_json, use_ek=use_ek, include_raw=include_raw, eventloop=eventloop,
-                                              custom_parameters=custom_parameters, debug=debug)
+                                              custom_parameters=custom_parameters, debug=debug, typed_ek=typed_ek,
+                                              intern_strings=intern_strings, intern_values=intern_values,
+                                              packet_store=packet_store, lazy_packets=lazy_packets,
+                                              share_layers=share_layers, derive_bpf_filter=derive_bpf_filter,
+                                              summary_columns=summary_columns, collect_metrics=collect_metrics,
+                                              record_latency=record_latency, profile=profile)
 
         self.ring_file_size = ring_file_size
         self.num_ring_files = num_ring_files
@@ -0,0 +1,642 @@
+import bisect
+import collections
+import datetime
+import mmap
+import pickle
+import sys
+import tempfile
+import time
+import typing
+import zlib
+from array import array
+
+from pyshark.packet import serialization
+from pyshark.packet.packet import Packet
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Record types in the spill file
+_SERIALIZED_PACKET = 0
+_PICKLED_OBJECT = 1
+
+_RSS_CHECK_INTERVAL = 1000
+# The size of the compression dictionary taken from the first chunk of a CompressedPacketStore. This is also the
+# maximal size zlib supports.
+_DICTIONARY_SIZE = 32 * 1024
+
+
+class PacketStore:
+    """Base class for the containers a capture can keep its packets in instead of a list.
+
+    Supports indexing (including negative indices and slices), iteration and len() like a list.
+    """
+
+    def append(self, packet):
+        raise NotImplementedError()
+
+    def get_packet(self, index):
+        """Gets the packet in the given (non-negative) index."""
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def extend(self, packets):
+        for packet in packets:
+            self.append(packet)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.get_packet(index) for index in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("Packet index out of range")
+        return self.get_packet(item)
+
+    def __iter__(self):
+        index = 0
+        while index < len(self):
+            yield self.get_packet(index)
+            index += 1
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({len(self)} packets)>"
+
+
+class RingBuffer(PacketStore):
+    """A packet store which only keeps the most recent packets, for captures which run for a long time.
+
+    Packets are evicted, oldest first, once any of the limits is exceeded. Index 0 is the oldest packet still kept and
+    -1 is the newest one.
+    """
+
+    def __init__(self, max_packets=None, max_age=None, max_bytes=None):
+        """
+        :param max_packets: The maximum amount of packets to keep.
+        :param max_age: The maximum time in seconds to keep a packet for, since it was added.
+        :param max_bytes: The maximum total length of the packets kept (their length on the wire).
+        """
+        if max_packets is None and max_age is None and max_bytes is None:
+            raise ValueError("At least one of max_packets, max_age and max_bytes must be given")
+        self.max_packets = max_packets
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.evicted_count = 0
+        self._packets = collections.deque()
+        # The time each packet was added and its length, only kept for the limits which need them.
+        self._added_times = collections.deque()
+        self._lengths = collections.deque()
+        self._total_bytes = 0
+
+    def append(self, packet):
+        self._packets.append(packet)
+        if self.max_age is not None:
+            self._added_times.append(time.monotonic())
+        if self.max_bytes is not None:
+            length = _get_packet_length(packet)
+            self._lengths.append(length)
+            self._total_bytes += length
+        self._evict()
+
+    def get_packet(self, index):
+        return self._packets[index]
+
+    def clear(self):
+        self._packets.clear()
+        self._added_times.clear()
+        self._lengths.clear()
+        self._total_bytes = 0
+        self.evicted_count = 0
+
+    def __len__(self):
+        if self.max_age is not None:
+            self._evict()
+        return len(self._packets)
+
+    def __iter__(self):
+        if self.max_age is not None:
+            self._evict()
+        # A copy, so that packets added while iterating don't break the iteration.
+        return iter(list(self._packets))
+
+    def _evict(self):
+        packets = self._packets
+        if self.max_packets is not None:
+            while len(packets) > self.max_packets:
+                self._evict_oldest()
+        if self.max_bytes is not None:
+            while self._total_bytes > self.max_bytes:
+                self._evict_oldest()
+        if self.max_age is not None:
+            oldest_time = time.monotonic() - self.max_age
+            while packets and self._added_times[0] < oldest_time:
+                self._evict_oldest()
+
+    def _evict_oldest(self):
+        self._packets.popleft()
+        self.evicted_count += 1
+        if self.max_age is not None:
+            self._added_times.popleft()
+        if self.max_bytes is not None:
+            self._total_bytes -= self._lengths.popleft()
+
+
+class SpillingPacketStore(PacketStore):
+    """A packet store which keeps all the packets in memory until a threshold is reached, and from then on writes
+    them to a temporary file.
+
+    Once spilling, only the most recently used packets are kept in memory, the rest are read back from the file
+    (which is memory-mapped) when accessed. A packet read back from the file is a new object, so changes made to
+    packets are lost once they leave memory.
+    """
+
+    def __init__(self, spill_after_packets=100000, spill_after_rss=None, memory_packets=10000, directory=None):
+        """
+        :param spill_after_packets: Starts writing packets to disk once the store has this many packets.
+        :param spill_after_rss: Starts writing packets to disk once the memory used by the process (its resident set
+        size, in bytes) reaches this size. Checked every 1000 packets.
+        :param memory_packets: The amount of packets kept in memory once spilling to disk.
+        :param directory: The directory to create the temporary file in. Defaults to the system's temporary directory.
+        """
+        self.spill_after_packets = spill_after_packets
+        self.spill_after_rss = spill_after_rss
+        self.memory_packets = memory_packets
+        self.directory = directory
+        self._packets = []
+        self._spill_file = None
+        self._mapped_file = None
+        self._offsets = array("Q")
+        self._cache = collections.OrderedDict()
+
+    @property
+    def spilling(self) -> bool:
+        """Whether packets are written to disk."""
+        return self._spill_file is not None
+
+    def append(self, packet):
+        if self._spill_file is None:
+            self._packets.append(packet)
+            if self._should_spill():
+                self._start_spilling()
+            return
+
+        index = len(self._offsets) - 1
+        self._write_record(packet)
+        self._cache_packet(index, packet)
+
+    def get_packet(self, index):
+        if self._spill_file is None:
+            return self._packets[index]
+
+        packet = self._cache.get(index)
+        if packet is not None:
+            self._cache.move_to_end(index)
+            return packet
+        packet = self._read_record(index)
+        self._cache_packet(index, packet)
+        return packet
+
+    def clear(self):
+        self._packets = []
+        self._cache.clear()
+        self._offsets = array("Q")
+        if self._spill_file is not None:
+            if self._mapped_file is not None:
+                self._mapped_file.close()
+                self._mapped_file = None
+            self._spill_file.close()
+            self._spill_file = None
+
+    def close(self):
+        """Removes the temporary file."""
+        self.clear()
+
+    def __len__(self):
+        if self._spill_file is None:
+            return len(self._packets)
+        return len(self._offsets) - 1
+
+    def _should_spill(self):
+        if self.spill_after_packets is not None and len(self._packets) >= self.spill_after_packets:
+            return True
+        if self.spill_after_rss is not None and len(self._packets) % _RSS_CHECK_INTERVAL == 0:
+            rss = _get_rss()
+            return rss is not None and rss >= self.spill_after_rss
+        return False
+
+    def _start_spilling(self):
+        self._spill_file = tempfile.TemporaryFile(prefix="pyshark_packets_", dir=self.directory)
+        # The offset of every record, followed by the end of the file.
+        self._offsets = array("Q", [0])
+        packets, self._packets = self._packets, []
+        for index, packet in enumerate(packets):
+            self._write_record(packet)
+            if index >= len(packets) - self.memory_packets:
+                self._cache_packet(index, packet)
+
+    def _cache_packet(self, index, packet):
+        self._cache[index] = packet
+        if len(self._cache) > self.memory_packets:
+            self._cache.popitem(last=False)
+
+    def _write_record(self, packet):
+        if isinstance(packet, Packet):
+            record = bytes([_SERIALIZED_PACKET]) + packet.to_bytes()
+        else:
+            # Packet summaries, or anything else a user may keep in the capture.
+            record = bytes([_PICKLED_OBJECT]) + pickle.dumps(packet, protocol=pickle.HIGHEST_PROTOCOL)
+        self._spill_file.write(record)
+        self._offsets.append(self._offsets[-1] + len(record))
+
+    def _read_record(self, index):
+        start, end = self._offsets[index], self._offsets[index + 1]
+        if self._mapped_file is None or end > len(self._mapped_file):
+            # The file grew since it was mapped.
+            if self._mapped_file is not None:
+                self._mapped_file.close()
+            self._spill_file.flush()
+            self._mapped_file = mmap.mmap(self._spill_file.fileno(), 0, access=mmap.ACCESS_READ)
+        with memoryview(self._mapped_file) as mapped_view:
+            with mapped_view[start + 1:end] as record:
+                if self._mapped_file[start] == _SERIALIZED_PACKET:
+                    return Packet.from_bytes(record)
+                return pickle.loads(record)
+
+
+class CompressedPacketStore(PacketStore):
+    """A packet store which keeps packets compressed in memory, in chunks.
+
+    Every chunk of packets is serialized and compressed once it is full, with a dictionary made from the first chunk so
+    that the data shared by all packets (such as field names) compresses well. Packets are only decompressed when
+    accessed, and the packets of the most recently used chunks are kept uncompressed. A packet decompressed from a
+    chunk is a new object, so changes made to packets are lost once their chunk leaves the cache.
+
+    Uses zstd if the zstandard package is installed and zlib otherwise.
+    """
+
+    def __init__(self, chunk_size=256, compression=None, compression_level=None, cached_chunks=4):
+        """
+        :param chunk_size: The amount of packets compressed together. Bigger chunks compress better but make accessing
+        a single packet slower.
+        :param compression: "zstd" or "zlib". By default zstd is used if it's installed.
+        :param compression_level: The compression level, by default the compression's default.
+        :param cached_chunks: The amount of chunks to keep uncompressed.
+        """
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "zlib"
+        if compression not in ("zstd", "zlib"):
+            raise ValueError(f"Unknown compression {compression}, must be zstd or zlib")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("The zstandard package must be installed to use zstd compression")
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.compression_level = compression_level
+        self.cached_chunks = cached_chunks
+        self._chunks = []
+        self._open_chunk = []
+        self._cache = collections.OrderedDict()
+        self._dictionary = None
+        self._zstd_compressor = None
+        self._zstd_decompressor = None
+
+    @property
+    def compressed_size(self) -> int:
+        """The total size of the compressed chunks in bytes."""
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def append(self, packet):
+        self._open_chunk.append(packet)
+        if len(self._open_chunk) >= self.chunk_size:
+            self._close_chunk()
+
+    def get_packet(self, index):
+        chunk_index, packet_index = divmod(index, self.chunk_size)
+        if chunk_index == len(self._chunks):
+            return self._open_chunk[packet_index]
+
+        packets = self._cache.get(chunk_index)
+        if packets is None:
+            packets = self._decompress_chunk(self._chunks[chunk_index])
+            self._cache_chunk(chunk_index, packets)
+        else:
+            self._cache.move_to_end(chunk_index)
+        return packets[packet_index]
+
+    def clear(self):
+        self._chunks = []
+        self._open_chunk = []
+        self._cache.clear()
+        self._dictionary = None
+        self._zstd_compressor = None
+        self._zstd_decompressor = None
+
+    def __len__(self):
+        return len(self._chunks) * self.chunk_size + len(self._open_chunk)
+
+    def _close_chunk(self):
+        packets, self._open_chunk = self._open_chunk, []
+        if all(isinstance(packet, Packet) for packet in packets):
+            data = bytes([_SERIALIZED_PACKET]) + serialization.packets_to_bytes(packets)
+        else:
+            # Packet summaries, or anything else a user may keep in the capture.
+            data = bytes([_PICKLED_OBJECT]) + pickle.dumps(packets, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._dictionary is None:
+            self._dictionary = data[:_DICTIONARY_SIZE]
+
+        if self.compression == "zstd":
+            if self._zstd_compressor is None:
+                self._zstd_compressor = zstandard.ZstdCompressor(level=self.compression_level or 3,
+                                                                 dict_data=self._get_zstd_dictionary())
+            compressed_data = self._zstd_compressor.compress(data)
+        else:
+            level = zlib.Z_DEFAULT_COMPRESSION if self.compression_level is None else self.compression_level
+            compressor = zlib.compressobj(level, zdict=self._dictionary)
+            compressed_data = compressor.compress(data) + compressor.flush()
+        self._chunks.append(compressed_data)
+        # The packets were just used, so they're likely to be used again soon.
+        self._cache_chunk(len(self._chunks) - 1, packets)
+
+    def _decompress_chunk(self, compressed_data):
+        if self.compression == "zstd":
+            if self._zstd_decompressor is None:
+                self._zstd_decompressor = zstandard.ZstdDecompressor(dict_data=self._get_zstd_dictionary())
+            data = self._zstd_decompressor.decompress(compressed_data)
+        else:
+            data = zlib.decompressobj(zdict=self._dictionary).decompress(compressed_data)
+        if data[0] == _SERIALIZED_PACKET:
+            return serialization.packets_from_bytes(memoryview(data)[1:])
+        return pickle.loads(memoryview(data)[1:])
+
+    def _get_zstd_dictionary(self):
+        return zstandard.ZstdCompressionDict(self._dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT)
+
+    def _cache_chunk(self, chunk_index, packets):
+        self._cache[chunk_index] = packets
+        if len(self._cache) > self.cached_chunks:
+            self._cache.popitem(last=False)
+
+
+class IndexedPacketStore(PacketStore):
+    """A packet store which keeps packets in memory and answers queries on them through secondary indexes.
+
+    Indexes can be kept by layer presence, by the values of chosen fields (i.e. "ip.src" or "tcp.stream") and by
+    sniff time. They are built from the packets already in the store when created, and kept up to date as packets are
+    added. Querying a field or layers without an index creates one, so only the first query scans all the packets.
+    Queries return the matching packets in the order they were added.
+
+    Indexing the fields or layers of lazy packets decodes them.
+    """
+
+    def __init__(self, indexed_fields=(), index_layers=False, index_time=False):
+        """
+        :param indexed_fields: Names of fields to index the values of, i.e. ["ip.src", "tcp.stream"].
+        :param index_layers: Whether to index which layers each packet has.
+        :param index_time: Whether to index the sniff time of the packets.
+        """
+        self._packets = []
+        self._field_indexes = {}
+        self._layer_index = None
+        self._time_index = None
+        for field_name in indexed_fields:
+            self.create_field_index(field_name)
+        if index_layers:
+            self.create_layer_index()
+        if index_time:
+            self.create_time_index()
+
+    @property
+    def indexed_fields(self) -> typing.List[str]:
+        return list(self._field_indexes)
+
+    def create_field_index(self, field_name, value_type=None):
+        """Indexes the values of the given field, if it's not indexed already.
+
+        :param field_name: The full name of the field, i.e. "ip.src" or "ip.flags.df". Fields which appear more than
+        once in a packet are indexed by all their values.
+        :param value_type: A function to convert the values with before indexing them (and the values queried for),
+        i.e. int, so that range queries compare numbers rather than strings. Values it raises a ValueError or
+        TypeError for are not indexed.
+        """
+        if field_name not in self._field_indexes:
+            field_index = _FieldIndex(field_name, value_type)
+            for index, packet in enumerate(self._packets):
+                field_index.add(index, packet)
+            self._field_indexes[field_name] = field_index
+
+    def create_layer_index(self):
+        """Indexes which layers each packet has, if they're not indexed already."""
+        if self._layer_index is None:
+            self._layer_index = {}
+            for index, packet in enumerate(self._packets):
+                self._add_to_layer_index(index, packet)
+
+    def create_time_index(self):
+        """Indexes the sniff time of the packets, if it's not indexed already."""
+        if self._time_index is None:
+            self._time_index = _TimeIndex()
+            for index, packet in enumerate(self._packets):
+                self._time_index.add(index, packet)
+
+    def with_layer(self, layer_name) -> typing.List[Packet]:
+        """Gets the packets which have a layer with the given name (case insensitive)."""
+        self.create_layer_index()
+        return self._get_packets(self._layer_index.get(layer_name.lower(), ()))
+
+    def where(self, field_name, value) -> typing.List[Packet]:
+        """Gets the packets in which the given field has the given value."""
+        return self.where_in(field_name, [value])
+
+    def where_in(self, field_name, values) -> typing.List[Packet]:
+        """Gets the packets in which the given field has any of the given values."""
+        self.create_field_index(field_name)
+        return self._get_packets(self._field_indexes[field_name].get_indices(values))
+
+    def where_between(self, field_name, low=None, high=None) -> typing.List[Packet]:
+        """Gets the packets in which the given field has a value between low and high (inclusive).
+
+        Either limit may be None for an open range. All the indexed values of the field must be comparable, so use
+        the value_type of create_field_index() for numeric fields.
+        """
+        self.create_field_index(field_name)
+        return self._get_packets(self._field_indexes[field_name].get_indices_between(low, high))
+
+    def sniffed_between(self, start=None, end=None) -> typing.List[Packet]:
+        """Gets the packets sniffed between start and end (inclusive).
+
+        :param start: A datetime or an epoch timestamp in seconds (like Packet.sniff_timestamp), or None for no lower
+        limit.
+        :param end: Same as start, or None for no upper limit.
+        """
+        self.create_time_index()
+        return self._get_packets(self._time_index.get_indices_between(_to_ns(start), _to_ns(end)))
+
+    def append(self, packet):
+        index = len(self._packets)
+        self._packets.append(packet)
+        for field_index in self._field_indexes.values():
+            field_index.add(index, packet)
+        if self._layer_index is not None:
+            self._add_to_layer_index(index, packet)
+        if self._time_index is not None:
+            self._time_index.add(index, packet)
+
+    def get_packet(self, index):
+        return self._packets[index]
+
+    def clear(self):
+        """Removes all the packets. The indexes are kept, empty."""
+        self._packets = []
+        for field_index in self._field_indexes.values():
+            field_index.clear()
+        if self._layer_index is not None:
+            self._layer_index = {}
+        if self._time_index is not None:
+            self._time_index = _TimeIndex()
+
+    def __len__(self):
+        return len(self._packets)
+
+    def __iter__(self):
+        return iter(list(self._packets))
+
+    def _add_to_layer_index(self, index, packet):
+        layers = getattr(packet, "layers", ())
+        for layer_name in {layer.layer_name.lower() for layer in layers}:
+            self._layer_index.setdefault(layer_name, array("L")).append(index)
+
+    def _get_packets(self, indices):
+        return [self._packets[index] for index in indices]
+
+
+class _FieldIndex:
+    """The indices of the packets by the values of a field."""
+
+    def __init__(self, field_name, value_type=None):
+        self.field_name = field_name
+        self.value_type = value_type
+        self._indices_by_value = {}
+        # Built lazily for range queries, and reset whenever a new value is added.
+        self._sorted_values = None
+
+    def add(self, index, packet):
+        if not isinstance(packet, Packet):
+            return
+        values = set()
+        for value in packet.get_field_values(self.field_name):
+            value = self._convert(value)
+            if value is not _INVALID_VALUE:
+                values.add(value)
+        for value in values:
+            indices = self._indices_by_value.get(value)
+            if indices is None:
+                indices = self._indices_by_value[value] = array("L")
+                self._sorted_values = None
+            indices.append(index)
+
+    def get_indices(self, values):
+        indices_by_value = self._indices_by_value
+        matches = [indices_by_value.get(self._convert(value), ()) for value in values]
+        return _merge_indices(matches)
+
+    def get_indices_between(self, low, high):
+        if self._sorted_values is None:
+            self._sorted_values = sorted(self._indices_by_value)
+        sorted_values = self._sorted_values
+        start = 0 if low is None else bisect.bisect_left(sorted_values, self._convert(low))
+        end = len(sorted_values) if high is None else bisect.bisect_right(sorted_values, self._convert(high))
+        return _merge_indices([self._indices_by_value[value] for value in sorted_values[start:end]])
+
+    def clear(self):
+        self._indices_by_value = {}
+        self._sorted_values = None
+
+    def _convert(self, value):
+        if isinstance(value, str):
+            # Field containers hold the field objects, don't keep them alive in the index.
+            value = str(value)
+        if self.value_type is None:
+            return value
+        try:
+            return self.value_type(value)
+        except (ValueError, TypeError):
+            return _INVALID_VALUE
+
+
+class _TimeIndex:
+    """The indices of the packets sorted by their sniff time."""
+
+    def __init__(self):
+        self._times = array("q")
+        self._indices = array("L")
+
+    def add(self, index, packet):
+        sniff_time_ns = getattr(packet, "sniff_time_ns", None)
+        if sniff_time_ns is None:
+            return
+        if not self._times or sniff_time_ns >= self._times[-1]:
+            # Packets are almost always added in order
+            self._times.append(sniff_time_ns)
+            self._indices.append(index)
+        else:
+            position = bisect.bisect_right(self._times, sniff_time_ns)
+            self._times.insert(position, sniff_time_ns)
+            self._indices.insert(position, index)
+
+    def get_indices_between(self, start_ns, end_ns):
+        start = 0 if start_ns is None else bisect.bisect_left(self._times, start_ns)
+        end = len(self._times) if end_ns is None else bisect.bisect_right(self._times, end_ns)
+        return sorted(self._indices[start:end])
+
+
+_INVALID_VALUE = object()
+
+
+def _merge_indices(index_arrays):
+    """Merges arrays of packet indices into a sorted list without duplicates."""
+    index_arrays = [indices for indices in index_arrays if indices]
+    if len(index_arrays) == 1:
+        return index_arrays[0].tolist()
+    return sorted(set().union(*index_arrays))
+
+
+def _to_ns(timestamp):
+    if timestamp is None:
+        return None
+    if isinstance(timestamp, datetime.datetime):
+        timestamp = timestamp.timestamp()
+    return round(float(timestamp) * 1_000_000_000)
+
+
+def _get_packet_length(packet):
+    try:
+        return int(packet.length)
+    except (AttributeError, TypeError, ValueError):
+        # Summaries may have no length.
+        return 0
+
+
+def _get_rss():
+    """Gets the resident set size of the process in bytes, or None if it can't be found."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Not the current size but the peak one, which is the best we have here. It's in kilobytes on Linux and in
+    # bytes on macOS.
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
@@ -7,11 +7,14 @@ class PipeCapture(Capture):
     def __init__(self, pipe, display_filter=None, only_summaries=False,
                  decryption_key=None, encryption_type='wpa-pwk', decode_as=None,
                  disable_protocol=None, tshark_path=None, override_prefs=None, use_json=False,
-                 use_ek=False, include_raw=False, eventloop=None, custom_parameters=None, debug=False):
+                 use_ek=False, include_raw=False, eventloop=None, custom_parameters=None, debug=False,
+                 typed_ek=False, intern_strings=False, intern_values=False, packet_store=None, lazy_packets=False,
+                 share_layers=False, summary_columns=None, collect_metrics=False, profile=None):
         """Receives a file-like and reads the packets from there (pcap format).
 
         :param bpf_filter: BPF filter to use on packets.
         :param display_filter: Display (wireshark) filter to use.
+        Can also be a filter expression (see pyshark.filters), of which only what tshark can't handle runs in Python.
         :param only_summaries: Only produce packet summaries, much faster but includes very little information
         :param decryption_key: Key used to encrypt and decrypt captured traffic.
         :param encryption_type: Standard of encryption used in captured traffic (must be either 'WEP', 'WPA-PWD',
@@ -24,6 +27,34 @@ class PipeCapture(Capture):
         :param disable_protocol: Tells tshark to remove a dissector for a specifc protocol.
         :param custom_parameters: A dict of custom parameters to pass to tshark, i.e. {"--param": "value"}
         or else a list of parameters in the format ["--foo", "bar", "--baz", "foo"].
+        :param typed_ek: When using EK, casts the values of all fields while parsing instead of on every access.
+        :param intern_strings: Intern field and layer names through a table shared by all packets (always done for PDML
+        field names). Saves memory when keeping many packets, at some parsing cost for JSON/EK.
+        :param intern_values: When interning strings, intern short field values as well. See
+        pyshark.packet.intern_table.get_stats() for the memory saved.
+        :param packet_store: Keeps the packets in the given PacketStore (from pyshark.capture.packet_store) instead of
+        a list. Use a SpillingPacketStore or a CompressedPacketStore to keep huge captures without running out of
+        memory, a RingBuffer to only keep the most recent packets, or an IndexedPacketStore to query the packets by
+        their field values, layers or sniff time. The store is closed (i.e. the temporary file of a SpillingPacketStore
+        is removed) when leaving the capture's with block, otherwise it should be closed by the caller.
+        :param lazy_packets: When using JSON/EK, only reads the number, length, sniff time and frame_protocols of each
+        packet when it is parsed, and decodes the rest on the first access to its layers. Makes filtering out most
+        packets much faster.
+        :param share_layers: When using JSON/EK, keeps a single object for identical layers of different packets (i.e.
+        the same Ethernet or IP headers) instead of one per packet. Saves a lot of memory when keeping packets of
+        steady traffic. Shared layers must not be modified.
+        :param summary_columns: Reads only the given summary columns of each packet, as named tuple rows, which is the
+        cheapest way to read packets. Either a list of default column titles (i.e. "Source", "Protocol", "Info") and
+        field names (i.e. "ip.ttl"), or a dict of {title: tshark column format} (i.e. {"TTL": "%Cus:ip.ttl"}). See
+        pyshark.tshark.output_parser.tshark_tabs.
+        :param collect_metrics: Collects counters and timers of every stage packets go through (see metrics()). Off by
+        default, since timing every packet has some cost.
+        :param profile: Profiles the parsing and dispatching of every packet, by output format and protocol layer (see
+        profile_report()). Either True, a dict of CaptureProfiler arguments to sample packets through cProfile or
+        tracemalloc (i.e. {"sample_percent": 5, "sampling_tool": "tracemalloc"}), or a CaptureProfiler (from
+        pyshark.capture.capture_profiler), which may be shared by several captures. A profiler the capture created
+        stops tracemalloc when the capture is closed, which is also done at the end of apply_on_packets() and
+        load_packets(), so a capture read again after that keeps profiling without sampling memory.
         """
         super(PipeCapture, self).__init__(display_filter=display_filter,
                                           only_summaries=only_summaries,
@@ -32,7 +63,11 @@ class PipeCapture(Capture):
                                           decode_as=decode_as, disable_protocol=disable_protocol,
                                           tshark_path=tshark_path, override_prefs=override_prefs,
                                           use_json=use_json, use_ek=use_ek, include_raw=include_raw, eventloop=eventloop,
-                                          custom_parameters=custom_parameters, debug=debug)
+                                          custom_parameters=custom_parameters, debug=debug, typed_ek=typed_ek,
+                                          intern_strings=intern_strings, intern_values=intern_values,
+                                          packet_store=packet_store, lazy_packets=lazy_packets,
+                                          share_layers=share_layers, summary_columns=summary_columns,
+                                          collect_metrics=collect_metrics, profile=profile)
         self._pipe = pipe
 
     def get_parameters(self, packet_count=None):
@@ -43,8 +78,9 @@ class PipeCapture(Capture):
         params += ['-r', '-']
         return params
 
-    async def _get_tshark_process(self, packet_count=None):
-        return await super(PipeCapture, self)._get_tshark_process(packet_count=packet_count, stdin=self._pipe)
+    async def _get_tshark_process(self, packet_count=None, extra_parameters=None):
+        return await super(PipeCapture, self)._get_tshark_process(packet_count=packet_count, stdin=self._pipe,
+                                                                  extra_parameters=extra_parameters)
 
     def close(self):
         # Close pipe
@@ -1,11 +1,19 @@
 import binascii
 import json
+import mmap
+import os
+import pickle
+import struct
+import tempfile
 
 from pyshark import cache
 from pyshark.tshark import tshark
 
 
-_MAPPING_CACHE_NAME = "ek_field_mapping.json"
+_MAPPING_CACHE_NAME = "ek_field_mapping.v1.pickle"
+# Mappings cached by older pyshark versions (the raw output of tshark).
+_LEGACY_MAPPING_CACHE_NAME = "ek_field_mapping.json"
+_INDEX_HEADER = struct.Struct("<Q")
 
 
 class FieldNotFound(Exception):
@@ -17,60 +25,144 @@ class ProtocolMappingNotInitialized(Exception):
 
 
 class _EkFieldMapping:
+    """Maps EK field names to their Python types.
+
+    The mapping tshark generates is very large, so it is compiled into a compact per-protocol table which only
+    holds the fields that are not strings. The compiled table is cached on disk per tshark version and memory-mapped,
+    and each protocol is only unpickled the first time it is used.
+    """
 
     def __init__(self):
+        self._tshark_version = None
+        self._protocol_index = None
+        # The protocols of a partial mapping, or None if the mapping is full
+        self._loaded_protocols = None
         self._protocol_to_mapping = {}
+        self._protocol_to_casters = {}
+        self._mapped_file = None
+        self._data_start = 0
+
+    def load_mapping(self, tshark_version, tshark_path=None, protocols=None):
+        """Loads the mapping for the given tshark version.
 
-    def load_mapping(self, tshark_version, tshark_path=None):
-        if self._protocol_to_mapping:
-            return
+        :param tshark_version: The version of tshark the EK output comes from.
+        :param tshark_path: Path of the tshark binary
+        :param protocols: If given, only the mapping for these protocols will be generated when there is no cached
+        mapping for the version. The partial mapping is not cached, and is reloaded when a full mapping or other
+        protocols are requested.
+        """
+        if self._protocol_index is not None and self._tshark_version == tshark_version:
+            if self._loaded_protocols is None or (protocols and self._loaded_protocols.issuperset(protocols)):
+                return
+            if protocols:
+                # Keep the protocols which are already loaded
+                protocols = sorted(self._loaded_protocols.union(protocols))
+        self.clear()
 
-        mapping_cache_file = cache.get_cache_dir(tshark_version).joinpath(_MAPPING_CACHE_NAME)
+        cache_dir = cache.get_cache_dir(tshark_version)
+        mapping_cache_file = cache_dir.joinpath(_MAPPING_CACHE_NAME)
+        legacy_cache_file = cache_dir.joinpath(_LEGACY_MAPPING_CACHE_NAME)
         if mapping_cache_file.exists():
-            self._protocol_to_mapping = json.load(mapping_cache_file.open())
+            self._load_compiled_mapping(mapping_cache_file)
+        elif legacy_cache_file.exists():
+            with legacy_cache_file.open() as f:
+                self._set_compiled_mapping(_compile_mapping(json.load(f)))
+        elif protocols:
+            mapping = tshark.get_ek_field_mapping(tshark_path=tshark_path, protocols=protocols)
+            self._set_compiled_mapping(_compile_mapping(mapping))
+            self._loaded_protocols = frozenset(protocols)
         else:
-            self._protocol_to_mapping = tshark.get_ek_field_mapping(tshark_path=tshark_path)
-            mapping_cache_file.open("w").write(json.dumps(self._protocol_to_mapping))
+            compiled_mapping = _compile_mapping(tshark.get_ek_field_mapping(tshark_path=tshark_path))
+            _write_compiled_mapping(mapping_cache_file, compiled_mapping)
+            self._set_compiled_mapping(compiled_mapping)
+        self._tshark_version = tshark_version
 
     def cast_field_value(self, protocol, field_name, field_value):
         """Casts the field value to its proper type according to the mapping"""
-        if isinstance(field_value, list):
-            return [self.cast_field_value(protocol, field_name, item) for item in field_value]
-        if not isinstance(field_value, str):
-            return field_value
-        field_type = self.get_field_type(protocol, field_name)
-        if field_type == str:
-            return field_value
-        if field_type == int and field_value.startswith("0x"):
-            return int(field_value, 16)
-        if field_type == bytes:
-            try:
-                return binascii.unhexlify(field_value.replace(":", ""))
-            except binascii.Error:
-                return field_value
+        return self.get_field_caster(protocol, field_name)(field_value)
+
+    def cast_layer_fields(self, protocol, layer_dict):
+        """Returns a copy of an EK layer dict with all of its values casted according to the mapping."""
+        casters = self._get_protocol_casters(protocol)
+        fields = self._get_protocol_mapping(protocol)
+        casted_dict = {}
+        for field_name, field_value in layer_dict.items():
+            caster = casters.get(field_name)
+            if caster is None:
+                caster = casters[field_name] = _CASTERS[fields.get(field_name, str)]
+            casted_dict[field_name] = caster(field_value)
+        return casted_dict
 
-        try:
-            return field_type(field_value)
-        except ValueError:
-            return field_value
+    def get_field_caster(self, protocol, field_name):
+        """Gets a function which casts values of the given field to their proper type.
+
+        Casters are created once per field and reused. They accept a single value or a list of values and return
+        values which are not str as-is.
+        """
+        casters = self._get_protocol_casters(protocol)
+        caster = casters.get(field_name)
+        if caster is None:
+            caster = casters[field_name] = _CASTERS[self.get_field_type(protocol, field_name)]
+        return caster
 
     def get_field_type(self, protocol, field_name):
         """Gets the Python type for the given field (only for EK fields).
 
         If we are unfamiliar with the type, str will be returned.
         """
-        if not self._protocol_to_mapping:
+        return self._get_protocol_mapping(protocol).get(field_name, str)
+
+    @property
+    def protocols(self):
+        """All the protocols which have a mapping."""
+        if self._protocol_index is None:
             raise ProtocolMappingNotInitialized("Protocol mapping not initialized. Call load_mapping() first")
-        if protocol not in self._protocol_to_mapping:
+        return list(self._protocol_index)
+
+    def clear(self):
+        self._tshark_version = None
+        self._protocol_index = None
+        self._loaded_protocols = None
+        self._protocol_to_mapping = {}
+        self._protocol_to_casters = {}
+        if self._mapped_file is not None:
+            self._mapped_file.close()
+            self._mapped_file = None
+            self._data_start = 0
+
+    def _get_protocol_mapping(self, protocol):
+        """Gets the {field_name: python_type} table of the protocol, unpickling it on first use."""
+        fields = self._protocol_to_mapping.get(protocol)
+        if fields is not None:
+            return fields
+        if self._protocol_index is None:
+            raise ProtocolMappingNotInitialized("Protocol mapping not initialized. Call load_mapping() first")
+        if protocol not in self._protocol_index:
             raise FieldNotFound(f"Type mapping for protocol {protocol} not found")
 
-        fields = self._protocol_to_mapping[protocol]["properties"]
-        if field_name not in fields:
-            return str
-        return self._get_python_type_for_field_type(fields[field_name]["type"])
+        start, end = self._protocol_index[protocol]
+        fields = pickle.loads(self._mapped_file[self._data_start + start:self._data_start + end])
+        self._protocol_to_mapping[protocol] = fields
+        return fields
 
-    def clear(self):
-        self._protocol_to_mapping.clear()
+    def _get_protocol_casters(self, protocol):
+        casters = self._protocol_to_casters.get(protocol)
+        if casters is None:
+            # Makes sure the protocol exists before creating its casters table
+            self._get_protocol_mapping(protocol)
+            casters = self._protocol_to_casters[protocol] = {}
+        return casters
+
+    def _load_compiled_mapping(self, mapping_cache_file):
+        with mapping_cache_file.open("rb") as f:
+            self._mapped_file = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        index_length, = _INDEX_HEADER.unpack_from(self._mapped_file)
+        self._data_start = _INDEX_HEADER.size + index_length
+        self._protocol_index = pickle.loads(self._mapped_file[_INDEX_HEADER.size:self._data_start])
+
+    def _set_compiled_mapping(self, compiled_mapping):
+        self._protocol_to_mapping = compiled_mapping
+        self._protocol_index = dict.fromkeys(compiled_mapping)
 
     @classmethod
     def _get_python_type_for_field_type(cls, field_type):
@@ -88,4 +180,94 @@ class _EkFieldMapping:
         return str
 
 
+def _cast_str(field_value):
+    return field_value
+
+
+def _cast_int(field_value):
+    if isinstance(field_value, list):
+        return [_cast_int(item) for item in field_value]
+    if not isinstance(field_value, str):
+        return field_value
+    try:
+        if field_value.startswith("0x"):
+            return int(field_value, 16)
+        return int(field_value)
+    except ValueError:
+        return field_value
+
+
+def _cast_float(field_value):
+    if isinstance(field_value, list):
+        return [_cast_float(item) for item in field_value]
+    if not isinstance(field_value, str):
+        return field_value
+    try:
+        return float(field_value)
+    except ValueError:
+        return field_value
+
+
+def _cast_bytes(field_value):
+    if isinstance(field_value, list):
+        return [_cast_bytes(item) for item in field_value]
+    if not isinstance(field_value, str):
+        return field_value
+    try:
+        return binascii.unhexlify(field_value.replace(":", ""))
+    except binascii.Error:
+        return field_value
+
+
+_CASTERS = {
+    str: _cast_str,
+    int: _cast_int,
+    float: _cast_float,
+    bytes: _cast_bytes,
+}
+
+
+def _compile_mapping(protocol_to_mapping):
+    """Turns the elastic mapping into {protocol: {field_name: python_type}}, dropping all str fields."""
+    compiled_mapping = {}
+    for protocol, mapping in protocol_to_mapping.items():
+        fields = {}
+        for field_name, field_mapping in mapping.get("properties", {}).items():
+            field_type = _EkFieldMapping._get_python_type_for_field_type(field_mapping.get("type"))
+            if field_type != str:
+                fields[field_name] = field_type
+        compiled_mapping[protocol] = fields
+    return compiled_mapping
+
+
+def _write_compiled_mapping(mapping_cache_file, compiled_mapping):
+    """Writes the compiled mapping as an index of protocol offsets followed by a pickle per protocol.
+
+    Offsets in the index are relative to the end of the index. The file is written to a temporary file and renamed,
+    so concurrent readers never see a partial file.
+    """
+    blobs = []
+    index = {}
+    offset = 0
+    for protocol, fields in compiled_mapping.items():
+        blob = pickle.dumps(fields, protocol=pickle.HIGHEST_PROTOCOL)
+        index[protocol] = (offset, offset + len(blob))
+        offset += len(blob)
+        blobs.append(blob)
+
+    index_data = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+
+    fd, temp_path = tempfile.mkstemp(dir=mapping_cache_file.parent, prefix=mapping_cache_file.name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_INDEX_HEADER.pack(len(index_data)))
+            f.write(index_data)
+            for blob in blobs:
+                f.write(blob)
+        os.replace(temp_path, mapping_cache_file)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
 MAPPING = _EkFieldMapping()
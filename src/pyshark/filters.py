@@ -0,0 +1,495 @@
+"""Filter expressions which are written in Python and run by tshark wherever possible.
+
+(F("ip.src") == "10.0.0.1") & F("tcp") creates an expression which can be given as the display_filter of a capture.
+The parts of it that tshark can handle are turned into a display filter (and for live captures with
+derive_bpf_filter=True, a BPF capture filter when possible), and only the rest runs in Python, on the parsed packets:
+
+    capture = pyshark.FileCapture("capture.pcap", display_filter=(F("tcp.port") == 443) & is_interesting)
+
+Here tshark only outputs port 443 packets, and is_interesting() (any function of a packet) is only called on those.
+"""
+import operator
+import re
+import typing
+
+from pyshark.packet.packet import Packet
+
+_SIMPLE_LITERAL_REGEX = re.compile(r"^[\w.:/-]+$")
+_IP_ADDRESS_REGEX = re.compile(r"^(\d{1,3}(\.\d{1,3}){3}|[0-9a-fA-F]*:[0-9a-fA-F:.]*)$")
+_IP_NETWORK_REGEX = re.compile(r"^(\d{1,3}(\.\d{1,3}){3}|[0-9a-fA-F]*:[0-9a-fA-F:.]*)/\d{1,3}$")
+_MAC_ADDRESS_REGEX = re.compile(r"^[0-9a-fA-F]{2}(:[0-9a-fA-F]{2}){5}$")
+_FIELD_NAME_REGEX = re.compile(r"^[A-Za-z_][\w.-]*$")
+_DISPLAY_FILTER_TOKEN_REGEX = re.compile(r'\s*("(?:[^"\\]|\\.)*"|==|!=|>=|<=|&&|\|\||[()<>!{},]|[^\s()"{},!=<>&|]+)')
+
+# Protocols which have the same name in display filters and BPF.
+_BPF_PROTOCOLS = {"ip": "ip", "ipv6": "ip6", "tcp": "tcp", "udp": "udp", "arp": "arp", "icmp": "icmp",
+                  "icmpv6": "icmp6", "sctp": "sctp", "vlan": "vlan"}
+# {field name: BPF primitive to compare it with}
+_BPF_FIELDS = {
+    "ip.src": "ip src host", "ip.dst": "ip dst host", "ip.addr": "ip host",
+    "ipv6.src": "ip6 src host", "ipv6.dst": "ip6 dst host", "ipv6.addr": "ip6 host",
+    "eth.src": "ether src", "eth.dst": "ether dst", "eth.addr": "ether host",
+    "tcp.srcport": "tcp src port", "tcp.dstport": "tcp dst port", "tcp.port": "tcp port",
+    "udp.srcport": "udp src port", "udp.dstport": "udp dst port", "udp.port": "udp port",
+}
+
+# Packets whose transport headers BPF can't see: non-first IPv4 fragments, and IPv6 packets whose first header is a
+# hop-by-hop, routing, fragment or destination options extension header. They are kept, so tshark can reassemble them.
+_BPF_UNCHECKED_PACKETS = ("(ip[6:2] & 0x1fff != 0) or (ip6[6] == 0) or (ip6[6] == 43) or (ip6[6] == 44) "
+                          "or (ip6[6] == 60)")
+
+# Display filter operator names, and the C-like operators they're equal to.
+_OPERATOR_ALIASES = {"eq": "==", "ne": "!=", "gt": ">", "ge": ">=", "lt": "<", "le": "<=", "~": "matches"}
+_OPERATORS = {"==": operator.eq, "!=": operator.ne, ">": operator.gt, ">=": operator.ge, "<": operator.lt,
+              "<=": operator.le}
+
+
+class Expression:
+    """Base class for filter expressions.
+
+    Expressions are combined with & (and), | (or) and ~ (not). Functions of a packet can be combined with them as well,
+    and are run in Python. Calling an expression with a packet checks whether the packet matches it.
+    """
+
+    def to_display_filter(self) -> typing.Union[str, None]:
+        """Gets the display filter equivalent to the expression, or None if it can only run in Python."""
+        raise NotImplementedError()
+
+    def to_bpf(self, vlan=True) -> typing.Union[str, None]:
+        """Gets a BPF capture filter which matches (at least) all the packets the expression matches, or None if
+        there is none.
+
+        BPF only looks at the outermost headers of a packet, so such a filter misses packets which only match through
+        encapsulated headers (i.e. tunnels or the headers quoted in ICMP errors). IP fragments and IPv6 packets with
+        extension headers are always matched, since their transport headers can't be checked.
+
+        :param vlan: Allows for a single VLAN tag. The vlan keyword only compiles for some link types (i.e. Ethernet
+        and 802.11), not for Linux "any" or raw IP interfaces.
+        """
+        bpf = self._to_bpf()
+        if bpf is None:
+            return None
+        bpf = f"({bpf}) or {_BPF_UNCHECKED_PACKETS}"
+        if not vlan:
+            return bpf
+        return f"({bpf}) or (vlan and ({bpf}))"
+
+    def __call__(self, packet) -> bool:
+        raise NotImplementedError()
+
+    def _to_bpf(self):
+        return None
+
+    def __and__(self, other):
+        return And([self, _to_expression(other)])
+
+    def __rand__(self, other):
+        return And([_to_expression(other), self])
+
+    def __or__(self, other):
+        return Or([self, _to_expression(other)])
+
+    def __ror__(self, other):
+        return Or([_to_expression(other), self])
+
+    def __invert__(self):
+        return Not(self)
+
+    def __bool__(self):
+        raise TypeError("Filter expressions have no truth value, use & | ~ rather than and/or/not to combine them")
+
+    def __repr__(self):
+        display_filter = self.to_display_filter()
+        if display_filter is None:
+            return f"<{self.__class__.__name__}>"
+        return f"<{self.__class__.__name__} {display_filter}>"
+
+
+class Field(Expression):
+    """A field or protocol, by its display filter name. On its own, checks that the packet has it."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def to_display_filter(self):
+        return self.name
+
+    def __call__(self, packet):
+        if not isinstance(packet, Packet):
+            return False
+        if "." not in self.name:
+            return self.name in packet
+        return bool(packet.get_field_values(self.name))
+
+    def _to_bpf(self):
+        return _get_protocol_bpf(self.name)
+
+    def __eq__(self, value):
+        return Comparison(self.name, "==", value)
+
+    def __ne__(self, value):
+        return Comparison(self.name, "!=", value)
+
+    def __gt__(self, value):
+        return Comparison(self.name, ">", value)
+
+    def __ge__(self, value):
+        return Comparison(self.name, ">=", value)
+
+    def __lt__(self, value):
+        return Comparison(self.name, "<", value)
+
+    def __le__(self, value):
+        return Comparison(self.name, "<=", value)
+
+    __hash__ = None
+
+    def isin(self, values):
+        """Checks whether the field has any of the given values."""
+        return Or([Comparison(self.name, "==", value) for value in values])
+
+    def contains(self, value):
+        """Checks whether the field contains the given string."""
+        return Comparison(self.name, "contains", value)
+
+    def matches(self, pattern):
+        """Checks whether the field matches the given regex (case insensitive, like in display filters)."""
+        return Comparison(self.name, "matches", pattern)
+
+
+# The short form used in expressions
+F = Field
+
+
+class Comparison(Expression):
+    """A comparison of a field to a value.
+
+    Like in display filters, a field with several values matches if any of its values does, except for !=, which
+    matches only if none of them are equal to the value. In Python, the field values are converted to the type of the
+    given value before comparing.
+    """
+
+    def __init__(self, field_name, operator_name, value):
+        if operator_name not in _OPERATORS and operator_name not in ("contains", "matches"):
+            raise ValueError(f"Unknown operator {operator_name}")
+        self.field_name = field_name
+        self.operator_name = operator_name
+        self.value = value
+        if operator_name == "matches":
+            self._regex = re.compile(value, re.IGNORECASE)
+
+    def to_display_filter(self):
+        if self.operator_name in ("contains", "matches"):
+            return f"{self.field_name} {self.operator_name} {_quote(str(self.value))}"
+        return f"{self.field_name} {self.operator_name} {_to_literal(self.value)}"
+
+    def __call__(self, packet):
+        if not isinstance(packet, Packet):
+            return False
+        values = packet.get_field_values(self.field_name)
+        if self.operator_name == "contains":
+            return any(str(self.value) in str(value) for value in values)
+        if self.operator_name == "matches":
+            return any(self._regex.search(str(value)) for value in values)
+        if self.operator_name == "!=":
+            return not any(_convert(value, self.value) == self.value for value in values)
+
+        compare = _OPERATORS[self.operator_name]
+        for value in values:
+            value = _convert(value, self.value)
+            try:
+                if value is not None and compare(value, self.value):
+                    return True
+            except TypeError:
+                pass
+        return False
+
+    def _to_bpf(self):
+        if self.operator_name == "!=":
+            # Also matches packets which don't have the field at all
+            return None
+        bpf_primitive = _BPF_FIELDS.get(self.field_name)
+        if bpf_primitive is None or self.operator_name != "==":
+            return _get_protocol_bpf(self.field_name)
+        value = str(self.value)
+        if bpf_primitive.endswith("port"):
+            valid = isinstance(self.value, int) and not isinstance(self.value, bool) or value.isdigit()
+        elif bpf_primitive.startswith("ether"):
+            valid = _MAC_ADDRESS_REGEX.match(value) is not None
+        elif _IP_NETWORK_REGEX.match(value):
+            # i.e. ip.addr == 10.0.0.0/8
+            bpf_primitive = bpf_primitive.replace(" host", " net")
+            valid = True
+        else:
+            valid = _IP_ADDRESS_REGEX.match(value) is not None
+        if not valid:
+            return _get_protocol_bpf(self.field_name)
+        return f"{bpf_primitive} {value}"
+
+
+class And(Expression):
+
+    def __init__(self, expressions):
+        self.expressions = []
+        for expression in expressions:
+            if isinstance(expression, And):
+                self.expressions.extend(expression.expressions)
+            else:
+                self.expressions.append(expression)
+
+    def to_display_filter(self):
+        display_filters = [expression.to_display_filter() for expression in self.expressions]
+        if None in display_filters:
+            return None
+        return " and ".join(f"({display_filter})" for display_filter in display_filters)
+
+    def __call__(self, packet):
+        return all(expression(packet) for expression in self.expressions)
+
+    def _to_bpf(self):
+        # Leaving out parts only makes the filter match more packets.
+        bpfs = [bpf for bpf in (expression._to_bpf() for expression in self.expressions) if bpf is not None]
+        if len(bpfs) <= 1:
+            return bpfs[0] if bpfs else None
+        return " and ".join(f"({bpf})" for bpf in bpfs)
+
+
+class Or(Expression):
+
+    def __init__(self, expressions):
+        self.expressions = []
+        for expression in expressions:
+            if isinstance(expression, Or):
+                self.expressions.extend(expression.expressions)
+            else:
+                self.expressions.append(expression)
+
+    def to_display_filter(self):
+        display_filters = [expression.to_display_filter() for expression in self.expressions]
+        if None in display_filters or not display_filters:
+            return None
+        return " or ".join(f"({display_filter})" for display_filter in display_filters)
+
+    def __call__(self, packet):
+        return any(expression(packet) for expression in self.expressions)
+
+    def _to_bpf(self):
+        bpfs = [expression._to_bpf() for expression in self.expressions]
+        if None in bpfs or not bpfs:
+            return None
+        if len(bpfs) == 1:
+            return bpfs[0]
+        return " or ".join(f"({bpf})" for bpf in bpfs)
+
+
+class Not(Expression):
+
+    def __init__(self, expression):
+        self.expression = expression
+
+    def to_display_filter(self):
+        display_filter = self.expression.to_display_filter()
+        if display_filter is None:
+            return None
+        return f"not ({display_filter})"
+
+    def __call__(self, packet):
+        return not self.expression(packet)
+
+    # The BPF of the inner expression may match more packets than it, so it can't be negated.
+
+
+class Predicate(Expression):
+    """A function of a packet, which always runs in Python."""
+
+    def __init__(self, function):
+        self.function = function
+
+    def to_display_filter(self):
+        return None
+
+    def __call__(self, packet):
+        return bool(self.function(packet))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.function!r}>"
+
+
+def split_filter(expression) -> typing.Tuple[typing.Union[str, None], typing.Union[Expression, None]]:
+    """Splits an expression to a display filter for tshark and the rest of it, which must run in Python.
+
+    :return: (display filter or None, Expression or None)
+    """
+    display_filter = expression.to_display_filter()
+    if display_filter is not None:
+        return display_filter, None
+    if not isinstance(expression, And):
+        return None, expression
+
+    pushed_down = []
+    remainder = []
+    for part in expression.expressions:
+        (remainder if part.to_display_filter() is None else pushed_down).append(part)
+    if not pushed_down:
+        return None, expression
+    remainder = remainder[0] if len(remainder) == 1 else And(remainder)
+    pushed_down = pushed_down[0] if len(pushed_down) == 1 else And(pushed_down)
+    return pushed_down.to_display_filter(), remainder
+
+
+def parse_display_filter(display_filter) -> typing.Union[Expression, None]:
+    """Parses a simple display filter into an expression, i.e. to derive a BPF filter from it.
+
+    Supports fields and protocols, comparisons of them to values (including "in {...}"), and/or/not and parentheses.
+    Returns None for display filters which use anything else, such as slices or functions.
+    """
+    tokens = []
+    position = 0
+    display_filter = display_filter.rstrip()
+    while position < len(display_filter):
+        match = _DISPLAY_FILTER_TOKEN_REGEX.match(display_filter, position)
+        if match is None:
+            return None
+        tokens.append(match.group(1))
+        position = match.end()
+    parser = _DisplayFilterParser(tokens)
+    try:
+        expression = parser.parse_or()
+    except _DisplayFilterSyntaxError:
+        return None
+    if parser.peek() is not None:
+        return None
+    return expression
+
+
+class _DisplayFilterSyntaxError(Exception):
+    pass
+
+
+class _DisplayFilterParser:
+    """A recursive descent parser of the display filter subset parse_display_filter() supports."""
+
+    def __init__(self, tokens):
+        self._tokens = tokens
+        self._position = 0
+
+    def peek(self):
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise _DisplayFilterSyntaxError("Unexpected end of display filter")
+        self._position += 1
+        return token
+
+    def parse_or(self):
+        expressions = [self.parse_and()]
+        while self.peek() in ("or", "||"):
+            self.next()
+            expressions.append(self.parse_and())
+        return expressions[0] if len(expressions) == 1 else Or(expressions)
+
+    def parse_and(self):
+        expressions = [self.parse_not()]
+        while self.peek() in ("and", "&&"):
+            self.next()
+            expressions.append(self.parse_not())
+        return expressions[0] if len(expressions) == 1 else And(expressions)
+
+    def parse_not(self):
+        if self.peek() in ("not", "!"):
+            self.next()
+            return Not(self.parse_not())
+        if self.peek() == "(":
+            self.next()
+            expression = self.parse_or()
+            if self.next() != ")":
+                raise _DisplayFilterSyntaxError("Missing )")
+            return expression
+        return self.parse_comparison()
+
+    def parse_comparison(self):
+        field_name = self.next()
+        if not _FIELD_NAME_REGEX.match(field_name) or field_name in ("and", "or", "not", "in"):
+            raise _DisplayFilterSyntaxError(f"Invalid field name {field_name}")
+        operator_name = self.peek()
+        if operator_name == "in":
+            self.next()
+            return Field(field_name).isin(self.parse_set())
+        operator_name = _OPERATOR_ALIASES.get(operator_name, operator_name)
+        if operator_name not in _OPERATORS and operator_name not in ("contains", "matches"):
+            return Field(field_name)
+        self.next()
+        return Comparison(field_name, operator_name, self.parse_value())
+
+    def parse_set(self):
+        if self.next() != "{":
+            raise _DisplayFilterSyntaxError("Missing {")
+        values = []
+        while self.peek() != "}":
+            if values and self.peek() == ",":
+                self.next()
+            values.append(self.parse_value())
+        self.next()
+        return values
+
+    def parse_value(self):
+        token = self.next()
+        if token.startswith('"'):
+            return re.sub(r"\\(.)", r"\1", token[1:-1])
+        if token in ("(", ")", "{", "}", ",", "!", "&&", "||") or token in _OPERATORS:
+            raise _DisplayFilterSyntaxError(f"Unexpected {token}")
+        if token.isdigit():
+            return int(token)
+        return token
+
+
+def _to_expression(value):
+    if isinstance(value, Expression):
+        return value
+    if callable(value):
+        return Predicate(value)
+    raise TypeError(f"Cannot combine a filter expression with {type(value).__name__}")
+
+
+def _get_protocol_bpf(field_name):
+    """Gets the BPF filter for the protocol of a field (or the protocol itself), which all packets with it match."""
+    return _BPF_PROTOCOLS.get(field_name.split(".", 1)[0])
+
+
+def _to_literal(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    value = str(value)
+    if _SIMPLE_LITERAL_REGEX.match(value):
+        return value
+    return _quote(value)
+
+
+def _quote(value):
+    escaped_value = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped_value}"'
+
+
+def _convert(field_value, value):
+    """Converts a field value to the type of the value it's compared to, or None if it can't be converted."""
+    if isinstance(value, bool):
+        return str(field_value).lower() in ("1", "true")
+    try:
+        if isinstance(value, int):
+            return int(field_value, 0) if isinstance(field_value, str) else int(field_value)
+        if isinstance(value, float):
+            return float(field_value)
+    except (ValueError, TypeError):
+        try:
+            return int(field_value)
+        except (ValueError, TypeError):
+            return None
+    if isinstance(value, str):
+        return str(field_value)
+    return field_value
@@ -21,8 +21,14 @@ class SlotsPickleable(object):
 
     def __getstate__(self):
         ret = {}
-        for slot in self.__slots__:
-            ret[slot] = getattr(self, slot)
+        # Slots of the base classes are not listed in the subclass' __slots__
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                # Bypass __getattr__, which most of the subclasses override, so that unset slots are skipped.
+                try:
+                    ret[slot] = object.__getattribute__(self, slot)
+                except AttributeError:
+                    pass
         return ret
 
     def __setstate__(self, data):
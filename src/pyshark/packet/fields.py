@@ -9,7 +9,7 @@ class LayerField(SlotsPickleable):
 
     # Note: We use this object with slots and not just a dict because
     # it's much more memory-efficient (cuts about a third of the memory).
-    __slots__ = ['name', 'showname', 'raw_value', 'show', 'hide', 'pos', 'size', 'unmaskedvalue']
+    __slots__ = ['name', 'showname', 'raw_value', 'show', 'hide', 'pos', 'size', 'unmaskedvalue', '_binary_value']
 
     def __init__(self, name=None, showname=None, value=None, show=None, hide=None, pos=None, size=None, unmaskedvalue=None):
         self.name = name
@@ -19,6 +19,8 @@ class LayerField(SlotsPickleable):
         self.pos = pos
         self.size = size
         self.unmaskedvalue = unmaskedvalue
+        # A tuple of (raw_value, decoded bytes), set on first access to binary_value.
+        self._binary_value = None
 
         if hide and hide == 'yes':
             self.hide = True
@@ -54,11 +56,16 @@ class LayerField(SlotsPickleable):
     @property
     def binary_value(self) -> bytes:
         """Converts this field to binary (assuming it's a binary string)"""
-        str_raw_value = str(self.raw_value)
+        raw_value = self.raw_value
+        if self._binary_value is not None and self._binary_value[0] is raw_value:
+            return self._binary_value[1]
+
+        str_raw_value = raw_value if isinstance(raw_value, str) else str(raw_value)
         if len(str_raw_value) % 2 == 1:
             str_raw_value = '0' + str_raw_value
-
-        return binascii.unhexlify(str_raw_value)
+        binary_value = binascii.unhexlify(str_raw_value)
+        self._binary_value = (raw_value, binary_value)
+        return binary_value
 
     @property
     def int_value(self) -> int:
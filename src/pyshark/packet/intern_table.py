@@ -0,0 +1,87 @@
+"""Shared tables for interning the strings that repeat across packets (field names, layer names, common values)."""
+import collections
+import sys
+
+InternTableStats = collections.namedtuple("InternTableStats", ["size", "hits", "misses", "bytes_saved"])
+
+
+class InternTable:
+    """A bounded table of strings which returns a single shared instance for equal strings.
+
+    Once the table is full, new strings are returned as-is rather than evicting older ones, since the strings
+    that repeat the most are usually seen first.
+    """
+
+    def __init__(self, max_size=2 ** 16, max_string_length=None):
+        """
+        :param max_size: The maximum amount of strings the table holds.
+        :param max_string_length: If given, longer strings are not interned.
+        """
+        self.max_size = max_size
+        self.max_string_length = max_string_length
+        self._strings = {}
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    def intern(self, string):
+        """Returns the shared instance of the string, adding it to the table if possible."""
+        interned = self._strings.get(string)
+        if interned is not None:
+            if interned is not string:
+                self._hits += 1
+                self._bytes_saved += sys.getsizeof(string)
+            return interned
+
+        self._misses += 1
+        if len(self._strings) < self.max_size and (self.max_string_length is None
+                                                   or len(string) <= self.max_string_length):
+            self._strings[string] = string
+        return string
+
+    @property
+    def stats(self) -> InternTableStats:
+        """The size of the table, its hits and misses, and the bytes of duplicate strings it made redundant."""
+        return InternTableStats(len(self._strings), self._hits, self._misses, self._bytes_saved)
+
+    def clear(self):
+        self._strings.clear()
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    def __len__(self):
+        return len(self._strings)
+
+
+# Field and layer names have a bounded vocabulary (the dissectors' fields), values don't.
+FIELD_NAMES = InternTable()
+VALUES = InternTable(max_size=2 ** 14, max_string_length=32)
+
+
+def get_stats() -> dict:
+    """Gets the stats of the shared intern tables."""
+    return {"field_names": FIELD_NAMES.stats, "values": VALUES.stats}
+
+
+def clear():
+    FIELD_NAMES.clear()
+    VALUES.clear()
+
+
+def intern_json_dict(json_dict, intern_values=False):
+    """Returns a copy of a decoded JSON/EK dict with its keys interned, going into nested dicts and lists.
+
+    :param intern_values: Whether to intern the string values as well.
+    """
+    return {FIELD_NAMES.intern(key): _intern_json_value(value, intern_values) for key, value in json_dict.items()}
+
+
+def _intern_json_value(value, intern_values):
+    if isinstance(value, dict):
+        return intern_json_dict(value, intern_values)
+    if isinstance(value, list):
+        return [_intern_json_value(item, intern_values) for item in value]
+    if intern_values and isinstance(value, str):
+        return VALUES.intern(value)
+    return value
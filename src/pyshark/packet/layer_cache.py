@@ -0,0 +1,66 @@
+"""A cache for sharing a single layer object between packets which have identical layers."""
+import collections
+
+LayerCacheStats = collections.namedtuple("LayerCacheStats", ["size", "hits", "misses"])
+
+
+class LayerCache:
+    """A bounded LRU of layers by their name and content.
+
+    Steady traffic has many identical layers (the same Ethernet header, VLAN tags, IP options, etc.), so sharing them
+    saves a lot of memory when keeping packets, at the cost of hashing the content of every layer. Shared layers must
+    not be modified, since the change would show in all the packets which have them.
+    """
+
+    def __init__(self, max_size=4096):
+        """
+        :param max_size: The maximum amount of layers to keep.
+        """
+        self.max_size = max_size
+        self._layers = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def get_layer(self, layer_name, layer_dict, create_layer):
+        """Gets the layer with the given name and decoded content, creating it if it's not in the cache.
+
+        :param layer_dict: The decoded JSON of the layer.
+        :param create_layer: A function which creates a layer from the layer name and layer_dict.
+        """
+        key = (layer_name, _freeze(layer_dict))
+        layer = self._layers.get(key)
+        if layer is not None:
+            self._hits += 1
+            self._layers.move_to_end(key)
+            return layer
+
+        self._misses += 1
+        layer = self._layers[key] = create_layer(layer_name, layer_dict)
+        if len(self._layers) > self.max_size:
+            self._layers.popitem(last=False)
+        return layer
+
+    @property
+    def stats(self) -> LayerCacheStats:
+        return LayerCacheStats(len(self._layers), self._hits, self._misses)
+
+    def clear(self):
+        self._layers.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._layers)
+
+
+def _freeze(value):
+    """Converts a decoded JSON value to a hashable one, which is equal only to values with the same content."""
+    if isinstance(value, dict):
+        # Tagged, so a dict is never equal to a list of pairs.
+        return dict, tuple([(key, _freeze(item)) for key, item in value.items()])
+    if isinstance(value, list):
+        return list, tuple([_freeze(item) for item in value])
+    if value.__class__ is str:
+        return value
+    # Tagged with the type, since i.e. True == 1 == 1.0
+    return value.__class__, value
@@ -38,11 +38,21 @@ class _EkLayerHelperFuncsMixin(abc.ABC):
 
 
 class EkLayer(BaseLayer, _EkLayerHelperFuncsMixin):
-    __slots__ = ["_layer_name", "_fields_dict"]
+    __slots__ = ["_layer_name", "_fields_dict", "_fields_casted", "_nested_prefixes", "_all_field_names",
+                 "_subfields_index"]
 
-    def __init__(self, layer_name, layer_dict):
+    def __init__(self, layer_name, layer_dict, fields_casted=False):
+        """Creates an EkLayer.
+
+        :param fields_casted: Whether the values in layer_dict were already casted using the field mapping.
+        """
         super().__init__(layer_name)
         self._fields_dict = layer_dict
+        self._fields_casted = fields_casted
+        # Indexes of the field names, built lazily on first nested access.
+        self._nested_prefixes = None
+        self._all_field_names = None
+        self._subfields_index = None
 
     def get_field(self, name) -> typing.Union["EkMultiField", None, str, int, bool, bytes, list]:
         name = name.replace(".", "_")
@@ -59,34 +69,33 @@ class EkLayer(BaseLayer, _EkLayerHelperFuncsMixin):
 
     def has_field(self, name) -> bool:
         """Checks if the field exists, either a nested field or a regular field"""
-        return name in self.field_names or name in self.all_field_names
+        return name in self._get_subfields_index()[""] or name in self._get_all_field_names()
 
     @property
     def field_names(self):
-        return list({field_name.split("_", 1)[0] for field_name in self.all_field_names})
+        return list(self._get_subfields_index()[""])
 
     @property
     def all_field_names(self):
         """Gets all field names, including subfields"""
-        names = set()
-        for field_name in self._fields_dict:
-            for prefix in self._get_possible_layer_prefixes():
-                if field_name.startswith(prefix):
-                    names.add(_remove_ek_prefix(prefix, field_name))
-                    break
-        return list(names)
+        return list(self._get_all_field_names())
+
+    def get_subfield_names(self, field_name) -> typing.List[str]:
+        """Gets the names of the direct subfields of the given field (i.e. "ack" for "flags")"""
+        return list(self._get_subfields_index().get(field_name.replace(".", "_"), ()))
 
     def _get_field_value(self, full_field_name):
         """Gets the field value, optionally casting it using the cached field mapping"""
         field_value = self._fields_dict[full_field_name]
-        return ek_field_mapping.MAPPING.cast_field_value(self._layer_name, full_field_name, field_value)
+        if self._fields_casted:
+            return field_value
+        return ek_field_mapping.MAPPING.get_field_caster(self._layer_name, full_field_name)(field_value)
 
     def _get_nested_field(self, prefix, name):
         """Gets a field that is directly on the layer
 
         Returns either a multifield or a raw value.
         """
-        # TODO: Optimize
         field_ek_name = f"{prefix}_{name}"
         if field_ek_name in self._fields_dict:
             if self._field_has_subfields(field_ek_name):
@@ -94,18 +103,52 @@ class EkLayer(BaseLayer, _EkLayerHelperFuncsMixin):
                                     value=self._get_field_value(field_ek_name))
             return self._get_field_value(field_ek_name)
 
-        for possible_nested_name in self._fields_dict:
-            if possible_nested_name.startswith(f"{field_ek_name}_"):
-                return EkMultiField(self, self._fields_dict, name, value=None)
+        if self._field_has_subfields(field_ek_name):
+            return EkMultiField(self, self._fields_dict, name, value=None)
 
         return None
 
     def _field_has_subfields(self, field_ek_name):
-        field_ek_name_with_ext = f"{field_ek_name}_"
-        for field_name in self._fields_dict:
-            if field_name.startswith(field_ek_name_with_ext):
-                return True
-        return False
+        return field_ek_name in self._get_nested_prefixes()
+
+    def _get_nested_prefixes(self):
+        """Gets the set of all the parts of the EK field names that come before an underscore.
+
+        A field has subfields if and only if its EK name is in this set.
+        """
+        if self._nested_prefixes is None:
+            nested_prefixes = set()
+            for field_name in self._fields_dict:
+                separator_index = field_name.find("_")
+                while separator_index != -1:
+                    nested_prefixes.add(field_name[:separator_index])
+                    separator_index = field_name.find("_", separator_index + 1)
+            self._nested_prefixes = nested_prefixes
+        return self._nested_prefixes
+
+    def _get_all_field_names(self):
+        if self._all_field_names is None:
+            names = set()
+            prefixes = self._get_possible_layer_prefixes()
+            for field_name in self._fields_dict:
+                for prefix in prefixes:
+                    if field_name.startswith(prefix):
+                        names.add(_remove_ek_prefix(prefix, field_name))
+                        break
+            self._all_field_names = names
+        return self._all_field_names
+
+    def _get_subfields_index(self):
+        """Gets a dict of {field_name: direct subfield names}, where "" holds the top level field names."""
+        if self._subfields_index is None:
+            subfields_index = {"": set()}
+            for field_name in self._get_all_field_names():
+                parts = field_name.split("_")
+                subfields_index[""].add(parts[0])
+                for i in range(1, len(parts)):
+                    subfields_index.setdefault("_".join(parts[:i]), set()).add(parts[i])
+            self._subfields_index = subfields_index
+        return self._subfields_index
 
     def _pretty_print_layer_fields(self, file: io.IOBase):
         for field_name in self.field_names:
@@ -148,11 +191,7 @@ class EkMultiField(_EkLayerHelperFuncsMixin):
 
     @property
     def subfields(self):
-        names = set()
-        for field_name in self._containing_layer.all_field_names:
-            if field_name != self._full_name and field_name.startswith(f"{self._full_name}_"):
-                names.add(field_name[len(self._full_name):].split("_")[1])
-        return list(names)
+        return self._containing_layer.get_subfield_names(self._full_name)
 
     @property
     def field_name(self):
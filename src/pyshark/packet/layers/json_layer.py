@@ -1,3 +1,4 @@
+import bisect
 import os
 import io
 
@@ -9,19 +10,24 @@ from pyshark.packet.layers.base import BaseLayer
 
 class JsonLayer(BaseLayer):
     __slots__ = [
-        "duplicate_layers",
+        "_duplicate_layers",
+        "_duplicate_dicts",
         "_showname_fields_converted_to_regular",
         "_full_name",
         "_is_intermediate",
         "_wrapped_fields",
         "value",
-        "_all_fields"
+        "_all_fields",
+        "_field_names",
+        "_field_suffix_index",
+        "_sorted_field_names"
     ] + BaseLayer.__slots__
 
     def __init__(self, layer_name, layer_dict, full_name=None, is_intermediate=False):
         """Creates a JsonLayer. All sublayers and fields are created lazily later."""
         super().__init__(layer_name)
-        self.duplicate_layers = []
+        self._duplicate_layers = None
+        self._duplicate_dicts = ()
         self._showname_fields_converted_to_regular = False
         if not full_name:
             self._full_name = self._layer_name
@@ -29,10 +35,14 @@ class JsonLayer(BaseLayer):
             self._full_name = full_name
         self._is_intermediate = is_intermediate
         self._wrapped_fields = {}
+        # Indexes of the field names, built lazily after the showname fields are converted.
+        self._field_names = None
+        self._field_suffix_index = None
+        self._sorted_field_names = None
         if isinstance(layer_dict, list):
-            self.duplicate_layers = [JsonLayer(layer_name, duplicate_dict,
-                                               full_name=full_name, is_intermediate=is_intermediate)
-                                     for duplicate_dict in layer_dict[1:]]
+            # The duplicates (or, for "_raw" layers, the position and length of the raw data) are only turned
+            # into layers when accessed.
+            self._duplicate_dicts = layer_dict[1:]
             layer_dict = layer_dict[0]
         if not isinstance(layer_dict, dict):
             self.value = layer_dict
@@ -41,6 +51,16 @@ class JsonLayer(BaseLayer):
 
         self._all_fields = layer_dict
 
+    @property
+    def duplicate_layers(self):
+        """Other layers with the same name in the packet (or under the same parent)."""
+        if self._duplicate_layers is None:
+            self._duplicate_layers = [JsonLayer(self._layer_name, duplicate_dict, full_name=self._full_name,
+                                                is_intermediate=self._is_intermediate)
+                                      for duplicate_dict in self._duplicate_dicts]
+            self._duplicate_dicts = ()
+        return self._duplicate_layers
+
     def get_field(self, name):
         """Gets a field by its full or partial name."""
         # We only make the wrappers here (lazily) to avoid creating a ton of objects needlessly.
@@ -60,10 +80,7 @@ class JsonLayer(BaseLayer):
 
     @property
     def field_names(self):
-        self._convert_showname_field_names_to_field_names()
-        return list(set([self._sanitize_field_name(name) for name in self._all_fields
-                         if name.startswith(self._full_name)] +
-                        [name.rsplit('.', 1)[1] for name in self._all_fields if '.' in name]))
+        return list(self._get_field_names())
 
     def has_field(self, dotted_name) -> bool:
         """Checks whether the layer has the given field name.
@@ -73,12 +90,20 @@ class JsonLayer(BaseLayer):
         parts = dotted_name.split('.')
         cur_layer = self
         for part in parts:
-            if part in cur_layer.field_names:
+            if isinstance(cur_layer, JsonLayer) and part in cur_layer._get_field_names():
                 cur_layer = cur_layer.get_field(part)
             else:
                 return False
         return True
 
+    def _get_field_names(self):
+        if self._field_names is None:
+            self._convert_showname_field_names_to_field_names()
+            self._field_names = set([self._sanitize_field_name(name) for name in self._all_fields
+                                     if name.startswith(self._full_name)] +
+                                    [name.rsplit('.', 1)[1] for name in self._all_fields if '.' in name])
+        return self._field_names
+
     def _pretty_print_layer_fields(self, file: io.IOBase):
         for field_line in self._get_all_field_lines():
             if ':' in field_line:
@@ -150,10 +175,10 @@ class JsonLayer(BaseLayer):
         field = self._all_fields.get(name, self._all_fields.get(f"{self._full_name}.{name}"))
         if field is not None:
             return field
-        for field_name in self._all_fields:
-            # Specific name
-            if field_name.endswith(f'.{name}'):
-                return self._all_fields[field_name]
+        # Specific name
+        field_name = self._get_field_suffix_index().get(name)
+        if field_name is not None:
+            return self._all_fields[field_name]
 
     def _is_fake_field(self, name):
         # Some fields include parts that are not reflected in the JSON dictionary
@@ -165,11 +190,34 @@ class JsonLayer(BaseLayer):
         #               }
         # }
         # So in this case we must create a fake layer for "bar".
-        field_full_name = f"{self._full_name}.{name}."
-        for name, field in self._all_fields.items():
-            if name.startswith(field_full_name):
-                return True
-        return False
+        return bool(self._get_field_names_with_prefix(f"{self._full_name}.{name}."))
+
+    def _get_field_suffix_index(self):
+        """Gets a dict of {suffix: field name} of every part of a field name that comes after a dot.
+
+        If several fields have the same suffix, the first of them is used.
+        """
+        if self._field_suffix_index is None:
+            suffix_index = {}
+            for field_name in self._all_fields:
+                dot_index = field_name.find(".")
+                while dot_index != -1:
+                    suffix_index.setdefault(field_name[dot_index + 1:], field_name)
+                    dot_index = field_name.find(".", dot_index + 1)
+            self._field_suffix_index = suffix_index
+        return self._field_suffix_index
+
+    def _get_field_names_with_prefix(self, prefix):
+        """Gets all field names which start with the given prefix, in their original order."""
+        if self._sorted_field_names is None:
+            self._sorted_field_names = sorted((field_name, index)
+                                              for index, field_name in enumerate(self._all_fields))
+        matching_names = []
+        for field_name, index in self._sorted_field_names[bisect.bisect_left(self._sorted_field_names, (prefix,)):]:
+            if not field_name.startswith(prefix):
+                break
+            matching_names.append((index, field_name))
+        return [field_name for _, field_name in sorted(matching_names)]
 
     def _make_wrapped_field(self, name, field, is_fake=False, full_name=None):
         """Creates the field lazily.
@@ -184,8 +232,7 @@ class JsonLayer(BaseLayer):
 
         if is_fake:
             # Populate with all fields that are supposed to be inside of it
-            field = {key: value for key, value in self._all_fields.items()
-                     if key.startswith(full_name)}
+            field = {key: self._all_fields[key] for key in self._get_field_names_with_prefix(full_name)}
         if isinstance(field, dict):
             if name.endswith('_tree'):
                 name = name.replace('_tree', '')
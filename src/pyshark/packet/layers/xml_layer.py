@@ -2,46 +2,74 @@ import os
 import typing
 import io
 
+from pyshark.packet import intern_table
 from pyshark.packet.common import colored
 from pyshark.packet.fields import LayerField, LayerFieldsContainer
 from pyshark.packet.layers import base
 
 
+# The attributes of a PDML field, in the order of the LayerField arguments following the name.
+_FIELD_ATTRIBUTES = ("showname", "value", "show", "hide", "pos", "size", "unmaskedvalue")
+
+
 class XmlLayer(base.BaseLayer):
     __slots__ = [
         "raw_mode",
-        "_all_fields"
+        "_all_fields",
+        "_sanitized_fields"
     ] + base.BaseLayer.__slots__
 
-    def __init__(self, xml_obj=None, raw_mode=False):
-        super().__init__(xml_obj.attrib['name'])
+    def __init__(self, xml_obj=None, raw_mode=False, lazy_fields=True, intern_values=False):
+        """Creates an XmlLayer from a PDML proto element.
+
+        Field names are interned through the shared intern table.
+
+        :param raw_mode: Whether attribute access returns the raw value of the fields.
+        :param lazy_fields: Keep the attributes of the fields as tuples and only create the field objects when
+        they are accessed. Saves a lot of memory since most fields are never read.
+        :param intern_values: Whether to intern short field values as well.
+        """
+        super().__init__(intern_table.FIELD_NAMES.intern(xml_obj.attrib['name']))
         self.raw_mode = raw_mode
 
+        # Holds either a LayerFieldsContainer or a list of field attribute tuples (in the order of
+        # _FIELD_ATTRIBUTES) per field name, the latter being turned into a container when it's accessed.
         self._all_fields = {}
+        # Built lazily on the first lookup which isn't by exact name.
+        self._sanitized_fields = None
 
         # We copy over all the fields from the XML object
         # Note: we don't read lazily from the XML because the lxml objects are very memory-inefficient
         # so we'd rather not save them.
         for field in xml_obj.findall('.//field'):
-            attributes = dict(field.attrib)
-            field_obj = LayerField(**attributes)
-            if attributes['name'] in self._all_fields:
-                # Field name already exists, add this field to the container.
-                self._all_fields[attributes['name']].add_field(field_obj)
+            attributes = field.attrib
+            field_name = intern_table.FIELD_NAMES.intern(attributes['name'])
+            if intern_values:
+                field_attributes = tuple([_intern_attribute(attributes.get(attribute_name))
+                                          for attribute_name in _FIELD_ATTRIBUTES])
             else:
-                self._all_fields[attributes['name']] = LayerFieldsContainer(field_obj)
+                field_attributes = tuple([attributes.get(attribute_name) for attribute_name in _FIELD_ATTRIBUTES])
+            field_values = self._all_fields.get(field_name)
+            if field_values is None:
+                self._all_fields[field_name] = [field_attributes]
+            else:
+                # Field name already exists, add this field to the container.
+                field_values.append(field_attributes)
+
+        if not lazy_fields:
+            for field_name in self._all_fields:
+                self._get_field_container(field_name)
 
     def get_field(self, name) -> typing.Union[LayerFieldsContainer, None]:
         """Gets the XML field object of the given name."""
         # Quicker in case the exact name was used.
-        field = self._all_fields.get(name)
-        if field is not None:
-            return field
+        if name in self._all_fields:
+            return self._get_field_container(name)
 
-        for field_name, field in self._all_fields.items():
-            if self._sanitize_field_name(name) == self._sanitize_field_name(field_name):
-                return field
-        return None
+        field_name = self._get_sanitized_fields().get(self._sanitize_field_name(name))
+        if field_name is None:
+            return None
+        return self._get_field_container(field_name)
 
     def get_field_value(self, name, raw=False) -> typing.Union[LayerFieldsContainer, None]:
         """Tries getting the value of the given field.
@@ -65,7 +93,7 @@ class XmlLayer(base.BaseLayer):
     @property
     def field_names(self) -> typing.List[str]:
         """Gets all XML field names of this layer."""
-        return [self._sanitize_field_name(field_name) for field_name in self._all_fields]
+        return list(self._get_sanitized_fields())
 
     @property
     def layer_name(self):
@@ -88,6 +116,34 @@ class XmlLayer(base.BaseLayer):
             return ''
         return self.layer_name + '.'
 
+    def _get_field_container(self, field_name) -> LayerFieldsContainer:
+        """Gets the container of the given field name, creating the field objects if they were not created yet."""
+        field = self._all_fields[field_name]
+        if isinstance(field, LayerFieldsContainer):
+            return field
+
+        container = None
+        for field_attributes in field:
+            field_obj = LayerField(field_name, *field_attributes)
+            if container is None:
+                container = LayerFieldsContainer(field_obj)
+            else:
+                container.add_field(field_obj)
+        self._all_fields[field_name] = container
+        return container
+
+    def _get_sanitized_fields(self) -> typing.Dict[str, str]:
+        """Gets a dict of {sanitized field name: field name}.
+
+        If several fields have the same sanitized name, the first of them is used.
+        """
+        if self._sanitized_fields is None:
+            sanitized_fields = {}
+            for field_name in self._all_fields:
+                sanitized_fields.setdefault(self._sanitize_field_name(field_name), field_name)
+            self._sanitized_fields = sanitized_fields
+        return self._sanitized_fields
+
     def _sanitize_field_name(self, field_name):
         """Sanitizes an XML field name
 
@@ -104,7 +160,7 @@ class XmlLayer(base.BaseLayer):
             file.write(colored(field_line, attrs=["bold"]))
 
     def _get_all_fields_with_alternates(self):
-        all_fields = list(self._all_fields.values())
+        all_fields = [self._get_field_container(field_name) for field_name in list(self._all_fields)]
         all_fields += sum([field.alternate_fields for field in all_fields
                            if isinstance(field, LayerFieldsContainer)], [])
         return all_fields
@@ -140,3 +196,9 @@ class XmlLayer(base.BaseLayer):
                 # Return it if "XXX: whatever == XXX"
                 return field
         return None
+
+
+def _intern_attribute(attribute_value):
+    if attribute_value is None:
+        return None
+    return intern_table.VALUES.intern(attribute_value)
@@ -0,0 +1,77 @@
+from pyshark.packet.packet import Packet
+
+_FRAME_METADATA_NAMES = (b"number", b"len", b"time_epoch", b"protocols")
+
+
+class LazyPacket(Packet):
+    """A packet which keeps tshark's output for it and only decodes it when its layers are first accessed.
+
+    The number, length, sniff time and frame_protocols of the packet are available without decoding it, so filtering
+    packets by them is cheap.
+    """
+    __slots__ = ["_frame_protocols", "_packet_data", "_decode_packet"]
+
+    def __init__(self, packet_data, decode_packet, frame_protocols=None, number=None, length=None, sniff_time=None):
+        """
+        :param packet_data: The output of tshark for the packet.
+        :param decode_packet: A function which creates a Packet from packet_data.
+        :param frame_protocols: The protocols in the frame, i.e. "eth:ethertype:ip:tcp".
+        """
+        super().__init__(number=number, length=length, sniff_time=sniff_time)
+        # Unset until decoded, so that accessing them goes through __getattr__
+        del self.layers
+        del self.frame_info
+        self._frame_protocols = frame_protocols
+        self._packet_data = packet_data
+        self._decode_packet = decode_packet
+
+    @property
+    def decoded(self) -> bool:
+        return self._packet_data is None
+
+    @property
+    def frame_protocols(self) -> str:
+        return self._frame_protocols
+
+    def decode(self):
+        """Decodes the packet's layers, if they were not decoded yet."""
+        if self._packet_data is None:
+            return
+        packet = self._decode_packet(self._packet_data)
+        self.layers = packet.layers
+        self.frame_info = packet.frame_info
+        self.number = packet.number
+        self.length = packet.length
+        self.captured_length = packet.captured_length
+        self.interface_captured = packet.interface_captured
+        self._sniff_time_ns = packet.sniff_time_ns
+        self._invalid_sniff_timestamp = packet._invalid_sniff_timestamp
+        self._packet_data = None
+        self._decode_packet = None
+
+    def __getstate__(self):
+        self.decode()
+        return super().__getstate__()
+
+    def __getattr__(self, item):
+        if item in ("layers", "frame_info") and self._packet_data is not None:
+            self.decode()
+            return object.__getattribute__(self, item)
+        return super().__getattr__(item)
+
+
+def scan_frame_metadata(packet_data, metadata_regex):
+    """Finds the number, length, epoch time and protocols of the frame in tshark's output for a packet, without
+    decoding the rest of it.
+
+    :param metadata_regex: A regex which matches a frame field, with its name (without prefix) and value as groups.
+    :return: A dict of {name: value} with the above fields as bytes, or None if any of them was not found.
+    """
+    metadata = {}
+    for match in metadata_regex.finditer(packet_data):
+        name = match.group(1)
+        if name not in metadata:
+            metadata[name] = match.group(2)
+            if len(metadata) == len(_FRAME_METADATA_NAMES):
+                return metadata
+    return None
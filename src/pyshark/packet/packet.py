@@ -1,18 +1,27 @@
 import datetime
 import os
-import binascii
 import typing
 
 from pyshark.packet import consts
-from pyshark.packet.common import Pickleable
+from pyshark.packet.common import SlotsPickleable
+from pyshark.packet.fields import LayerFieldsContainer
 from pyshark.packet.layers.base import BaseLayer
+from pyshark.packet.layers.ek_layer import EkMultiField
 
+_NOT_COMPUTED = object()
+_NANOSECONDS_IN_SECOND = 10 ** 9
 
-class Packet(Pickleable):
+
+class Packet(SlotsPickleable):
     """A packet object which contains layers.
 
     Layers can be accessed via index or name.
     """
+    __slots__ = ["layers", "frame_info", "number", "interface_captured", "captured_length", "length",
+                 "_sniff_time_ns", "_invalid_sniff_timestamp", "_raw_packet", "_layer_index", "_indexed_layer_count",
+                 "_highest_layer", "_transport_layer"]
+    # Computed from the layers, not kept when pickling.
+    _CACHE_SLOTS = ("_layer_index", "_indexed_layer_count", "_highest_layer", "_transport_layer")
 
     def __init__(self, layers=None, frame_info=None, number=None,
                  length=None, captured_length=None, sniff_time=None, interface_captured=None):
@@ -36,6 +45,44 @@ class Packet(Pickleable):
         self.captured_length = captured_length
         self.length = length
         self.sniff_timestamp = sniff_time
+        self._raw_packet = None
+        self._clear_layer_cache()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for slot in self._CACHE_SLOTS:
+            state.pop(slot)
+        if self._raw_packet is not None:
+            # The raw packet may be a view into a file or a buffer which can't be pickled.
+            state["_raw_packet"] = self._raw_packet.tobytes()
+        return state
+
+    def __setstate__(self, data):
+        self._raw_packet = None
+        self._clear_layer_cache()
+        super().__setstate__(data)
+        if self._raw_packet is not None:
+            self._raw_packet = memoryview(self._raw_packet)
+
+    def _clear_layer_cache(self):
+        self._layer_index = None
+        self._indexed_layer_count = 0
+        self._highest_layer = _NOT_COMPUTED
+        self._transport_layer = _NOT_COMPUTED
+
+    def _get_layer_index(self) -> typing.Dict[str, typing.List[int]]:
+        """Gets a dict of {lowercase layer name: indices of the layers with that name}.
+
+        It's rebuilt if layers were added or removed since it was built.
+        """
+        if self._layer_index is None or self._indexed_layer_count != len(self.layers):
+            self._clear_layer_cache()
+            layer_index = {}
+            for i, layer in enumerate(self.layers):
+                layer_index.setdefault(layer.layer_name.lower(), []).append(i)
+            self._layer_index = layer_index
+            self._indexed_layer_count = len(self.layers)
+        return self._layer_index
 
     def __getitem__(self, item):
         """
@@ -46,10 +93,10 @@ class Packet(Pickleable):
         """
         if isinstance(item, int):
             return self.layers[item]
-        for layer in self.layers:
-            if layer.layer_name.lower() == item.lower():
-                return layer
-        raise KeyError('Layer does not exist in packet')
+        layer_indices = self._get_layer_index().get(item.lower())
+        if layer_indices is None:
+            raise KeyError('Layer does not exist in packet')
+        return self.layers[layer_indices[0]]
 
     def __contains__(self, item):
         """Checks if the layer is inside the packet.
@@ -63,17 +110,49 @@ class Packet(Pickleable):
             return False
 
     def __dir__(self):
-        return dir(type(self)) + list(self.__dict__.keys()) + [l.layer_name for l in self.layers]
+        return dir(type(self)) + [l.layer_name for l in self.layers]
 
     def get_raw_packet(self) -> bytes:
-        assert "FRAME_RAW" in self, "Packet contains no raw data. In order to contains it, " \
-                                    "make sure that use_json and include_raw are set to True " \
-                                    "in the Capture object"
-        raw_packet = b''
-        byte_values = [''.join(x) for x in zip(self.frame_raw.value[0::2], self.frame_raw.value[1::2])]
-        for value in byte_values:
-            raw_packet += binascii.unhexlify(value)
-        return raw_packet
+        raw_packet = self.get_raw_packet_view()
+        if isinstance(raw_packet.obj, bytes) and raw_packet.nbytes == len(raw_packet.obj):
+            return raw_packet.obj
+        return raw_packet.tobytes()
+
+    def get_raw_packet_view(self) -> memoryview:
+        """Gets the raw packet as a memoryview, without copying it.
+
+        The raw data is decoded on the first call and kept for later ones.
+        """
+        if self._raw_packet is None:
+            assert "FRAME_RAW" in self, "Packet contains no raw data. In order to contains it, " \
+                                        "make sure that use_json and include_raw are set to True " \
+                                        "in the Capture object"
+            self._raw_packet = memoryview(bytes.fromhex(self.frame_raw.value))
+        return self._raw_packet
+
+    def set_raw_packet(self, raw_packet):
+        """Sets the raw data of the packet (any bytes-like object), instead of taking it from the frame_raw layer.
+
+        The data is not copied.
+        """
+        self._raw_packet = memoryview(raw_packet)
+
+    def to_bytes(self) -> bytes:
+        """Serializes the packet into a compact binary format. Much faster and smaller than pickling.
+
+        Use pyshark.packet.serialization.packets_to_bytes() to serialize many packets at once.
+        """
+        from pyshark.packet import serialization
+        return serialization.packets_to_bytes([self])
+
+    @classmethod
+    def from_bytes(cls, data) -> "Packet":
+        """Deserializes a packet serialized by to_bytes()."""
+        from pyshark.packet import serialization
+        packets = serialization.packets_from_bytes(data)
+        if len(packets) != 1:
+            raise serialization.InvalidSerializedDataException(f"Expected a single packet, got {len(packets)}")
+        return packets[0]
 
     def __len__(self):
         return int(self.length)
@@ -82,14 +161,42 @@ class Packet(Pickleable):
         return True
 
     @property
-    def sniff_time(self) -> datetime.datetime:
+    def frame_protocols(self) -> str:
+        """The protocols in the frame, i.e. "eth:ethertype:ip:tcp"."""
+        return self.frame_info.protocols
+
+    @property
+    def sniff_timestamp(self) -> typing.Union[str, None]:
+        """The time the packet was captured, as an epoch timestamp string (i.e. "1585220581.863675000").
+
+        A timestamp which is not an epoch timestamp is returned as it was given.
+        """
+        if self._sniff_time_ns is None:
+            return self._invalid_sniff_timestamp
+        seconds, nanoseconds = divmod(self._sniff_time_ns, _NANOSECONDS_IN_SECOND)
+        return f"{seconds}.{nanoseconds:09d}"
+
+    @sniff_timestamp.setter
+    def sniff_timestamp(self, sniff_timestamp):
         try:
-            timestamp = float(self.sniff_timestamp)
+            self._sniff_time_ns = _timestamp_to_ns(sniff_timestamp)
+            self._invalid_sniff_timestamp = None
         except ValueError:
-            # If the value after the decimal point is negative, discard it
-            # Google: wireshark fractional second
-            timestamp = float(self.sniff_timestamp.split(".")[0])
-        return datetime.datetime.fromtimestamp(timestamp)
+            # Kept as-is, so that a timestamp in an unexpected form only fails when the sniff time is used.
+            self._sniff_time_ns = None
+            self._invalid_sniff_timestamp = sniff_timestamp
+
+    @property
+    def sniff_time_ns(self) -> typing.Union[int, None]:
+        """The time the packet was captured, in nanoseconds since the epoch."""
+        return self._sniff_time_ns
+
+    @property
+    def sniff_time(self) -> datetime.datetime:
+        if self._invalid_sniff_timestamp is not None:
+            raise ValueError(f"Invalid sniff timestamp: {self._invalid_sniff_timestamp}")
+        # Integer true division is correctly rounded, so this is the same as float() of the timestamp string.
+        return datetime.datetime.fromtimestamp(self._sniff_time_ns / _NANOSECONDS_IN_SECOND)
 
     def __repr__(self):
         transport_protocol = ''
@@ -119,20 +226,27 @@ class Packet(Pickleable):
         """
         Allows layers to be retrieved via get attr. For instance: pkt.ip
         """
-        for layer in self.layers:
-            if layer.layer_name.lower() == item.lower():
-                return layer
+        # Private names are never layers. This also avoids recursing on slots which weren't set yet.
+        if not item.startswith("_"):
+            layer_indices = self._get_layer_index().get(item.lower())
+            if layer_indices is not None:
+                return self.layers[layer_indices[0]]
         raise AttributeError(f"No attribute named {item}")
 
     @property
     def highest_layer(self) -> BaseLayer:
-        return self.layers[-1].layer_name.upper()
+        self._get_layer_index()
+        if self._highest_layer is _NOT_COMPUTED:
+            self._highest_layer = self.layers[-1].layer_name.upper()
+        return self._highest_layer
 
     @property
     def transport_layer(self) -> BaseLayer:
-        for layer in consts.TRANSPORT_LAYERS:
-            if layer in self:
-                return layer
+        layer_index = self._get_layer_index()
+        if self._transport_layer is _NOT_COMPUTED:
+            self._transport_layer = next((layer for layer in consts.TRANSPORT_LAYERS
+                                          if layer.lower() in layer_index), None)
+        return self._transport_layer
 
     def get_multiple_layers(self, layer_name) -> typing.List[BaseLayer]:
         """Returns a list of all the layers in the packet that are of the layer type (an incase-sensitive string).
@@ -140,4 +254,67 @@ class Packet(Pickleable):
         This is in order to retrieve layers which appear multiple times in the same packet (i.e. double VLAN)
         which cannot be retrieved by easier means.
         """
-        return [layer for layer in self.layers if layer.layer_name.lower() == layer_name.lower()]
+        return [self.layers[i] for i in self._get_layer_index().get(layer_name.lower(), ())]
+
+    def get_field_values(self, field_name) -> list:
+        """Gets all the values of a field by its full name (i.e. "ip.src" or "ip.flags.df").
+
+        The values are collected from every layer of the field's protocol, so a field which appears more than once has
+        more than one value. Returns an empty list if the packet has no such field.
+        """
+        layer_name, _, name = field_name.partition(".")
+        values = []
+        if name:
+            for layer in self.get_multiple_layers(layer_name):
+                values.extend(_get_layer_field_values(layer, name))
+        return values
+
+
+def _timestamp_to_ns(sniff_timestamp) -> typing.Union[int, None]:
+    """Converts an epoch timestamp (a "seconds.fraction" string or a number) to nanoseconds."""
+    if sniff_timestamp is None:
+        return None
+    if isinstance(sniff_timestamp, int):
+        return sniff_timestamp * _NANOSECONDS_IN_SECOND
+    if isinstance(sniff_timestamp, float):
+        return round(sniff_timestamp * _NANOSECONDS_IN_SECOND)
+    seconds, _, fraction = str(sniff_timestamp).partition(".")
+    if not fraction.isdigit():
+        # If the value after the decimal point is negative, discard it
+        # Google: wireshark fractional second
+        fraction = "0"
+    nanoseconds = int(seconds) * _NANOSECONDS_IN_SECOND
+    fraction_nanoseconds = int(fraction[:9].ljust(9, "0"))
+    if seconds.startswith("-"):
+        return nanoseconds - fraction_nanoseconds
+    return nanoseconds + fraction_nanoseconds
+
+
+def _get_layer_field_values(layer, name):
+    """Gets the values of a field in a layer by its name without the layer prefix (i.e. "flags.df" for ip)."""
+    try:
+        value = layer.get_field(name)
+    except AttributeError:
+        value = None
+    if value is None and "." in name:
+        # JSON layers keep nested fields in a "_tree" layer
+        parent_name, _, name = name.partition(".")
+        try:
+            parent = layer.get_field(f"{parent_name}_tree")
+        except AttributeError:
+            parent = None
+        if isinstance(parent, BaseLayer):
+            return _get_layer_field_values(parent, name)
+        return []
+
+    values = value if isinstance(value, list) else [value]
+    result = []
+    for value in values:
+        if isinstance(value, LayerFieldsContainer):
+            result.extend(field.get_default_value() for field in value.fields)
+        elif isinstance(value, EkMultiField):
+            if value.value is not None:
+                result.append(value.value)
+        elif value is not None and not isinstance(value, BaseLayer):
+            result.append(value)
+    return result
@@ -0,0 +1,324 @@
+"""A compact binary format for packets, much smaller and faster than pickling them.
+
+A serialized batch of packets is made of a header, a table of all the strings in the batch (each string is written
+once) and the packets themselves, which refer to strings by their index in the table. Integers and lengths are
+written as varints.
+"""
+import struct
+import typing
+
+from pyshark.packet import intern_table
+from pyshark.packet.fields import LayerFieldsContainer
+from pyshark.packet.layers.ek_layer import EkLayer
+from pyshark.packet.layers.json_layer import JsonLayer
+from pyshark.packet.layers.xml_layer import XmlLayer
+from pyshark.packet.packet import Packet
+
+_MAGIC = b"PSPK"
+_VERSION = 1
+
+# Value tags
+_NONE = 0
+_FALSE = 1
+_TRUE = 2
+_INT = 3
+_FLOAT = 4
+_STR = 5
+_BYTES = 6
+_LIST = 7
+_DICT = 8
+
+# Layer tags
+_JSON_LAYER = 0
+_XML_LAYER = 1
+_EK_LAYER = 2
+
+_FLOAT_STRUCT = struct.Struct("<d")
+
+
+class InvalidSerializedDataException(Exception):
+    pass
+
+
+def packets_to_bytes(packets: typing.Iterable[Packet]) -> bytes:
+    """Serializes a batch of packets. Strings are shared by all the packets in the batch."""
+    encoder = _Encoder()
+    packets = list(packets)
+    body = encoder.out
+    _write_varint(body, len(packets))
+    for packet in packets:
+        encoder.write_packet(packet)
+
+    header = bytearray(_MAGIC)
+    header.append(_VERSION)
+    _write_varint(header, len(encoder.strings))
+    for string in encoder.strings:
+        encoded_string = string.encode("utf-8", "surrogatepass")
+        _write_varint(header, len(encoded_string))
+        header += encoded_string
+    return bytes(header + body)
+
+
+def packets_from_bytes(data) -> typing.List[Packet]:
+    """Deserializes a batch of packets serialized by packets_to_bytes().
+
+    :param data: A bytes-like object.
+    """
+    data = memoryview(data)
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise InvalidSerializedDataException("Data does not contain serialized packets")
+    if len(data) <= len(_MAGIC) or data[len(_MAGIC)] != _VERSION:
+        raise InvalidSerializedDataException("Unsupported serialization version")
+    decoder = _Decoder(data, len(_MAGIC) + 1)
+    try:
+        decoder.read_string_table()
+        return [decoder.read_packet() for _ in range(decoder.read_varint())]
+    except (IndexError, struct.error, UnicodeDecodeError):
+        raise InvalidSerializedDataException("Serialized packets data is truncated or corrupted")
+
+
+def _write_varint(out, value):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+class _Encoder:
+
+    def __init__(self):
+        self.out = bytearray()
+        self.strings = []
+        self._string_indices = {}
+
+    def write_packet(self, packet):
+        self.write_value(packet.number)
+        self.write_value(packet.length)
+        self.write_value(packet.captured_length)
+        self.write_value(packet.interface_captured)
+        # The timestamp as-is if it could not be converted
+        self.write_value(packet.sniff_time_ns if packet.sniff_time_ns is not None else packet.sniff_timestamp)
+        self.write_value(packet._raw_packet)
+        if packet.frame_info is None:
+            self.out.append(0)
+        else:
+            self.out.append(1)
+            self.write_layer(packet.frame_info)
+        _write_varint(self.out, len(packet.layers))
+        for layer in packet.layers:
+            self.write_layer(layer)
+
+    def write_layer(self, layer):
+        if isinstance(layer, JsonLayer):
+            self.out.append(_JSON_LAYER)
+            self.write_json_layer(layer)
+        elif isinstance(layer, XmlLayer):
+            self.out.append(_XML_LAYER)
+            self.write_xml_layer(layer)
+        elif isinstance(layer, EkLayer):
+            self.out.append(_EK_LAYER)
+            self.write_str(layer._layer_name)
+            self.write_value(layer._fields_casted)
+            self.write_value(layer._fields_dict)
+        else:
+            raise TypeError(f"Cannot serialize layers of type {type(layer).__name__}")
+
+    def write_json_layer(self, layer):
+        self.write_str(layer._layer_name)
+        self.write_str(layer._full_name)
+        self.write_value(layer._is_intermediate)
+        if layer._duplicate_layers is None:
+            duplicates = layer._duplicate_dicts
+        else:
+            duplicates = [_get_json_layer_source(duplicate) for duplicate in layer._duplicate_layers]
+        if duplicates:
+            self.write_value([_get_json_layer_source(layer)] + list(duplicates))
+        else:
+            self.write_value(_get_json_layer_source(layer))
+
+    def write_xml_layer(self, layer):
+        self.write_str(layer._layer_name)
+        self.write_value(layer.raw_mode)
+        _write_varint(self.out, len(layer._all_fields))
+        for field_name, field in layer._all_fields.items():
+            self.write_str(field_name)
+            if isinstance(field, LayerFieldsContainer):
+                field = [(field_obj.showname, field_obj.raw_value, field_obj.show, "yes" if field_obj.hide else None,
+                          field_obj.pos, field_obj.size, field_obj.unmaskedvalue) for field_obj in field.fields]
+            _write_varint(self.out, len(field))
+            for field_attributes in field:
+                for attribute in field_attributes:
+                    self.write_value(attribute)
+
+    def write_str(self, string):
+        index = self._string_indices.get(string)
+        if index is None:
+            index = self._string_indices[string] = len(self.strings)
+            self.strings.append(str(string))
+        _write_varint(self.out, index)
+
+    def write_value(self, value):
+        """Writes a JSON-like value (None, bool, int, float, str, bytes, or a list or dict of them)."""
+        out = self.out
+        if value is None:
+            out.append(_NONE)
+        elif value is True:
+            out.append(_TRUE)
+        elif value is False:
+            out.append(_FALSE)
+        elif isinstance(value, str):
+            out.append(_STR)
+            self.write_str(value)
+        elif isinstance(value, int):
+            out.append(_INT)
+            # Zigzag encoding, so small negative numbers are short as well
+            _write_varint(out, value << 1 if value >= 0 else ((-value) << 1) - 1)
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out += _FLOAT_STRUCT.pack(value)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                self.write_str(key)
+                self.write_value(item)
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                self.write_value(item)
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            out.append(_BYTES)
+            value = memoryview(value)
+            _write_varint(out, value.nbytes)
+            out += value
+        else:
+            raise TypeError(f"Cannot serialize values of type {type(value).__name__}")
+
+
+class _Decoder:
+
+    def __init__(self, data, position):
+        self._data = data
+        self._position = position
+        self._strings = []
+
+    def read_string_table(self):
+        data = self._data
+        strings = []
+        for _ in range(self.read_varint()):
+            length = self.read_varint()
+            end = self._position + length
+            if end > len(data):
+                raise IndexError()
+            strings.append(str(data[self._position:end], "utf-8", "surrogatepass"))
+            self._position = end
+        self._strings = strings
+
+    def read_packet(self):
+        number = self.read_value()
+        length = self.read_value()
+        captured_length = self.read_value()
+        interface_captured = self.read_value()
+        sniff_time_ns = self.read_value()
+        raw_packet = self.read_value()
+        frame_info = self.read_layer() if self.read_byte() else None
+        layers = [self.read_layer() for _ in range(self.read_varint())]
+        packet = Packet(layers=layers, frame_info=frame_info, number=number, length=length,
+                        captured_length=captured_length, interface_captured=interface_captured)
+        if isinstance(sniff_time_ns, str):
+            packet.sniff_timestamp = sniff_time_ns
+        else:
+            packet._sniff_time_ns = sniff_time_ns
+        if raw_packet is not None:
+            packet.set_raw_packet(raw_packet)
+        return packet
+
+    def read_layer(self):
+        layer_type = self.read_byte()
+        if layer_type == _JSON_LAYER:
+            layer_name = self.read_str()
+            full_name = self.read_str()
+            is_intermediate = self.read_value()
+            return JsonLayer(layer_name, self.read_value(), full_name=full_name, is_intermediate=is_intermediate)
+        if layer_type == _XML_LAYER:
+            return self.read_xml_layer()
+        if layer_type == _EK_LAYER:
+            layer_name = self.read_str()
+            fields_casted = self.read_value()
+            return EkLayer(layer_name, self.read_value(), fields_casted=fields_casted)
+        raise InvalidSerializedDataException(f"Unknown layer type {layer_type}")
+
+    def read_xml_layer(self):
+        layer = XmlLayer.__new__(XmlLayer)
+        layer_name = intern_table.FIELD_NAMES.intern(self.read_str())
+        raw_mode = self.read_value()
+        all_fields = {}
+        for _ in range(self.read_varint()):
+            field_name = intern_table.FIELD_NAMES.intern(self.read_str())
+            all_fields[field_name] = [(self.read_value(), self.read_value(), self.read_value(), self.read_value(),
+                                       self.read_value(), self.read_value(), self.read_value())
+                                      for _ in range(self.read_varint())]
+        layer.__setstate__({"_layer_name": layer_name, "raw_mode": raw_mode, "_all_fields": all_fields,
+                            "_sanitized_fields": None})
+        return layer
+
+    def read_byte(self):
+        byte = self._data[self._position]
+        self._position += 1
+        return byte
+
+    def read_varint(self):
+        data = self._data
+        result = 0
+        shift = 0
+        while True:
+            byte = data[self._position]
+            self._position += 1
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read_str(self):
+        return self._strings[self.read_varint()]
+
+    def read_value(self):
+        tag = self.read_byte()
+        if tag == _STR:
+            return self._strings[self.read_varint()]
+        if tag == _NONE:
+            return None
+        if tag == _DICT:
+            strings = self._strings
+            return {strings[self.read_varint()]: self.read_value() for _ in range(self.read_varint())}
+        if tag == _LIST:
+            return [self.read_value() for _ in range(self.read_varint())]
+        if tag == _INT:
+            value = self.read_varint()
+            return -((value + 1) >> 1) if value & 1 else value >> 1
+        if tag == _TRUE:
+            return True
+        if tag == _FALSE:
+            return False
+        if tag == _FLOAT:
+            value, = _FLOAT_STRUCT.unpack_from(self._data, self._position)
+            self._position += _FLOAT_STRUCT.size
+            return value
+        if tag == _BYTES:
+            length = self.read_varint()
+            end = self._position + length
+            if end > len(self._data):
+                raise IndexError()
+            value = self._data[self._position:end].tobytes()
+            self._position = end
+            return value
+        raise InvalidSerializedDataException(f"Unknown value type {tag}")
+
+
+def _get_json_layer_source(layer):
+    """Gets the value a JsonLayer was created from (its fields dict, or its value if it has no fields)."""
+    try:
+        return object.__getattribute__(layer, "value")
+    except AttributeError:
+        return layer._all_fields
@@ -1,5 +1,14 @@
+import time
+
+
 class BaseTsharkOutputParser:
     DEFAULT_BATCH_SIZE = 2 ** 16
+    # The name of the output format the parser reads (see tshark's -T).
+    OUTPUT_FORMAT = None
+    # A CaptureMetrics (from pyshark.capture.capture_metrics) to count the reading and parsing in, if any.
+    metrics = None
+    # A CaptureProfiler (from pyshark.capture.capture_profiler) to profile the parsing of every packet with, if any.
+    profiler = None
 
     async def get_packets_from_stream(self, stream, existing_data, got_first_packet=True):
         """A coroutine which returns a single packet if it can be read from the given StreamReader.
@@ -8,20 +17,68 @@ class BaseTsharkOutputParser:
         a packet. remaining_data is the leftover data which was not enough to create a packet from.
         :raises EOFError if EOF was reached.
         """
+        metrics = self.metrics
+        if metrics is not None:
+            start_time = time.perf_counter()
         # yield each packet in existing_data
         packet, existing_data = self._extract_packet_from_data(existing_data,
                                                                got_first_packet=got_first_packet)
+        if metrics is not None:
+            metrics.add_time("framing", time.perf_counter() - start_time)
         if packet:
-            packet = self._parse_single_packet(packet)
-            return packet, existing_data
+            if metrics is None and self.profiler is None:
+                return self._parse_single_packet(packet), existing_data
+            if metrics is not None:
+                metrics.count("packets_framed")
+            return self._parse_single_packet_instrumented(packet), existing_data
 
-        new_data = await stream.read(self.DEFAULT_BATCH_SIZE)
+        new_data = await self._read_stream(stream)
         existing_data += new_data
+        if metrics is not None:
+            metrics.set_gauge("buffered_bytes", len(existing_data))
 
         if not new_data:
             raise EOFError()
         return None, existing_data
 
+    async def _read_stream(self, stream, size=None):
+        """Reads a batch of data from the stream, counting it in the metrics."""
+        metrics = self.metrics
+        if metrics is None:
+            return await stream.read(size or self.DEFAULT_BATCH_SIZE)
+        start_time = time.perf_counter()
+        data = await stream.read(size or self.DEFAULT_BATCH_SIZE)
+        metrics.add_time("read_wait", time.perf_counter() - start_time)
+        metrics.count("reads")
+        metrics.count("bytes_read", len(data))
+        return data
+
+    def _parse_single_packet_instrumented(self, packet_data):
+        metrics = self.metrics
+        profiler = self.profiler
+        packet = None
+        if profiler is not None:
+            profile_token = profiler.packet_started("parse", packet_data)
+        start_time = time.perf_counter()
+        try:
+            packet = self._parse_single_packet(packet_data)
+        except Exception:
+            if metrics is not None:
+                metrics.count("parse_errors")
+            raise
+        finally:
+            if metrics is not None:
+                metrics.add_time("parsing", time.perf_counter() - start_time)
+            if profiler is not None:
+                profiler.packet_finished("parse", packet, self.output_format, profile_token)
+        if metrics is not None:
+            metrics.count("packets_parsed")
+        return packet
+
+    @property
+    def output_format(self) -> str:
+        return self.OUTPUT_FORMAT
+
     def _parse_single_packet(self, packet):
         raise NotImplementedError()
 
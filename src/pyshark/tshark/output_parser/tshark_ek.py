@@ -1,5 +1,7 @@
+import functools
 import json
 import os
+import re
 
 from pyshark.tshark.output_parser.base_parser import BaseTsharkOutputParser
 
@@ -9,16 +11,45 @@ try:
 except ImportError:
     USE_UJSON = False
 
+from pyshark import ek_field_mapping
+from pyshark.packet import intern_table
 from pyshark.packet.layers.ek_layer import EkLayer
+from pyshark.packet.lazy_packet import LazyPacket, scan_frame_metadata
 from pyshark.packet.packet import Packet
 
 _ENCODED_OS_LINESEP = os.linesep.encode()
+# Values may be strings or numbers
+_FRAME_METADATA_REGEX = re.compile(rb'"frame_frame_(number|len|time_epoch|protocols)":\s*"?([^",}]*)')
 
 
 class TsharkEkJsonParser(BaseTsharkOutputParser):
+    OUTPUT_FORMAT = "ek"
+
+    def __init__(self, cast_fields=False, intern_strings=False, intern_values=False, lazy=False, as_dicts=False,
+                 layer_cache=None):
+        """
+        :param as_dicts: Returns every packet as a dict of layer dicts (see dict_from_ek_packet) instead of a Packet.
+        :param layer_cache: A LayerCache to share identical layers between packets through.
+        """
+        super().__init__()
+        self._cast_fields = cast_fields
+        self._intern_strings = intern_strings
+        self._intern_values = intern_values
+        self._lazy = lazy
+        self._as_dicts = as_dicts
+        self._layer_cache = layer_cache
 
     def _parse_single_packet(self, packet):
-        return packet_from_ek_packet(packet)
+        if self._as_dicts:
+            return dict_from_ek_packet(packet, cast_fields=self._cast_fields,
+                                       intern_strings=self._intern_strings, intern_values=self._intern_values)
+        if self._lazy:
+            return lazy_packet_from_ek_packet(packet, cast_fields=self._cast_fields,
+                                              intern_strings=self._intern_strings, intern_values=self._intern_values,
+                                              layer_cache=self._layer_cache)
+        return packet_from_ek_packet(packet, cast_fields=self._cast_fields,
+                                     intern_strings=self._intern_strings, intern_values=self._intern_values,
+                                     layer_cache=self._layer_cache)
 
     def _extract_packet_from_data(self, data, got_first_packet=True):
         """Returns a packet's data and any remaining data after reading that first packet"""
@@ -35,25 +66,105 @@ class TsharkEkJsonParser(BaseTsharkOutputParser):
         return data[start_index:linesep_location], data[linesep_location + 1:]
 
 
-def packet_from_ek_packet(json_pkt):
+def packet_from_ek_packet(json_pkt, cast_fields=False, intern_strings=False, intern_values=False, layer_cache=None):
+    """Creates a Pyshark Packet from a tshark EK single packet.
+
+    :param cast_fields: Whether to cast all field values of every layer to their proper types while decoding,
+    rather than on each field access.
+    :param intern_strings: Whether to intern the field and layer names through the shared intern table.
+    :param intern_values: When interning strings, whether to intern short string values as well.
+    :param layer_cache: A LayerCache to get the layers from, so that identical layers are shared between packets.
+    The frame layer is never shared. Must not be shared between calls with a different cast_fields.
+    """
+    frame_dict, layer_dicts = _layer_dicts_from_ek_packet(json_pkt, intern_strings=intern_strings,
+                                                          intern_values=intern_values)
+    if layer_cache is None:
+        layers = [_make_ek_layer(name, layer_dict, cast_fields) for name, layer_dict in layer_dicts]
+    else:
+        create_layer = functools.partial(_make_ek_layer, cast_fields=cast_fields)
+        layers = [layer_cache.get_layer(name, layer_dict, create_layer) for name, layer_dict in layer_dicts]
+    return Packet(layers=layers, frame_info=_make_ek_layer('frame', frame_dict, cast_fields),
+                  number=int(frame_dict.get('frame_frame_number', 0)),
+                  length=int(frame_dict['frame_frame_len']),
+                  sniff_time=frame_dict['frame_frame_time_epoch'],
+                  interface_captured=frame_dict.get('rame_frame_interface_id'))
+
+
+def dict_from_ek_packet(json_pkt, cast_fields=False, intern_strings=False, intern_values=False) -> dict:
+    """Decodes a tshark EK single packet into a dict of {layer_name: layer_dict}, without creating a Packet.
+
+    The frame comes first, followed by the layers in the order of the protocols in the frame.
+    Takes the same arguments as packet_from_ek_packet.
+    """
+    frame_dict, layer_dicts = _layer_dicts_from_ek_packet(json_pkt, intern_strings=intern_strings,
+                                                          intern_values=intern_values)
+    packet_dict = {'frame': frame_dict}
+    packet_dict.update(layer_dicts)
+    if cast_fields:
+        for layer_name, layer_dict in packet_dict.items():
+            packet_dict[layer_name], _ = _cast_layer_fields(layer_name, layer_dict)
+    return packet_dict
+
+
+def _layer_dicts_from_ek_packet(json_pkt, intern_strings=False, intern_values=False):
+    """Decodes a tshark EK single packet into its frame dict and a list of (layer_name, layer_dict)."""
     if USE_UJSON:
         pkt_dict = ujson.loads(json_pkt)
     else:
         pkt_dict = json.loads(json_pkt.decode('utf-8'))
 
+    layers_dict = pkt_dict['layers']
+    if intern_strings:
+        layers_dict = intern_table.intern_json_dict(layers_dict, intern_values=intern_values)
     # We use the frame dict here and not the object access because it's faster.
-    frame_dict = pkt_dict['layers'].pop('frame')
-    layers = []
+    frame_dict = layers_dict.pop('frame')
+    if intern_strings:
+        # The protocol stacks repeat just like the names
+        frame_dict['frame_frame_protocols'] = intern_table.FIELD_NAMES.intern(frame_dict['frame_frame_protocols'])
+    layer_dicts = []
     for layer in frame_dict['frame_frame_protocols'].split(':'):
-        layer_dict = pkt_dict['layers'].pop(layer, None)
+        layer_dict = layers_dict.pop(layer, None)
         if layer_dict is not None:
-            layers.append(EkLayer(layer, layer_dict))
+            if intern_strings:
+                layer = intern_table.FIELD_NAMES.intern(layer)
+            layer_dicts.append((layer, layer_dict))
     # Add all leftovers
-    for name, layer in pkt_dict['layers'].items():
-        layers.append(EkLayer(name, layer))
+    layer_dicts.extend(layers_dict.items())
+    return frame_dict, layer_dicts
 
-    return Packet(layers=layers, frame_info=EkLayer('frame', frame_dict),
-                  number=int(frame_dict.get('frame_frame_number', 0)),
-                  length=int(frame_dict['frame_frame_len']),
-                  sniff_time=frame_dict['frame_frame_time_epoch'],
-                  interface_captured=frame_dict.get('rame_frame_interface_id'))
+
+def lazy_packet_from_ek_packet(json_pkt, cast_fields=False, intern_strings=False, intern_values=False,
+                               layer_cache=None):
+    """Creates a LazyPacket from a tshark EK single packet, which is only decoded when its layers are accessed.
+
+    Takes the same arguments as packet_from_ek_packet.
+    """
+    metadata = scan_frame_metadata(json_pkt, _FRAME_METADATA_REGEX)
+    if metadata is None:
+        return packet_from_ek_packet(json_pkt, cast_fields=cast_fields, intern_strings=intern_strings,
+                                     intern_values=intern_values, layer_cache=layer_cache)
+    frame_protocols = metadata[b"protocols"].decode()
+    if intern_strings:
+        frame_protocols = intern_table.FIELD_NAMES.intern(frame_protocols)
+    decode_packet = functools.partial(packet_from_ek_packet, cast_fields=cast_fields, intern_strings=intern_strings,
+                                      intern_values=intern_values, layer_cache=layer_cache)
+    return LazyPacket(json_pkt, decode_packet, frame_protocols=frame_protocols, number=int(metadata[b"number"]),
+                      length=int(metadata[b"len"]), sniff_time=metadata[b"time_epoch"].decode())
+
+
+def _make_ek_layer(layer_name, layer_dict, cast_fields):
+    if cast_fields:
+        layer_dict, cast_fields = _cast_layer_fields(layer_name, layer_dict)
+    return EkLayer(layer_name, layer_dict, fields_casted=cast_fields)
+
+
+def _cast_layer_fields(layer_name, layer_dict):
+    """Casts the layer dict according to the field mapping.
+
+    :return: A tuple of (layer_dict, casted). Layers of protocols which are not in the mapping (i.e. when only a
+    partial mapping was loaded) are returned as-is.
+    """
+    try:
+        return ek_field_mapping.MAPPING.cast_layer_fields(layer_name, layer_dict), True
+    except ek_field_mapping.FieldNotFound:
+        return layer_dict, False
@@ -1,9 +1,13 @@
+import functools
 import json
 import os
+import re
 
 from packaging import version
 
+from pyshark.packet import intern_table
 from pyshark.packet.layers.json_layer import JsonLayer
+from pyshark.packet.lazy_packet import LazyPacket, scan_frame_metadata
 from pyshark.packet.packet import Packet
 from pyshark.tshark.output_parser.base_parser import BaseTsharkOutputParser
 from pyshark.tshark import tshark
@@ -14,16 +18,38 @@ try:
 except ImportError:
     USE_UJSON = False
 
+_FRAME_METADATA_REGEX = re.compile(rb'"frame\.(number|len|time_epoch|protocols)":\s*"([^"]*)"')
+
 
 class TsharkJsonParser(BaseTsharkOutputParser):
+    OUTPUT_FORMAT = "json"
 
-    def __init__(self, tshark_version=None):
+    def __init__(self, tshark_version=None, intern_strings=False, intern_values=False, lazy=False, as_dicts=False,
+                 layer_cache=None):
+        """
+        :param as_dicts: Returns every packet as a dict of layer dicts (see dict_from_json_packet) instead of a Packet.
+        :param layer_cache: A LayerCache to share identical layers between packets through.
+        """
         super().__init__()
         self._tshark_version = tshark_version
+        self._intern_strings = intern_strings
+        self._intern_values = intern_values
+        self._lazy = lazy
+        self._as_dicts = as_dicts
+        self._layer_cache = layer_cache
 
     def _parse_single_packet(self, packet):
         json_has_duplicate_keys = tshark.tshark_supports_duplicate_keys(self._tshark_version)
-        return packet_from_json_packet(packet, deduplicate_fields=json_has_duplicate_keys)
+        if self._as_dicts:
+            return dict_from_json_packet(packet, deduplicate_fields=json_has_duplicate_keys,
+                                         intern_strings=self._intern_strings, intern_values=self._intern_values)
+        if self._lazy:
+            return lazy_packet_from_json_packet(packet, deduplicate_fields=json_has_duplicate_keys,
+                                                intern_strings=self._intern_strings, intern_values=self._intern_values,
+                                                layer_cache=self._layer_cache)
+        return packet_from_json_packet(packet, deduplicate_fields=json_has_duplicate_keys,
+                                       intern_strings=self._intern_strings, intern_values=self._intern_values,
+                                       layer_cache=self._layer_cache)
 
     def _extract_packet_from_data(self, data, got_first_packet=True):
         """Returns a packet's data and any remaining data after reading that first packet"""
@@ -79,12 +105,46 @@ def duplicate_object_hook(ordered_pairs):
     return json_dict
 
 
-def packet_from_json_packet(json_pkt, deduplicate_fields=True):
+def packet_from_json_packet(json_pkt, deduplicate_fields=True, intern_strings=False, intern_values=False,
+                            layer_cache=None):
     """Creates a Pyshark Packet from a tshark json single packet.
 
     Before tshark 2.6, there could be duplicate keys in a packet json, which creates the need for
     deduplication and slows it down significantly.
+
+    :param intern_strings: Whether to intern the field and layer names through the shared intern table.
+    :param intern_values: When interning strings, whether to intern short string values as well.
+    :param layer_cache: A LayerCache to get the layers from, so that identical layers are shared between packets.
+    The frame layer is never shared.
+    """
+    frame_dict, layer_dicts = _layer_dicts_from_json_packet(json_pkt, deduplicate_fields=deduplicate_fields,
+                                                            intern_strings=intern_strings, intern_values=intern_values)
+    if layer_cache is None:
+        layers = [JsonLayer(name, layer_dict) for name, layer_dict in layer_dicts]
+    else:
+        layers = [layer_cache.get_layer(name, layer_dict, JsonLayer) for name, layer_dict in layer_dicts]
+    return Packet(layers=layers, frame_info=JsonLayer('frame', frame_dict),
+                  number=int(frame_dict.get('frame.number', 0)),
+                  length=int(frame_dict['frame.len']),
+                  sniff_time=frame_dict['frame.time_epoch'],
+                  interface_captured=frame_dict.get('frame.interface_id'))
+
+
+def dict_from_json_packet(json_pkt, deduplicate_fields=True, intern_strings=False, intern_values=False) -> dict:
+    """Decodes a tshark json single packet into a dict of {layer_name: layer_dict}, without creating a Packet.
+
+    The frame comes first, followed by the layers in the order of the protocols in the frame.
+    Takes the same arguments as packet_from_json_packet.
     """
+    frame_dict, layer_dicts = _layer_dicts_from_json_packet(json_pkt, deduplicate_fields=deduplicate_fields,
+                                                            intern_strings=intern_strings, intern_values=intern_values)
+    packet_dict = {'frame': frame_dict}
+    packet_dict.update(layer_dicts)
+    return packet_dict
+
+
+def _layer_dicts_from_json_packet(json_pkt, deduplicate_fields=True, intern_strings=False, intern_values=False):
+    """Decodes a tshark json single packet into its frame dict and a list of (layer_name, layer_dict)."""
     if deduplicate_fields:
         # NOTE: We can use ujson here for ~25% speed-up, however since we can't use hooks in ujson
         # we lose the ability to view duplicates. This might still be a good option later on.
@@ -94,19 +154,42 @@ def packet_from_json_packet(json_pkt, deduplicate_fields=True):
             pkt_dict = ujson.loads(json_pkt)
         else:
             pkt_dict = json.loads(json_pkt.decode('utf-8'))
+    layers_dict = pkt_dict['_source']['layers']
+    if intern_strings:
+        layers_dict = intern_table.intern_json_dict(layers_dict, intern_values=intern_values)
     # We use the frame dict here and not the object access because it's faster.
-    frame_dict = pkt_dict['_source']['layers'].pop('frame')
-    layers = []
+    frame_dict = layers_dict.pop('frame')
+    if intern_strings:
+        # The protocol stacks repeat just like the names
+        frame_dict['frame.protocols'] = intern_table.FIELD_NAMES.intern(frame_dict['frame.protocols'])
+    layer_dicts = []
     for layer in frame_dict['frame.protocols'].split(':'):
-        layer_dict = pkt_dict['_source']['layers'].pop(layer, None)
+        layer_dict = layers_dict.pop(layer, None)
         if layer_dict is not None:
-            layers.append(JsonLayer(layer, layer_dict))
+            if intern_strings:
+                layer = intern_table.FIELD_NAMES.intern(layer)
+            layer_dicts.append((layer, layer_dict))
     # Add all leftovers
-    for name, layer in pkt_dict['_source']['layers'].items():
-        layers.append(JsonLayer(name, layer))
+    layer_dicts.extend(layers_dict.items())
+    return frame_dict, layer_dicts
 
-    return Packet(layers=layers, frame_info=JsonLayer('frame', frame_dict),
-                  number=int(frame_dict.get('frame.number', 0)),
-                  length=int(frame_dict['frame.len']),
-                  sniff_time=frame_dict['frame.time_epoch'],
-                  interface_captured=frame_dict.get('frame.interface_id'))
+
+def lazy_packet_from_json_packet(json_pkt, deduplicate_fields=True, intern_strings=False, intern_values=False,
+                                 layer_cache=None):
+    """Creates a LazyPacket from a tshark json single packet, which is only decoded when its layers are accessed.
+
+    Takes the same arguments as packet_from_json_packet.
+    """
+    metadata = scan_frame_metadata(json_pkt, _FRAME_METADATA_REGEX)
+    if metadata is None:
+        return packet_from_json_packet(json_pkt, deduplicate_fields=deduplicate_fields,
+                                       intern_strings=intern_strings, intern_values=intern_values,
+                                       layer_cache=layer_cache)
+    frame_protocols = metadata[b"protocols"].decode()
+    if intern_strings:
+        frame_protocols = intern_table.FIELD_NAMES.intern(frame_protocols)
+    decode_packet = functools.partial(packet_from_json_packet, deduplicate_fields=deduplicate_fields,
+                                      intern_strings=intern_strings, intern_values=intern_values,
+                                      layer_cache=layer_cache)
+    return LazyPacket(json_pkt, decode_packet, frame_protocols=frame_protocols, number=int(metadata[b"number"]),
+                      length=int(metadata[b"len"]), sniff_time=metadata[b"time_epoch"].decode())
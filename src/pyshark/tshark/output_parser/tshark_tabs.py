@@ -0,0 +1,153 @@
+"""This module contains functions to turn TShark tab-separated summaries (-T tabs) into summary rows."""
+import collections
+import functools
+import re
+import time
+
+from pyshark.tshark.output_parser.base_parser import BaseTsharkOutputParser
+
+# The column formats of the default columns, by their titles.
+SUMMARY_COLUMN_FORMATS = collections.OrderedDict([
+    ("No.", "%m"),
+    ("Time", "%t"),
+    ("Source", "%s"),
+    ("Destination", "%d"),
+    ("Protocol", "%p"),
+    ("Length", "%L"),
+    ("Info", "%i"),
+])
+
+# tshark puts an arrow column between adjacent source and destination columns.
+_ARROWS = ("→", "->")
+_NON_IDENTIFIER_REGEX = re.compile(r"\W+")
+
+
+def get_summary_columns(columns):
+    """Gets the (title, column format) of each of the given summary columns.
+
+    :param columns: A dict of {title: column format}, or a list whose items are either default column titles (see
+    SUMMARY_COLUMN_FORMATS), field names (i.e. "ip.ttl"), or (title, column format) tuples.
+    """
+    if isinstance(columns, dict):
+        return list(columns.items())
+    summary_columns = []
+    for column in columns:
+        if isinstance(column, tuple):
+            summary_columns.append(column)
+        elif column in SUMMARY_COLUMN_FORMATS:
+            summary_columns.append((column, SUMMARY_COLUMN_FORMATS[column]))
+        else:
+            # All occurrences of the field
+            summary_columns.append((column, f"%Cus:{column}:0:R"))
+    return summary_columns
+
+
+def get_column_format_preference(summary_columns):
+    """Returns the value of the gui.column.format preference which sets the given (title, column format) columns."""
+    return ",".join(f'"{title}","{column_format}"' for title, column_format in summary_columns)
+
+
+def summary_row_type(titles):
+    """Creates a named tuple type for rows with the given column titles.
+
+    The names of the fields are the titles in lowercase, with anything other than letters and digits replaced by
+    underscores (i.e. "No." -> "no", "ip.ttl" -> "ip_ttl").
+    """
+    return _summary_row_type(tuple(_NON_IDENTIFIER_REGEX.sub("_", title).strip("_").lower() for title in titles))
+
+
+@functools.lru_cache(maxsize=None)
+def _summary_row_type(names):
+    row_type = collections.namedtuple("SummaryRow", names, rename=True)
+    # The type is created on the fly, so rows are pickled (i.e. by packet stores) by their names and values.
+    row_type.__reduce__ = lambda row: (_unpickle_summary_row, (names, tuple(row)))
+    return row_type
+
+
+def _unpickle_summary_row(names, values):
+    return _summary_row_type(names)(*values)
+
+
+class TsharkTabsParser(BaseTsharkOutputParser):
+    """Parses the output of tshark -T tabs to a summary row per packet.
+
+    Reads the output in batches and parses all the complete lines of each batch at once.
+    """
+    OUTPUT_FORMAT = "tabs"
+
+    def __init__(self, summary_columns):
+        """
+        :param summary_columns: The (title, column format) of every column tshark outputs.
+        """
+        super().__init__()
+        self.row_type = summary_row_type([title for title, _ in summary_columns])
+        self._rows = collections.deque()
+
+    async def get_packets_from_stream(self, stream, existing_data, got_first_packet=True):
+        if self._rows:
+            return self._pop_row(), existing_data
+
+        new_data = await self._read_stream(stream)
+        existing_data += new_data
+        if not new_data:
+            if not existing_data.strip():
+                raise EOFError()
+            # The last line may have no newline
+            existing_data += b"\n"
+
+        lines_end = existing_data.rfind(b"\n")
+        if lines_end == -1:
+            return None, existing_data
+        self._rows.extend(self._parse_lines(existing_data[:lines_end]))
+        existing_data = existing_data[lines_end + 1:]
+        if self._rows:
+            return self._pop_row(), existing_data
+        return None, existing_data
+
+    def _pop_row(self):
+        if self.metrics is not None:
+            self.metrics.set_gauge("queued_packets", len(self._rows) - 1)
+        return self._rows.popleft()
+
+    def _parse_lines(self, data):
+        row_type = self.row_type
+        metrics = self.metrics
+        if metrics is not None:
+            start_time = time.perf_counter()
+        rows = [summary_row_from_line(line, row_type) for line in data.decode("utf-8", "replace").split("\n")
+                if line.strip()]
+        if metrics is not None:
+            # Lines are framed and parsed in a single step, which is timed as parsing.
+            metrics.add_time("parsing", time.perf_counter() - start_time)
+            metrics.count("packets_framed", len(rows))
+            metrics.count("packets_parsed", len(rows))
+        return rows
+
+
+def summary_row_from_line(line, row_type):
+    """Parses a single line of tshark -T tabs output to a row of the given type (see summary_row_type)."""
+    column_count = len(row_type._fields)
+    values = [value.strip() for value in line.rstrip("\r\n").split("\t")]
+    if len(values) > column_count:
+        values = _remove_arrows(values, column_count)
+    return row_type(*_fit_values(values, column_count))
+
+
+def _remove_arrows(values, column_count):
+    extra_values = len(values) - column_count
+    new_values = []
+    for value in values:
+        if extra_values and value in _ARROWS:
+            extra_values -= 1
+            continue
+        new_values.append(value)
+    return new_values
+
+
+def _fit_values(values, column_count):
+    if len(values) < column_count:
+        return values + [""] * (column_count - len(values))
+    if len(values) > column_count:
+        # Tabs in the last column (usually Info)
+        return values[:column_count - 1] + ["\t".join(values[column_count - 1:])]
+    return values
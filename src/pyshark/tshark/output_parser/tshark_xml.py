@@ -16,9 +16,10 @@ DEL_BAD_XML_CHARS.update({bad_char: None for bad_char in range(0xfffe, 0x10000)}
 class TsharkXmlParser(BaseTsharkOutputParser):
     SUMMARIES_BATCH_SIZE = 64
 
-    def __init__(self, parse_summaries=False):
+    def __init__(self, parse_summaries=False, intern_values=False):
         super().__init__()
         self._parse_summaries = parse_summaries
+        self._intern_values = intern_values
         self._psml_structure = None
 
     async def get_packets_from_stream(self, stream, existing_data, got_first_packet=True):
@@ -26,8 +27,12 @@ class TsharkXmlParser(BaseTsharkOutputParser):
             existing_data = await self._get_psml_struct(stream)
         return await super().get_packets_from_stream(stream, existing_data, got_first_packet=got_first_packet)
 
+    @property
+    def output_format(self) -> str:
+        return "psml" if self._parse_summaries else "pdml"
+
     def _parse_single_packet(self, packet):
-        return packet_from_xml_packet(packet, psml_structure=self._psml_structure)
+        return packet_from_xml_packet(packet, psml_structure=self._psml_structure, intern_values=self._intern_values)
 
     def _extract_packet_from_data(self, data, got_first_packet=True):
         """Gets data containing a (part of) tshark xml.
@@ -51,7 +56,7 @@ class TsharkXmlParser(BaseTsharkOutputParser):
 
         # If summaries are read, we need the psdml structure which appears on top of the file.
         while not psml_struct:
-            new_data = await fd.read(self.SUMMARIES_BATCH_SIZE)
+            new_data = await self._read_stream(fd, self.SUMMARIES_BATCH_SIZE)
             initial_data += new_data
             psml_struct, initial_data = _extract_tag_from_xml_data(initial_data, b"structure")
             if psml_struct:
@@ -67,13 +72,15 @@ def psml_structure_from_xml(psml_structure):
     return psml_structure.findall('section')
 
 
-def packet_from_xml_packet(xml_pkt, psml_structure=None):
+def packet_from_xml_packet(xml_pkt, psml_structure=None, intern_values=False):
     """
     Gets a TShark XML packet object or string, and returns a pyshark Packet objec.t
 
     :param xml_pkt: str or xml object.
     :param psml_structure: a list of the fields in each packet summary in the psml data. If given, packets will
     be returned as a PacketSummary object.
+    :param intern_values: Whether to intern short field values through the shared intern table (field names
+    are always interned).
     :return: Packet object.
     """
     if not isinstance(xml_pkt, lxml.objectify.ObjectifiedElement):
@@ -82,15 +89,15 @@ def packet_from_xml_packet(xml_pkt, psml_structure=None):
         xml_pkt = lxml.objectify.fromstring(xml_pkt.encode('utf-8'), parser)
     if psml_structure:
         return _packet_from_psml_packet(xml_pkt, psml_structure)
-    return _packet_from_pdml_packet(xml_pkt)
+    return _packet_from_pdml_packet(xml_pkt, intern_values=intern_values)
 
 
 def _packet_from_psml_packet(psml_packet, structure):
     return PacketSummary(structure, psml_packet.findall('section'))
 
 
-def _packet_from_pdml_packet(pdml_packet):
-    layers = [XmlLayer(proto) for proto in pdml_packet.proto]
+def _packet_from_pdml_packet(pdml_packet, intern_values=False):
+    layers = [XmlLayer(proto, intern_values=intern_values) for proto in pdml_packet.proto]
     geninfo, frame, layers = layers[0], layers[1], layers[2:]
     return Packet(layers=layers, frame_info=frame, number=geninfo.get_field_value('num'),
                   length=geninfo.get_field_value('len'), sniff_time=geninfo.get_field_value('timestamp', raw=True),
@@ -0,0 +1,278 @@
+"""Runs tshark statistics taps (-z) on a capture and parses their output.
+
+Taps aggregate the whole capture inside tshark, without creating objects for any packet, so they are much faster
+than computing the same statistics in Python.
+"""
+import asyncio
+import collections
+import re
+import typing
+
+Conversation = collections.namedtuple("Conversation", [
+    "address_a", "address_b", "frames_to_a", "bytes_to_a", "frames_from_a", "bytes_from_a", "frames", "bytes",
+    "relative_start", "duration"])
+Endpoint = collections.namedtuple("Endpoint", [
+    "address", "port", "packets", "bytes", "tx_packets", "tx_bytes", "rx_packets", "rx_bytes"])
+IoStatistics = collections.namedtuple("IoStatistics", ["duration", "interval", "columns", "intervals"])
+IoInterval = collections.namedtuple("IoInterval", ["start", "end", "values"])
+ProtocolHierarchyEntry = collections.namedtuple("ProtocolHierarchyEntry", ["protocol", "path", "frames", "bytes"])
+ExpertInfo = collections.namedtuple("ExpertInfo", ["severity", "frequency", "group", "protocol", "summary"])
+
+SUPPORTED_TAPS = ("conv", "endpoints", "io,stat", "phs", "expert")
+
+# The titles tshark gives conversation and endpoint tables, by the type in the tap.
+_TYPE_TITLES = {"eth": "ethernet", "ip": "ipv4", "ipv6": "ipv6", "tcp": "tcp", "udp": "udp", "sctp": "sctp",
+                "wlan": "ieee 802.11", "fc": "fibre channel", "fddi": "fddi", "ipx": "ipx", "tr": "token ring",
+                "usb": "usb", "bluetooth": "bluetooth", "dccp": "dccp", "ncp": "ncp", "rsvp": "rsvp"}
+_SIZE_UNITS = {None: 1, "bytes": 1, "B": 1, "kB": 10 ** 3, "MB": 10 ** 6, "GB": 10 ** 9, "TB": 10 ** 12,
+               "KiB": 2 ** 10, "MiB": 2 ** 20, "GiB": 2 ** 30, "TiB": 2 ** 40}
+
+_VALUE_REGEX = re.compile(r"(-?\d[\d,]*(?:\.\d+)?)(?:\s+(bytes|B|[kMGT]B|[KMGT]iB)\b)?")
+_SEPARATOR_REGEX = re.compile(r"^={20,}$")
+_CONVERSATION_REGEX = re.compile(r"^(\S+)\s+<->\s+(\S+)\s+(.*)$")
+_PHS_REGEX = re.compile(r"^( *)(\S+)\s+frames:(\d+)\s+bytes:(\d+)")
+_EXPERT_SECTION_REGEX = re.compile(r"^(Errors|Warnings|Notes|Chats|Comments) \(\d+\)$")
+_EXPERT_REGEX = re.compile(r"^\s*(\d+)\s+(Request Code|Response Code|\S+)\s+(\S+)\s+(.*)$")
+_IO_INTERVAL_REGEX = re.compile(r"^\s*([\d.]+)\s*(?:<>|-)\s*([\d.]+|Dur)\s*$")
+_IO_DURATION_REGEX = re.compile(r"Duration:\s*([\d.]+)")
+_IO_INTERVAL_LENGTH_REGEX = re.compile(r"Interval:\s*([\d.]+)")
+
+
+class UnsupportedTapException(Exception):
+    pass
+
+
+class TsharkStats:
+    """Runs statistics taps on a capture, in a single tshark pass, and returns their results as typed tables.
+
+    Supported taps (as given to tshark's -z) and the results returned for them:
+      conv,<type>[,<filter>] - a list of Conversation
+      endpoints,<type>[,<filter>] - a list of Endpoint
+      io,stat,<interval>[,<filters>...] - IoStatistics, with an IoInterval per interval
+      phs[,<filter>] - a list of ProtocolHierarchyEntry, in the order tshark prints them
+      expert[,<level>][,<filter>] - a list of ExpertInfo
+
+    Works with FileCapture, LiveCapture and PipeCapture. The capture's display filter applies, but filter
+    expressions which partly run in Python only have their display filter part applied.
+    """
+
+    def __init__(self, capture):
+        self.capture = capture
+
+    def run(self, taps, packet_count=None, duration=None, timeout=None) -> typing.Dict[str, typing.Any]:
+        """Runs the given taps and returns a dict of {tap: result}.
+
+        :param taps: A list of taps, i.e. ["conv,tcp", "io,stat,1"].
+        :param packet_count: If given, stops after this amount of packets.
+        :param duration: If given, stops after this amount of seconds (for live captures, which otherwise only stop
+        when packet_count is reached).
+        :param timeout: If given, raises a timeout error if not complete before the timeout (in seconds).
+        """
+        coro = self.run_async(taps, packet_count=packet_count, duration=duration)
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+        return self.capture.eventloop.run_until_complete(coro)
+
+    async def run_async(self, taps, packet_count=None, duration=None) -> typing.Dict[str, typing.Any]:
+        """A coroutine which runs the given taps. See run()."""
+        for tap in taps:
+            if not any(tap == prefix or tap.startswith(prefix + ",") for prefix in SUPPORTED_TAPS):
+                raise UnsupportedTapException(f"Unsupported tap {tap}, must be one of {', '.join(SUPPORTED_TAPS)}")
+        parameters = ["-q"]
+        for tap in taps:
+            parameters += ["-z", tap]
+        if duration is not None:
+            parameters += ["-a", f"duration:{duration}"]
+
+        tshark_process = await self.capture._get_tshark_process(packet_count=packet_count,
+                                                                extra_parameters=parameters)
+        try:
+            output = await tshark_process.stdout.read()
+            await tshark_process.wait()
+        finally:
+            await self.capture.close_async()
+        return parse_stats(output.decode("utf-8", "replace"), taps)
+
+
+def parse_stats(output, taps) -> typing.Dict[str, typing.Any]:
+    """Parses the output of tshark -q with the given taps to a dict of {tap: result}.
+
+    Taps with no output have a result of None, except for expert, which has an empty list.
+    """
+    blocks = _split_blocks(output.splitlines())
+    results = {}
+    for tap in taps:
+        tap_parts = tap.split(",")
+        kind = tap_parts[0]
+        title = None
+        if kind in ("conv", "endpoints") and len(tap_parts) > 1:
+            title = _TYPE_TITLES.get(tap_parts[1], tap_parts[1])
+        for i, (block_kind, block_title, block_lines) in enumerate(blocks):
+            if block_kind == kind and (title is None or block_title.lower() == title):
+                results[tap] = _BLOCK_PARSERS[kind](block_lines)
+                del blocks[i]
+                break
+        else:
+            results[tap] = [] if kind == "expert" else None
+    return results
+
+
+def _split_blocks(lines):
+    """Splits tshark's statistics output to a list of (tap kind, title, lines) per tap."""
+    blocks = []
+    i = 0
+    while i < len(lines):
+        line = lines[i].rstrip()
+        if _EXPERT_SECTION_REGEX.match(line):
+            # All the expert sections belong to a single tap.
+            end = i + 1
+            while end < len(lines) and not _is_separator(lines[end], lines[end - 1]):
+                end += 1
+            blocks.append(("expert", "", lines[i:end]))
+            i = end
+        elif _SEPARATOR_REGEX.match(line):
+            end = i + 1
+            while end < len(lines) and not _SEPARATOR_REGEX.match(lines[end].strip()):
+                end += 1
+            block_lines = lines[i + 1:end]
+            title = next((block_line.strip("| ") for block_line in block_lines if block_line.strip("| ")), "")
+            blocks.append(_get_block_kind(title) + (block_lines,))
+            i = end + 1
+        else:
+            i += 1
+    return blocks
+
+
+def _is_separator(line, previous_line):
+    # Expert section titles are underlined, which isn't a separator
+    return _SEPARATOR_REGEX.match(line.strip()) is not None and not _EXPERT_SECTION_REGEX.match(previous_line.rstrip())
+
+
+def _get_block_kind(title):
+    if title.endswith(" Conversations"):
+        return "conv", title[:-len(" Conversations")]
+    if title.endswith(" Endpoints"):
+        return "endpoints", title[:-len(" Endpoints")]
+    if title == "IO Statistics":
+        return "io", ""
+    if title == "Protocol Hierarchy Statistics":
+        return "phs", ""
+    return None, title
+
+
+def _parse_values(text):
+    """Parses the numbers in a line of a table (with their size units, if any) to ints and floats."""
+    values = []
+    for match in _VALUE_REGEX.finditer(text):
+        number = match.group(1).replace(",", "")
+        multiplier = _SIZE_UNITS[match.group(2)]
+        if "." in number:
+            value = float(number) * multiplier
+            values.append(int(value) if match.group(2) else value)
+        else:
+            values.append(int(number) * multiplier)
+    return values
+
+
+def _parse_conversations(lines):
+    conversations = []
+    for line in lines:
+        match = _CONVERSATION_REGEX.match(line.strip())
+        if match is None:
+            continue
+        values = _parse_values(match.group(3))
+        if len(values) < 8:
+            continue
+        conversations.append(Conversation(match.group(1), match.group(2), *values[:6], float(values[6]),
+                                          float(values[7])))
+    return conversations
+
+
+def _parse_endpoints(lines):
+    endpoints = []
+    has_port = False
+    for line in lines:
+        if "|" in line:
+            has_port = has_port or "Port" in line
+            continue
+        parts = line.split(None, 1)
+        if len(parts) < 2:
+            continue
+        values = _parse_values(parts[1])
+        value_count = 7 if has_port else 6
+        if len(values) < value_count:
+            continue
+        port = values.pop(0) if has_port else None
+        endpoints.append(Endpoint(parts[0], port, *values[:6]))
+    return endpoints
+
+
+def _parse_io_statistics(lines):
+    duration = interval = None
+    columns = []
+    intervals = []
+    for line in lines:
+        cells = [cell.strip() for cell in line.strip().strip("|").split("|")]
+        if not columns:
+            match = _IO_DURATION_REGEX.search(line)
+            if match:
+                duration = float(match.group(1))
+            match = _IO_INTERVAL_LENGTH_REGEX.search(line)
+            if match:
+                interval = float(match.group(1))
+            if cells[0] == "Interval":
+                columns = [cell.lower() for cell in cells[1:] if cell]
+                if len(set(columns)) != len(columns):
+                    # Several columns (one per filter) have the same names, so number them.
+                    names_per_column = len(columns) // max(columns.count(columns[0]), 1)
+                    columns = [f"{name}_{i // names_per_column + 1}" for i, name in enumerate(columns)]
+            continue
+        match = _IO_INTERVAL_REGEX.match(cells[0])
+        if match is None:
+            continue
+        start = float(match.group(1))
+        end = duration if match.group(2) == "Dur" else float(match.group(2))
+        values = tuple(_parse_values(" ".join(cells[1:])))
+        intervals.append(IoInterval(start, end, values))
+    return IoStatistics(duration, interval, columns, intervals)
+
+
+def _parse_protocol_hierarchy(lines):
+    entries = []
+    path = []
+    for line in lines:
+        match = _PHS_REGEX.match(line)
+        if match is None:
+            continue
+        depth = len(match.group(1)) // 2
+        del path[depth:]
+        path.append(match.group(2))
+        entries.append(ProtocolHierarchyEntry(match.group(2), ":".join(path), int(match.group(3)),
+                                              int(match.group(4))))
+    return entries
+
+
+def _parse_expert_info(lines):
+    infos = []
+    severity = None
+    for line in lines:
+        section_match = _EXPERT_SECTION_REGEX.match(line.rstrip())
+        if section_match:
+            # i.e. "Warnings" -> "warning"
+            severity = section_match.group(1)[:-1].lower()
+            continue
+        match = _EXPERT_REGEX.match(line)
+        if match is None or severity is None:
+            continue
+        infos.append(ExpertInfo(severity, int(match.group(1)), match.group(2), match.group(3),
+                                match.group(4).strip()))
+    return infos
+
+
+_BLOCK_PARSERS = {
+    "conv": _parse_conversations,
+    "endpoints": _parse_endpoints,
+    "io": _parse_io_statistics,
+    "phs": _parse_protocol_hierarchy,
+    "expert": _parse_expert_info,
+}
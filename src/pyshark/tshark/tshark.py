@@ -120,6 +120,13 @@ def get_tshark_interfaces(tshark_path=None):
     return [line.split(" ")[1] for line in tshark_interfaces.splitlines() if '\\\\.\\' not in line]
 
 
+def bpf_filter_compiles(bpf_filter, interface, tshark_path=None) -> bool:
+    """Checks whether dumpcap can compile the given BPF filter for the link type of the interface."""
+    parameters = [get_process_path(tshark_path, process_name="dumpcap"), "-d", "-f", bpf_filter, "-i", interface]
+    with open(os.devnull, "w") as null:
+        return subprocess.run(parameters, stdout=null, stderr=null).returncode == 0
+
+
 def get_all_tshark_interfaces_names(tshark_path=None):
     """Returns a list of all possible interface names. Some interfaces may have aliases"""
     parameters = [get_process_path(tshark_path), "-D"]
@@ -134,8 +141,14 @@ def get_all_tshark_interfaces_names(tshark_path=None):
     return all_interface_names
 
 
-def get_ek_field_mapping(tshark_path=None):
+def get_ek_field_mapping(tshark_path=None, protocols=None):
+    """Gets the elastic mapping of all EK fields from tshark.
+
+    :param protocols: If given, only the mapping of these protocols is generated.
+    """
     parameters = [get_process_path(tshark_path), "-G", "elastic-mapping"]
+    if protocols:
+        parameters += ["--elastic-mapping-filter", ",".join(protocols)]
     with open(os.devnull, "w") as null:
         mapping = subprocess.check_output(parameters, stderr=null).decode("ascii")
 
@@ -1,4 +1,11 @@
-from pyshark.capture.capture import Capture
+from unittest import mock
+
+import pytest
+
+from pyshark.capture.capture import Capture, DictsMustUseJsonException, PythonFilterNotSupportedException
+from pyshark.filters import F, Predicate
+from pyshark.tshark.output_parser import tshark_json
+from pyshark.tshark.output_parser import tshark_tabs
 
 
 def test_capture_gets_decoding_parameters():
@@ -70,3 +77,64 @@ def test_capture_gets_encryption_and_override_perfs():
         assert set(actual_parameter_options) == set(expected_results)
         assert len(actual_parameter_options) == len(expected_results)
 
+
+
+def test_iter_dicts_requires_json():
+    with pytest.raises(DictsMustUseJsonException):
+        Capture().iter_dicts()
+
+
+def test_capture_splits_filter_expression():
+    c = Capture(display_filter=(F("tcp.port") == 80) & Predicate(lambda pkt: False))
+    assert c._display_filter == "tcp.port == 80"
+    assert isinstance(c._python_filter, Predicate)
+
+
+def test_capture_with_python_filter_does_not_limit_tshark_packet_count():
+    c = Capture(display_filter=Predicate(lambda pkt: False))
+    assert "-c" not in c.get_parameters(packet_count=10)
+
+
+def test_capture_filters_packets_in_python(data_directory):
+    packets = [tshark_json.packet_from_json_packet(data_directory.joinpath("packet.json").read_bytes())
+               for _ in range(4)]
+    for number, packet in enumerate(packets):
+        packet.number = number
+    c = Capture(display_filter=Predicate(lambda pkt: pkt.number % 2 == 1))
+    parser = mock.Mock()
+    parser.get_packets_from_stream = mock.AsyncMock(side_effect=[(packet, b"") for packet in packets] + [EOFError()])
+    kept = []
+    with mock.patch.object(c, "_setup_tshark_output_parser", return_value=parser):
+        c.eventloop.run_until_complete(c._go_through_packets_from_fd(None, kept.append))
+    assert kept == [packets[1], packets[3]]
+
+
+def test_capture_with_summary_columns_uses_tabs_parser():
+    c = Capture(summary_columns=["No.", "ip.ttl"])
+    parser = c._setup_tshark_output_parser()
+    assert isinstance(parser, tshark_tabs.TsharkTabsParser)
+    assert parser.row_type._fields == ("no", "ip_ttl")
+
+
+def test_capture_with_summary_columns_runs_tshark_with_column_format():
+    c = Capture(summary_columns={"No.": "%m", "TTL": "%Cus:ip.ttl"})
+    with mock.patch.object(c, "_get_tshark_path", return_value="tshark"), \
+            mock.patch("asyncio.create_subprocess_exec", mock.AsyncMock()) as create_subprocess_exec, \
+            mock.patch.object(c, "_create_stderr_handling_task"), mock.patch.object(c, "_created_new_process"):
+        c.eventloop.run_until_complete(c._get_tshark_process())
+    parameters = list(create_subprocess_exec.call_args[0])
+    assert parameters[parameters.index("-T") + 1] == "tabs"
+    assert 'gui.column.format:"No.","%m","TTL","%Cus:ip.ttl"' in parameters
+
+
+def test_summary_columns_do_not_support_python_filter():
+    with pytest.raises(PythonFilterNotSupportedException):
+        Capture(display_filter=Predicate(lambda pkt: True), summary_columns=["No."])
+
+
+def test_capture_closes_packet_store_when_exiting():
+    store = mock.Mock()
+    with Capture(packet_store=store) as capture:
+        capture.close()
+        store.close.assert_not_called()
+    store.close.assert_called_once_with()
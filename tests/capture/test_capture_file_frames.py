@@ -0,0 +1,50 @@
+import struct
+
+import pytest
+
+from pyshark.capture.capture_file_frames import CaptureFileFrames, UnsupportedCaptureFileException
+
+
+def _write_pcap(path, frames, byte_order="<"):
+    data = struct.pack(byte_order + "IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 0xffff, 1)
+    for frame in frames:
+        data += struct.pack(byte_order + "IIII", 0, 0, len(frame), len(frame)) + frame
+    path.write_bytes(data)
+
+
+@pytest.mark.parametrize("byte_order", ["<", ">"])
+def test_gets_pcap_frames(tmp_path, byte_order):
+    pcap_path = tmp_path.joinpath("test.pcap")
+    _write_pcap(pcap_path, [b"\x01\x02\x03", b"", b"\x04" * 100], byte_order=byte_order)
+    frames = CaptureFileFrames(pcap_path)
+    assert frames.get_frame(3) == b"\x04" * 100
+    assert frames.get_frame(1) == b"\x01\x02\x03"
+    assert frames.get_frame(2) == b""
+    with pytest.raises(KeyError):
+        frames.get_frame(4)
+
+
+def test_gets_pcapng_frames(example_pcap_path):
+    frames = CaptureFileFrames(example_pcap_path)
+    first_frame = frames.get_frame(1)
+    assert isinstance(first_frame, memoryview)
+    assert len(first_frame) == 86
+    assert first_frame[12:14] == b"\x08\x00"
+    assert len(frames) == 1
+    frames.get_frame(24)
+    with pytest.raises(KeyError):
+        frames.get_frame(25)
+
+
+def test_frames_stay_valid_after_close(example_pcap_path):
+    frames = CaptureFileFrames(example_pcap_path)
+    frame = frames.get_frame(1)
+    frames.close()
+    assert frame[12:14] == b"\x08\x00"
+
+
+def test_unsupported_file(tmp_path):
+    gzip_path = tmp_path.joinpath("test.pcap.gz")
+    gzip_path.write_bytes(b"\x1f\x8b\x08\x00" + b"\x00" * 20)
+    with pytest.raises(UnsupportedCaptureFileException):
+        CaptureFileFrames(gzip_path)
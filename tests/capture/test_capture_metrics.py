@@ -0,0 +1,151 @@
+import asyncio
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+from pyshark.capture.capture import Capture, MetricsNotCollectedException
+from pyshark.capture import capture_metrics
+from pyshark.filters import Predicate
+from pyshark.packet.packet import Packet
+from pyshark.tshark.output_parser import tshark_tabs
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    async def read(self, size):
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+def test_metrics_are_not_collected_by_default():
+    with pytest.raises(MetricsNotCollectedException):
+        Capture().metrics()
+
+
+def test_gauges_keep_maximum():
+    metrics = capture_metrics.CaptureMetrics()
+    metrics.set_gauge("buffered_bytes", 10)
+    metrics.set_gauge("buffered_bytes", 4)
+    assert metrics.gauges["buffered_bytes"] == 4
+    assert metrics.gauges["max_buffered_bytes"] == 10
+
+
+def test_reset_metrics():
+    metrics = capture_metrics.CaptureMetrics()
+    metrics.count("packets_parsed", 3)
+    metrics.add_time("parsing", 1.5)
+    metrics.reset()
+    assert metrics.counters["packets_parsed"] == 0
+    assert metrics.timers["parsing"] == 0
+
+
+def test_export_metrics_as_json():
+    metrics = capture_metrics.CaptureMetrics()
+    metrics.count("bytes_read", 100)
+    exported = json.loads(metrics.to_json())
+    assert exported["counters"]["bytes_read"] == 100
+    assert exported["timers_seconds"]["callback"] == 0
+    assert exported["gauges"]["max_queued_packets"] == 0
+
+
+def test_export_metrics_as_prometheus():
+    metrics = capture_metrics.CaptureMetrics()
+    metrics.count("packets_parsed", 7)
+    metrics.add_time("parsing", 0.5)
+    lines = metrics.to_prometheus().splitlines()
+    assert "# TYPE pyshark_capture_packets_parsed_total counter" in lines
+    assert "pyshark_capture_packets_parsed_total 7" in lines
+    assert "pyshark_capture_parsing_seconds_total 0.5" in lines
+    assert "# TYPE pyshark_capture_max_buffered_bytes gauge" in lines
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="Requires /proc")
+def test_get_process_cpu_time():
+    assert capture_metrics.get_process_cpu_time(os.getpid()) >= 0
+
+
+@pytest.mark.skipif(capture_metrics.resource is None, reason="Requires the resource module")
+def test_capture_records_cpu_time_of_exited_process():
+    c = Capture(collect_metrics=True)
+    process = c.eventloop.run_until_complete(
+        asyncio.create_subprocess_exec(sys.executable, "-c", "sum(range(10 ** 6))"))
+    c._created_new_process([sys.executable], process)
+    c.eventloop.run_until_complete(process.wait())
+    c.eventloop.run_until_complete(c._cleanup_subprocess(process))
+    assert c.metrics().timers["process_cpu"] > 0
+
+
+def test_capture_collects_metrics_of_each_stage():
+    c = Capture(summary_columns=["No.", "Protocol"], collect_metrics=True)
+    stream = FakeStream([b"1\tTCP\n2\tUDP\n", b"3\tTCP\n"])
+    delivered = []
+    c.eventloop.run_until_complete(c._go_through_packets_from_fd(stream, delivered.append))
+    metrics = c.metrics()
+    assert len(delivered) == 3
+    assert metrics.counters["bytes_read"] == len(b"1\tTCP\n2\tUDP\n3\tTCP\n")
+    assert metrics.counters["reads"] == 3
+    assert metrics.counters["packets_parsed"] == 3
+    assert metrics.counters["packets_delivered"] == 3
+    assert metrics.gauges["max_queued_packets"] == 1
+    assert metrics.timers["parsing"] > 0
+    assert metrics.timers["callback"] > 0
+
+
+def test_capture_counts_filtered_out_packets():
+    packets = [Packet(number=number) for number in range(4)]
+    c = Capture(display_filter=Predicate(lambda pkt: pkt.number % 2 == 1), collect_metrics=True)
+    parser = mock.Mock()
+    parser.get_packets_from_stream = mock.AsyncMock(side_effect=[(packet, b"") for packet in packets] + [EOFError()])
+    with mock.patch.object(c, "_setup_tshark_output_parser", return_value=parser):
+        c.eventloop.run_until_complete(c._go_through_packets_from_fd(None, lambda pkt: None))
+    assert c.metrics().counters["packets_delivered"] == 2
+    assert c.metrics().counters["packets_filtered_out"] == 2
+
+
+def test_parser_counts_parse_errors():
+    parser = tshark_tabs.TsharkTabsParser([("No.", "%m")])
+    parser.metrics = capture_metrics.CaptureMetrics()
+    parser._parse_single_packet = mock.Mock(side_effect=ValueError)
+    with pytest.raises(ValueError):
+        parser._parse_single_packet_instrumented(b"1")
+    assert parser.metrics.counters["parse_errors"] == 1
+
+
+def test_latency_histogram_percentiles():
+    histogram = capture_metrics.LatencyHistogram()
+    for milliseconds in range(1, 1001):
+        histogram.record(milliseconds / 1000)
+    summary = histogram.summary()
+    assert summary.count == 1000
+    assert summary.min == 0.001
+    assert summary.max == 1
+    assert summary.mean == pytest.approx(0.5005)
+    # Values are kept at a precision of 1%
+    assert summary.p50 == pytest.approx(0.5, rel=0.01)
+    assert summary.p99 == pytest.approx(0.99, rel=0.01)
+    assert summary.p50 <= summary.p90 <= summary.p99 <= summary.p999 <= summary.max
+
+
+def test_latency_histogram_keeps_small_values_exactly():
+    histogram = capture_metrics.LatencyHistogram()
+    for microseconds in (3, 5, 7):
+        histogram.record(microseconds / 10 ** 6)
+    assert histogram.percentile(50) == 5 / 10 ** 6
+
+
+def test_latency_histogram_clamps_negative_latencies():
+    histogram = capture_metrics.LatencyHistogram()
+    histogram.record(-0.5)
+    assert histogram.summary().max == 0
+
+
+def test_empty_latency_histogram():
+    histogram = capture_metrics.LatencyHistogram()
+    assert histogram.summary() == capture_metrics.LatencySummary(0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    histogram.record(1)
+    histogram.reset()
+    assert len(histogram) == 0
@@ -0,0 +1,148 @@
+import tracemalloc
+from unittest import mock
+
+import pytest
+
+from pyshark.capture.capture import Capture, MetricsNotCollectedException
+from pyshark.capture.capture_profiler import CaptureProfiler, get_layer_name
+from pyshark.packet.packet import Packet
+from pyshark.tshark.output_parser import tshark_json, tshark_xml
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    async def read(self, size):
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+@pytest.fixture
+def packet_xml(data_directory):
+    return data_directory.joinpath("packet.xml").read_bytes()
+
+
+def parse_with_profiler(profiler, packet_data, count):
+    parser = tshark_xml.TsharkXmlParser()
+    parser.profiler = profiler
+    return [parser._parse_single_packet_instrumented(packet_data) for _ in range(count)]
+
+
+def test_profile_report_requires_profile():
+    with pytest.raises(MetricsNotCollectedException):
+        Capture().profile_report()
+
+
+def test_profiler_reports_parsing_by_format_and_layer(packet_xml):
+    profiler = CaptureProfiler()
+    packets = parse_with_profiler(profiler, packet_xml, 3)
+    report = profiler.report()
+    layer_name = packets[0].highest_layer.lower()
+    assert report.parse_by_format["pdml"].packets == 3
+    assert report.parse_by_layer[layer_name].packets == 3
+    assert report.parse_by_layer[layer_name].seconds > 0
+    assert report.stats is None
+    assert "Parse by layer:" in profiler.format_report()
+
+
+def test_profiler_samples_through_cprofile(packet_xml):
+    profiler = CaptureProfiler(sample_percent=50)
+    parse_with_profiler(profiler, packet_xml, 4)
+    report = profiler.report()
+    assert report.parse_by_format["pdml"].sampled_packets == 2
+    assert report.stats.total_calls > 0
+
+
+def test_profiler_samples_through_tracemalloc(packet_xml):
+    profiler = CaptureProfiler(sample_percent=100, sampling_tool="tracemalloc")
+    try:
+        parse_with_profiler(profiler, packet_xml, 2)
+    finally:
+        profiler.close()
+    entry = profiler.report().parse_by_format["pdml"]
+    assert entry.sampled_packets == 2
+    assert entry.allocated_bytes > 0
+
+
+def test_profiler_stops_only_tracemalloc_it_started():
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc is already tracing")
+    profiler = CaptureProfiler(sample_percent=100, sampling_tool="tracemalloc")
+    assert tracemalloc.is_tracing()
+    profiler.close()
+    assert not tracemalloc.is_tracing()
+
+    tracemalloc.start()
+    try:
+        CaptureProfiler(sample_percent=100, sampling_tool="tracemalloc").close()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_capture_closes_only_profiler_it_created():
+    profiler = mock.Mock()
+    Capture(profile=profiler).close()
+    profiler.close.assert_not_called()
+
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc is already tracing")
+    c = Capture(profile={"sample_percent": 100, "sampling_tool": "tracemalloc"})
+    assert c._profiler.sample_percent == 100
+    assert tracemalloc.is_tracing()
+    c.close()
+    assert not tracemalloc.is_tracing()
+
+
+def test_closed_profiler_does_not_sample_through_tracemalloc(packet_xml):
+    if tracemalloc.is_tracing():
+        pytest.skip("tracemalloc is already tracing")
+    profiler = CaptureProfiler(sample_percent=100, sampling_tool="tracemalloc")
+    profiler.close()
+    parse_with_profiler(profiler, packet_xml, 2)
+    entry = profiler.report().parse_by_format["pdml"]
+    assert entry.packets == 2
+    assert entry.sampled_packets == 0
+
+
+def test_profiler_calls_hooks(packet_xml):
+    on_packet_start = mock.Mock()
+    on_packet_end = mock.Mock()
+    profiler = CaptureProfiler(on_packet_start=on_packet_start, on_packet_end=on_packet_end)
+    packet, = parse_with_profiler(profiler, packet_xml, 1)
+    on_packet_start.assert_called_once_with("parse", packet_xml)
+    stage, ended_packet, seconds = on_packet_end.call_args[0]
+    assert (stage, ended_packet) == ("parse", packet)
+    assert seconds > 0
+
+
+def test_profiler_records_parse_errors():
+    profiler = CaptureProfiler()
+    parser = tshark_json.TsharkJsonParser()
+    parser.profiler = profiler
+    with mock.patch.object(parser, "_parse_single_packet", side_effect=ValueError):
+        with pytest.raises(ValueError):
+            parser._parse_single_packet_instrumented(b"{}")
+    assert profiler.report().parse_by_layer["unknown"].packets == 1
+
+
+def test_unknown_sampling_tool():
+    with pytest.raises(ValueError):
+        CaptureProfiler(sample_percent=1, sampling_tool="perf")
+
+
+def test_get_layer_name():
+    assert get_layer_name({"eth": {}, "ip": {}}) == "ip"
+    assert get_layer_name(Packet()) == "unknown"
+    assert get_layer_name(None) == "unknown"
+
+
+def test_capture_profiles_dispatch():
+    c = Capture(summary_columns=["No.", "Protocol"], profile=True)
+    stream = FakeStream([b"1\tTCP\n2\tDNS\n3\tTCP\n"])
+    c.eventloop.run_until_complete(c._go_through_packets_from_fd(stream, lambda pkt: None))
+    report = c.profile_report()
+    assert report.dispatch_by_format["tabs"].packets == 3
+    assert report.dispatch_by_layer["tcp"].packets == 2
+    assert report.dispatch_by_layer["dns"].packets == 1
+    assert not report.parse_by_format
@@ -0,0 +1,48 @@
+import pytest
+
+from pyshark.capture.file_capture import FileCapture
+from pyshark.capture.packet_store import RingBuffer
+from pyshark.packet.packet import Packet
+
+
+def test_file_capture_closes_source_frames(example_pcap_path):
+    capture = FileCapture(example_pcap_path, raw_from_source=True)
+    source_frames = capture._source_frames
+    capture.close()
+    assert capture._source_frames is None
+    assert source_frames._view is None
+
+
+def test_file_capture_skips_raw_data_of_missing_frames(example_pcap_path):
+    with FileCapture(example_pcap_path, raw_from_source=True) as capture:
+        packet = capture._process_packet(Packet(layers=[], number=10 ** 6))
+    assert packet._raw_packet is None
+
+
+@pytest.fixture
+def ring_buffer_capture(example_pcap_path):
+    capture = FileCapture(example_pcap_path, packet_store=RingBuffer(max_packets=2))
+    capture._packet_generator = (number for number in range(5))
+    yield capture
+    capture.close()
+
+
+def test_file_capture_iterates_past_ring_buffer_size(ring_buffer_capture):
+    assert [ring_buffer_capture.next() for _ in range(5)] == [0, 1, 2, 3, 4]
+    with pytest.raises(StopIteration):
+        ring_buffer_capture.next()
+
+
+def test_file_capture_iteration_restarts_from_oldest_kept_packet(ring_buffer_capture):
+    for _ in range(5):
+        ring_buffer_capture.next()
+    ring_buffer_capture.reset()
+    assert [ring_buffer_capture.next() for _ in range(2)] == [3, 4]
+
+
+def test_file_capture_gets_packets_by_file_index_with_ring_buffer(ring_buffer_capture):
+    assert ring_buffer_capture[3] == 3
+    assert ring_buffer_capture[2] == 2
+    assert ring_buffer_capture[-1] == 3
+    with pytest.raises(KeyError):
+        ring_buffer_capture[1]
@@ -35,3 +35,16 @@ def test_fed_packets_are_added_to_the_list(inmem_capture):
 
     inmem_capture.feed_packets([arp_packet(), arp_packet()])
     assert len(inmem_capture) == 3
+
+
+def test_raw_packets_are_attached_from_source():
+    capture = pyshark.InMemCapture(raw_from_source=True)
+    packets = [arp_packet('1'), arp_packet('2')]
+    parsed_packets = capture.parse_packets(packets)
+    capture.close()
+    assert [pkt.get_raw_packet() for pkt in parsed_packets] == packets
+
+
+def test_stats_are_not_supported(inmem_capture):
+    with pytest.raises(NotImplementedError):
+        inmem_capture.get_stats(["phs"])
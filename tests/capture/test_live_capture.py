@@ -1,10 +1,15 @@
+import time
+
 try:
     import mock
 except ModuleNotFoundError:
     from unittest import mock
 import pytest
+from packaging import version
 
 import pyshark
+from pyshark import F
+from pyshark.tshark import tshark
 
 
 @pytest.fixture(params=[["wlan0"], ["wlan0mon", "wlan1mon"]])
@@ -27,3 +32,79 @@ def test_get_dumpcap_interface_parameter(capture, monitoring, interfaces):
                           for index, value in enumerate(dumpcap_parameters)
                           if value == "-i"]
     assert dumpcap_interfaces == interfaces
+
+
+def _get_dumpcap_bpf_filter(capture):
+    with mock.patch.object(capture, "_get_tshark_version", return_value=version.parse("3.6.0")):
+        dumpcap_parameters = capture._get_dumpcap_parameters()
+    if "-f" not in dumpcap_parameters:
+        return None
+    return dumpcap_parameters[dumpcap_parameters.index("-f") + 1]
+
+
+@pytest.fixture
+def bpf_filter_compiles():
+    with mock.patch.object(tshark, "bpf_filter_compiles", return_value=True) as bpf_filter_compiles:
+        yield bpf_filter_compiles
+
+
+def test_bpf_filter_is_derived_from_display_filter(interfaces, bpf_filter_compiles):
+    capture = pyshark.LiveCapture(interface=interfaces, display_filter="tcp.port == 443 && http2",
+                                  derive_bpf_filter=True)
+    assert _get_dumpcap_bpf_filter(capture) == (F("tcp.port") == 443).to_bpf()
+    assert bpf_filter_compiles.call_count == len(interfaces)
+
+
+def test_bpf_filter_is_derived_from_filter_expression(interfaces, bpf_filter_compiles):
+    capture = pyshark.LiveCapture(interface=interfaces, display_filter=F("udp") & (lambda pkt: True),
+                                  derive_bpf_filter=True)
+    assert _get_dumpcap_bpf_filter(capture) == F("udp").to_bpf()
+
+
+def test_derived_bpf_filter_has_no_vlan_on_non_ethernet_interface(bpf_filter_compiles):
+    # Such as Linux "any", whose link type (Linux cooked capture) has no VLAN support in libpcap
+    bpf_filter_compiles.side_effect = lambda bpf_filter, interface, tshark_path=None: "vlan" not in bpf_filter
+    with mock.patch("pyshark.tshark.tshark.get_tshark_interfaces", return_value=["any"]):
+        capture = pyshark.LiveCapture(interface="any", display_filter="tcp.port == 443", derive_bpf_filter=True)
+    assert _get_dumpcap_bpf_filter(capture) == (F("tcp.port") == 443).to_bpf(vlan=False)
+
+
+def test_bpf_filter_is_not_used_if_it_does_not_compile(interfaces, bpf_filter_compiles):
+    bpf_filter_compiles.return_value = False
+    capture = pyshark.LiveCapture(interface=interfaces, display_filter="tcp", derive_bpf_filter=True)
+    assert _get_dumpcap_bpf_filter(capture) is None
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(display_filter="not tcp", derive_bpf_filter=True),
+    dict(display_filter="tcp"),
+])
+def test_bpf_filter_is_not_derived(interfaces, bpf_filter_compiles, kwargs):
+    capture = pyshark.LiveCapture(interface=interfaces, **kwargs)
+    assert _get_dumpcap_bpf_filter(capture) is None
+
+
+def test_given_bpf_filter_is_used(interfaces):
+    capture = pyshark.LiveCapture(interface=interfaces, display_filter="tcp", bpf_filter="port 53")
+    assert _get_dumpcap_bpf_filter(capture) == "port 53"
+
+
+def test_latencies_require_record_latency(capture):
+    with pytest.raises(pyshark.capture.capture.MetricsNotCollectedException):
+        capture.latencies()
+
+
+def test_capture_records_latencies(interfaces):
+    capture = pyshark.LiveCapture(interface=interfaces, record_latency=True)
+    packets = [pyshark.packet.packet.Packet(number=number, sniff_time=time.time() - 1) for number in range(3)]
+    parser = mock.Mock()
+    parser.get_packets_from_stream = mock.AsyncMock(side_effect=[(packet, b"") for packet in packets] + [EOFError()])
+    with mock.patch.object(capture, "_setup_tshark_output_parser", return_value=parser):
+        capture.eventloop.run_until_complete(capture._go_through_packets_from_fd(None, lambda pkt: None))
+    summary = capture.latencies().summary()
+    assert summary["capture_to_parse"].count == 3
+    assert summary["capture_to_parse"].min >= 1
+    assert summary["parse_to_callback"].count == 3
+    assert summary["callback"].count == 3
+    capture.latencies().reset()
+    assert capture.latencies().capture_to_parse.count == 0
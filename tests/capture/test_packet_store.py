@@ -0,0 +1,187 @@
+import contextlib
+from unittest import mock
+
+import pytest
+
+from pyshark.capture.capture import Capture, StopCapture
+from pyshark.capture.packet_store import CompressedPacketStore, IndexedPacketStore, RingBuffer, SpillingPacketStore
+from pyshark.packet.packet import Packet
+from pyshark.packet.packet_summary import PacketSummary
+from pyshark.tshark.output_parser import tshark_json
+
+
+@pytest.fixture
+def packets(data_directory):
+    packet_data = data_directory.joinpath("packet.json").read_bytes()
+    packets = [tshark_json.packet_from_json_packet(packet_data) for _ in range(10)]
+    for number, packet in enumerate(packets):
+        packet.number = number
+    return packets
+
+
+def test_spilling_store_keeps_packets_in_memory_before_threshold(packets):
+    store = SpillingPacketStore(spill_after_packets=20)
+    store.extend(packets)
+    assert not store.spilling
+    assert list(store) == packets
+
+
+def test_spilling_store_writes_packets_to_disk(packets, tmp_path):
+    store = SpillingPacketStore(spill_after_packets=5, memory_packets=3, directory=tmp_path)
+    store.extend(packets)
+    assert store.spilling
+    assert len(store) == 10
+    assert len(store._cache) == 3
+    assert store[-1] is packets[-1]
+    assert [packet.number for packet in store] == list(range(10))
+    assert [packet.number for packet in store[2:8:2]] == [2, 4, 6]
+    assert store[0].tcp.checksum == "0x0000b71f"
+    with pytest.raises(IndexError):
+        store[10]
+
+
+def test_spilling_store_keeps_packet_summaries(tmp_path):
+    summary = PacketSummary(["No.", "Protocol"], ["1", "TCP"])
+    store = SpillingPacketStore(spill_after_packets=1, memory_packets=1, directory=tmp_path)
+    store.extend([summary, Packet(number=2)])
+    assert store[0].protocol == "TCP"
+
+
+def test_spilling_store_clear(packets, tmp_path):
+    store = SpillingPacketStore(spill_after_packets=5, memory_packets=3, directory=tmp_path)
+    store.extend(packets)
+    store.clear()
+    assert len(store) == 0
+    assert not store.spilling
+    store.append(packets[0])
+    assert store[0] is packets[0]
+
+
+def test_capture_uses_packet_store(packets, tmp_path):
+    store = SpillingPacketStore(spill_after_packets=5, memory_packets=3, directory=tmp_path)
+    capture = Capture(packet_store=store)
+    capture._packets.extend(packets)
+    assert len(capture) == 10
+    assert [packet.number for packet in capture._packets] == list(range(10))
+    assert capture.next().number == 0
+    capture.clear()
+    assert len(store) == 0
+
+
+def test_ring_buffer_keeps_newest_packets(packets):
+    ring_buffer = RingBuffer(max_packets=3)
+    ring_buffer.extend(packets)
+    assert len(ring_buffer) == 3
+    assert ring_buffer.evicted_count == 7
+    assert ring_buffer[-1] is packets[-1]
+    assert list(ring_buffer) == packets[-3:]
+
+
+def test_capture_with_ring_buffer_reads_packets_added_after_clear(packets):
+    capture = Capture(packet_store=RingBuffer(max_packets=3))
+    capture._packets.extend(packets[:5])
+    assert [capture.next().number for _ in range(3)] == [2, 3, 4]
+    capture.clear()
+    assert capture._packets.evicted_count == 0
+    capture._packets.extend(packets[5:7])
+    assert [capture.next().number for _ in range(2)] == [5, 6]
+
+
+def test_ring_buffer_max_bytes(packets):
+    ring_buffer = RingBuffer(max_bytes=int(packets[0].length) * 2)
+    ring_buffer.extend(packets)
+    assert list(ring_buffer) == packets[-2:]
+
+
+def test_ring_buffer_max_age(packets):
+    ring_buffer = RingBuffer(max_age=10)
+    with mock.patch("time.monotonic", return_value=100):
+        ring_buffer.extend(packets[:5])
+    with mock.patch("time.monotonic", return_value=105):
+        ring_buffer.extend(packets[5:])
+    with mock.patch("time.monotonic", return_value=112):
+        assert list(ring_buffer) == packets[5:]
+        assert ring_buffer[0] is packets[5]
+
+
+def test_ring_buffer_requires_a_limit():
+    with pytest.raises(ValueError):
+        RingBuffer()
+
+
+def test_load_packets_counts_evicted_packets(packets):
+    capture = Capture(packet_store=RingBuffer(max_packets=2))
+
+    def apply_on_packets(callback, timeout=None, packet_count=None):
+        with contextlib.suppress(StopCapture):
+            for packet in packets:
+                callback(packet)
+
+    with mock.patch.object(capture, "apply_on_packets", apply_on_packets):
+        capture.load_packets(packet_count=4)
+    assert list(capture._packets) == packets[2:4]
+
+
+def test_compressed_store_decompresses_packets_on_access(packets):
+    store = CompressedPacketStore(chunk_size=3, cached_chunks=1)
+    store.extend(packets)
+    assert len(store) == 10
+    assert len(store._chunks) == 3
+    assert store[-1] is packets[-1]
+    assert store[0] is not packets[0]
+    assert [packet.number for packet in store] == list(range(10))
+    assert store[4].tcp.checksum == "0x0000b71f"
+    assert store.compressed_size < len(packets[0].to_bytes()) * 10
+
+
+def test_compressed_store_keeps_packet_summaries():
+    store = CompressedPacketStore(chunk_size=2, cached_chunks=0)
+    store.extend([PacketSummary(["No.", "Protocol"], [str(i), "TCP"]) for i in range(4)])
+    assert [summary.no for summary in store] == ["0", "1", "2", "3"]
+
+
+def test_compressed_store_unknown_compression():
+    with pytest.raises(ValueError):
+        CompressedPacketStore(compression="foo")
+
+
+@pytest.fixture
+def indexed_store(packets):
+    for number, packet in enumerate(packets):
+        packet.sniff_timestamp = f"{1000 + number}.5"
+        packet.tcp.get_field("stream").fields[0].raw_value = str(number % 3)
+    store = IndexedPacketStore(indexed_fields=["ip.src"], index_layers=True, index_time=True)
+    store.extend(packets[:5])
+    return store
+
+
+def test_indexed_store_field_equality(indexed_store, packets):
+    assert indexed_store.where("ip.src", "192.168.1.180") == packets[:5]
+    assert indexed_store.where("ip.src", "10.0.0.1") == []
+    assert indexed_store.where("ip.flags.df", "1") == packets[:5]
+
+
+def test_indexed_store_keeps_indexes_up_to_date(indexed_store, packets):
+    indexed_store.extend(packets[5:])
+    assert indexed_store.where("ip.src", "192.168.1.180") == packets
+    assert indexed_store.with_layer("TCP") == packets
+    indexed_store.clear()
+    assert indexed_store.where("ip.src", "192.168.1.180") == []
+    assert indexed_store.indexed_fields == ["ip.src"]
+
+
+def test_indexed_store_set_and_range_queries(indexed_store, packets):
+    indexed_store.create_field_index("tcp.stream", value_type=int)
+    assert indexed_store.where_in("tcp.stream", ["0", 2]) == [packets[0], packets[2], packets[3]]
+    assert indexed_store.where_between("tcp.stream", 1, 2) == [packets[1], packets[2], packets[4]]
+    assert indexed_store.where_between("tcp.stream", high=0) == [packets[0], packets[3]]
+
+
+def test_indexed_store_layer_presence(indexed_store, packets):
+    assert indexed_store.with_layer("data") == packets[:5]
+    assert indexed_store.with_layer("udp") == []
+
+
+def test_indexed_store_time_range(indexed_store, packets):
+    assert indexed_store.sniffed_between(1001, "1003.5") == packets[1:4]
+    assert indexed_store.sniffed_between(start=packets[3].sniff_time) == packets[3:5]
@@ -0,0 +1,53 @@
+import pytest
+
+from pyshark.packet.layers.ek_layer import EkLayer, EkMultiField
+
+
+@pytest.fixture
+def tcp_layer():
+    return EkLayer("tcp", {
+        "tcp_tcp_srcport": 443,
+        "tcp_tcp_flags": 0x18,
+        "tcp_tcp_flags_ack": True,
+        "tcp_tcp_flags_push": True,
+        "tcp_tcp_options_timestamp_tsval": 1,
+        "tcp_tcp_options_timestamp_tsecr": 2,
+        "tcp_tcp_options_nop": ["01", "01"],
+        "text": "Timestamps",
+    }, fields_casted=True)
+
+
+def test_gets_field_without_subfields(tcp_layer):
+    assert tcp_layer.get_field("srcport") == 443
+
+
+def test_gets_field_with_value_and_subfields(tcp_layer):
+    flags = tcp_layer.get_field("flags")
+    assert isinstance(flags, EkMultiField)
+    assert flags.value == 0x18
+    assert set(flags.subfields) == {"ack", "push"}
+
+
+def test_gets_intermediate_field(tcp_layer):
+    options = tcp_layer.options
+    assert options.value is None
+    assert set(options.subfields) == {"timestamp", "nop"}
+    assert options.timestamp.tsecr == 2
+
+
+def test_gets_nested_field_by_dotted_name(tcp_layer):
+    assert tcp_layer.get_field("options.timestamp.tsval") == 1
+
+
+def test_missing_field_is_none(tcp_layer):
+    assert tcp_layer.get_field("options_foo") is None
+    assert not tcp_layer.has_field("foo")
+
+
+def test_has_field(tcp_layer):
+    assert tcp_layer.has_field("options")
+    assert tcp_layer.has_field("options_timestamp_tsval")
+
+
+def test_field_names(tcp_layer):
+    assert set(tcp_layer.field_names) == {"srcport", "flags", "options"}
@@ -50,6 +50,12 @@ def test_layer_field_showname_binary():
     test_layer_field = LayerField(value="1234")
     assert binary == test_layer_field.binary_value
 
+def test_layer_field_binary_value_is_updated_with_value():
+    test_layer_field = LayerField(value="123")
+    assert test_layer_field.binary_value == b"\x01\x23"
+    test_layer_field.raw_value = "ff"
+    assert test_layer_field.binary_value == b"\xff"
+
 def test_layer_field_str_int_value():
     str_int_value = "10"
     int_value = 10
@@ -0,0 +1,44 @@
+import pytest
+
+from pyshark.packet import intern_table
+from pyshark.tshark.output_parser import tshark_json
+
+
+def _new_str(string):
+    """Creates a str equal to the given one which is not the same object."""
+    return "".join(list(string))
+
+
+@pytest.fixture
+def table():
+    return intern_table.InternTable(max_size=2, max_string_length=10)
+
+
+def test_interns_equal_strings(table):
+    first = table.intern(_new_str("ip.src"))
+    second = table.intern(_new_str("ip.src"))
+    assert first is second
+    assert table.stats.hits == 1
+    assert table.stats.bytes_saved > 0
+
+
+def test_does_not_grow_beyond_max_size(table):
+    for name in ("ip.src", "ip.dst", "tcp.port"):
+        table.intern(name)
+    assert len(table) == 2
+    tcp_port = _new_str("tcp.port")
+    assert table.intern(tcp_port) is tcp_port
+
+
+def test_does_not_intern_long_strings(table):
+    table.intern("a" * 11)
+    assert len(table) == 0
+
+
+def test_json_packets_share_field_names(data_directory):
+    packet_data = data_directory.joinpath("packet.json").read_bytes()
+    first, second = [tshark_json.packet_from_json_packet(packet_data, intern_strings=True) for _ in range(2)]
+    first_names = [name for name in first.tcp._all_fields]
+    second_names = [name for name in second.tcp._all_fields]
+    assert all(first_name is second_name for first_name, second_name in zip(first_names, second_names))
+    assert first.tcp.checksum == "0x0000b71f"
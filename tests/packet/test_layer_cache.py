@@ -0,0 +1,56 @@
+from pyshark.packet.layer_cache import LayerCache
+from pyshark.tshark.output_parser import tshark_json
+
+
+def _create_layer(layer_name, layer_dict):
+    return layer_name, dict(layer_dict)
+
+
+def test_identical_layers_are_shared(data_directory):
+    json_data = data_directory.joinpath("packet.json").read_bytes()
+    cache = LayerCache()
+    packet1 = tshark_json.packet_from_json_packet(json_data, layer_cache=cache)
+    packet2 = tshark_json.packet_from_json_packet(json_data, layer_cache=cache)
+    assert packet1.layers
+    for layer1, layer2 in zip(packet1.layers, packet2.layers):
+        assert layer1 is layer2
+    assert packet1.frame_info is not packet2.frame_info
+    assert packet2.tcp.srcport == packet1.tcp.srcport
+
+
+def test_different_layers_are_not_shared():
+    cache = LayerCache()
+    layer = cache.get_layer("ip", {"ip.ttl": "64"}, _create_layer)
+    assert cache.get_layer("ip", {"ip.ttl": "63"}, _create_layer) is not layer
+    assert cache.get_layer("ipv6", {"ip.ttl": "64"}, _create_layer) is not layer
+    assert cache.get_layer("ip", {"ip.ttl": "64"}, _create_layer) is layer
+
+
+def test_values_of_different_types_are_not_shared():
+    cache = LayerCache()
+    layer = cache.get_layer("tcp", {"tcp.flags.syn": True}, _create_layer)
+    assert cache.get_layer("tcp", {"tcp.flags.syn": 1}, _create_layer) is not layer
+    assert cache.get_layer("tcp", {"tcp.flags.syn": [["tcp.flags.syn", True]]}, _create_layer) is not \
+        cache.get_layer("tcp", {"tcp.flags.syn": {"tcp.flags.syn": True}}, _create_layer)
+
+
+def test_least_recently_used_layers_are_evicted():
+    cache = LayerCache(max_size=2)
+    first = cache.get_layer("udp", {"udp.port": "1"}, _create_layer)
+    cache.get_layer("udp", {"udp.port": "2"}, _create_layer)
+    assert cache.get_layer("udp", {"udp.port": "1"}, _create_layer) is first
+    cache.get_layer("udp", {"udp.port": "3"}, _create_layer)
+    assert len(cache) == 2
+    assert cache.get_layer("udp", {"udp.port": "1"}, _create_layer) is first
+    assert cache.stats.misses == 3
+    cache.get_layer("udp", {"udp.port": "2"}, _create_layer)
+    assert cache.stats.misses == 4
+
+
+def test_stats():
+    cache = LayerCache()
+    for _ in range(3):
+        cache.get_layer("udp", {"udp.port": "1"}, _create_layer)
+    assert cache.stats == (1, 2, 1)
+    cache.clear()
+    assert cache.stats == (0, 0, 0)
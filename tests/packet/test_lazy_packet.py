@@ -0,0 +1,66 @@
+import pickle
+
+import pytest
+
+from pyshark.packet.lazy_packet import LazyPacket
+from pyshark.packet.packet import Packet
+from pyshark.tshark.output_parser import tshark_ek
+from pyshark.tshark.output_parser import tshark_json
+
+
+@pytest.fixture
+def json_data(data_directory):
+    return data_directory.joinpath("packet.json").read_bytes()
+
+
+@pytest.fixture
+def lazy_json_packet(json_data):
+    return tshark_json.lazy_packet_from_json_packet(json_data)
+
+
+def test_metadata_is_available_without_decoding(lazy_json_packet):
+    assert isinstance(lazy_json_packet, LazyPacket)
+    assert lazy_json_packet.number == 1
+    assert lazy_json_packet.length == 118
+    assert lazy_json_packet.sniff_timestamp == "1585220581.863675000"
+    assert lazy_json_packet.frame_protocols == "eth:ethertype:ip:tcp:data"
+    assert not lazy_json_packet.decoded
+
+
+@pytest.mark.parametrize("access_func", [
+    lambda pkt: pkt.tcp,
+    lambda pkt: pkt["tcp"],
+    lambda pkt: pkt.layers,
+    lambda pkt: pkt.frame_info,
+    lambda pkt: pkt.highest_layer,
+    lambda pkt: "tcp" in pkt,
+])
+def test_packet_is_decoded_on_access(lazy_json_packet, access_func):
+    access_func(lazy_json_packet)
+    assert lazy_json_packet.decoded
+    assert lazy_json_packet.tcp.checksum == "0x0000b71f"
+    assert lazy_json_packet.frame_info.protocols == lazy_json_packet.frame_protocols
+
+
+def test_decoded_packet_is_the_same(lazy_json_packet, json_data):
+    assert str(lazy_json_packet) == str(tshark_json.packet_from_json_packet(json_data))
+
+
+def test_lazy_packet_is_pickleable(lazy_json_packet):
+    unpickled_packet = pickle.loads(pickle.dumps(lazy_json_packet))
+    assert unpickled_packet.decoded
+    assert unpickled_packet.tcp.checksum == "0x0000b71f"
+
+
+def test_packet_without_frame_metadata_is_decoded_immediately(json_data):
+    packet = tshark_json.lazy_packet_from_json_packet(json_data.replace(b'"frame.number"', b'"frame.num"'))
+    assert type(packet) is Packet
+
+
+def test_lazy_ek_packet(data_directory):
+    ek_data = data_directory.joinpath("packet_ek.json").read_bytes()
+    packet = tshark_ek.lazy_packet_from_ek_packet(ek_data)
+    assert packet.number == 1
+    assert packet.length == 118
+    assert packet.frame_protocols == "eth:ethertype:ip:tcp:data"
+    assert [layer.layer_name for layer in packet.layers] == ["eth", "ip", "tcp", "data"]
@@ -0,0 +1,100 @@
+import datetime
+import pickle
+
+import pytest
+
+from pyshark.packet.packet import Packet
+from pyshark.tshark.output_parser import tshark_json
+
+
+@pytest.fixture
+def json_packet(data_directory):
+    return tshark_json.packet_from_json_packet(data_directory.joinpath("packet.json").read_bytes())
+
+
+@pytest.mark.parametrize("access_func", [
+    lambda pkt: pkt["tcp"],
+    lambda pkt: pkt["TCP"],
+    lambda pkt: pkt.tcp,
+    lambda pkt: pkt.TCP,
+    lambda pkt: pkt.get_multiple_layers("Tcp")[0],
+])
+def test_can_access_layer_by_name(json_packet, access_func):
+    assert access_func(json_packet) is json_packet.layers[2]
+
+
+def test_missing_layer(json_packet):
+    assert "udp" not in json_packet
+    with pytest.raises(KeyError):
+        json_packet["udp"]
+    with pytest.raises(AttributeError):
+        json_packet.udp
+    assert json_packet.get_multiple_layers("udp") == []
+
+
+def test_layer_index_is_updated_when_layers_change(json_packet):
+    udp_layer = Packet(layers=[tshark_json.JsonLayer("udp", {})]).layers[0]
+    json_packet.layers.append(udp_layer)
+    assert json_packet.udp is udp_layer
+    assert json_packet.highest_layer == "UDP"
+
+
+def test_transport_and_highest_layer(json_packet):
+    assert json_packet.transport_layer == "TCP"
+    assert json_packet.highest_layer == "DATA"
+    assert repr(json_packet) == "<TCP/DATA Packet>"
+
+
+def test_sniff_time(json_packet):
+    assert json_packet.sniff_timestamp == "1585220581.863675000"
+    assert json_packet.sniff_time_ns == 1585220581863675000
+    assert json_packet.sniff_time == datetime.datetime.fromtimestamp(1585220581.863675)
+
+
+@pytest.mark.parametrize(["sniff_timestamp", "expected_ns"], [
+    ("1585220581.8636", 1585220581863600000),
+    ("1585220581.-5", 1585220581000000000),
+    ("1585220581", 1585220581000000000),
+    (1585220581, 1585220581000000000),
+    (None, None),
+])
+def test_sniff_timestamp_conversion(sniff_timestamp, expected_ns):
+    assert Packet(sniff_time=sniff_timestamp).sniff_time_ns == expected_ns
+
+
+def test_malformed_sniff_timestamp_fails_only_when_used():
+    packet = Packet(sniff_time="Mar 26, 2020 13:03:01")
+    assert packet.sniff_time_ns is None
+    assert packet.sniff_timestamp == "Mar 26, 2020 13:03:01"
+    with pytest.raises(ValueError):
+        packet.sniff_time
+
+
+def test_packet_is_pickleable(json_packet):
+    json_packet.transport_layer
+    unpickled_packet = pickle.loads(pickle.dumps(json_packet))
+    assert unpickled_packet.sniff_timestamp == json_packet.sniff_timestamp
+    assert unpickled_packet.tcp.checksum == "0x0000b71f"
+    assert unpickled_packet.transport_layer == "TCP"
+
+
+def test_get_raw_packet():
+    raw_layer = tshark_json.JsonLayer("frame_raw", ["0011aaff", 0, 4, 0, 1])
+    packet = Packet(layers=[raw_layer])
+    assert packet.get_raw_packet() == b"\x00\x11\xaa\xff"
+    assert packet.get_raw_packet() is packet.get_raw_packet()
+    assert packet.get_raw_packet_view() == b"\x00\x11\xaa\xff"
+    assert not raw_layer._duplicate_layers
+
+
+def test_get_raw_packet_without_raw_data(json_packet):
+    with pytest.raises(AssertionError):
+        json_packet.get_raw_packet()
+
+
+def test_set_raw_packet(json_packet):
+    raw_data = bytearray(b"\x00\x11\xaa\xff")
+    json_packet.set_raw_packet(raw_data)
+    assert json_packet.get_raw_packet() == b"\x00\x11\xaa\xff"
+    assert json_packet.get_raw_packet_view().obj is raw_data
+    assert pickle.loads(pickle.dumps(json_packet)).get_raw_packet() == b"\x00\x11\xaa\xff"
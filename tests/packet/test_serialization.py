@@ -0,0 +1,96 @@
+import pytest
+
+from pyshark.packet import serialization
+from pyshark.packet.layers.ek_layer import EkLayer
+from pyshark.packet.packet import Packet
+from pyshark.tshark.output_parser import tshark_ek
+from pyshark.tshark.output_parser import tshark_json
+from pyshark.tshark.output_parser import tshark_xml
+
+
+@pytest.fixture
+def json_packet(data_directory):
+    return tshark_json.packet_from_json_packet(data_directory.joinpath("packet.json").read_bytes())
+
+
+@pytest.fixture
+def xml_packet(data_directory):
+    return tshark_xml.packet_from_xml_packet(data_directory.joinpath("packet.xml").read_bytes())
+
+
+@pytest.fixture
+def ek_packet(data_directory):
+    return tshark_ek.packet_from_ek_packet(data_directory.joinpath("packet_ek.json").read_bytes())
+
+
+def _assert_packets_equal(packet, deserialized_packet):
+    assert deserialized_packet.number == packet.number
+    assert deserialized_packet.length == packet.length
+    assert deserialized_packet.sniff_timestamp == packet.sniff_timestamp
+    assert [layer.layer_name for layer in deserialized_packet.layers] == [layer.layer_name for layer in packet.layers]
+
+
+def test_json_packet_round_trip(json_packet):
+    deserialized_packet = Packet.from_bytes(json_packet.to_bytes())
+    _assert_packets_equal(json_packet, deserialized_packet)
+    assert str(deserialized_packet) == str(json_packet)
+    assert deserialized_packet.tcp.checksum == "0x0000b71f"
+
+
+def test_xml_packet_round_trip(xml_packet):
+    # Fields which were accessed are serialized as well
+    xml_packet.ip.src
+    deserialized_packet = Packet.from_bytes(xml_packet.to_bytes())
+    _assert_packets_equal(xml_packet, deserialized_packet)
+    assert str(deserialized_packet) == str(xml_packet)
+    assert deserialized_packet.ip.src == xml_packet.ip.src
+    assert deserialized_packet.ip.src.showname == xml_packet.ip.src.showname
+
+
+def test_ek_packet_round_trip(ek_packet):
+    deserialized_packet = Packet.from_bytes(ek_packet.to_bytes())
+    _assert_packets_equal(ek_packet, deserialized_packet)
+    for layer, deserialized_layer in zip(ek_packet.layers, deserialized_packet.layers):
+        assert deserialized_layer._fields_dict == layer._fields_dict
+
+
+def test_values_round_trip():
+    fields = {"int": -300, "big_int": 2 ** 70, "float": 1.5, "bytes": b"\x00\xff", "bool": True, "none": None,
+              "list": ["a", "\ud800", ""]}
+    packet = Packet(layers=[EkLayer("test", fields, fields_casted=True)], number=1)
+    assert Packet.from_bytes(packet.to_bytes()).test._fields_dict == fields
+
+
+def test_raw_packet_round_trip(json_packet):
+    json_packet.set_raw_packet(b"\x00\x11\xaa\xff")
+    assert Packet.from_bytes(json_packet.to_bytes()).get_raw_packet() == b"\x00\x11\xaa\xff"
+
+
+def test_malformed_sniff_timestamp_round_trip():
+    packet = Packet(number=1, sniff_time="Mar 26, 2020 13:03:01")
+    assert Packet.from_bytes(packet.to_bytes()).sniff_timestamp == "Mar 26, 2020 13:03:01"
+
+
+def test_batch_round_trip(json_packet, xml_packet):
+    data = serialization.packets_to_bytes([json_packet, xml_packet, json_packet])
+    assert len(data) < len(json_packet.to_bytes()) * 2 + len(xml_packet.to_bytes())
+    packets = serialization.packets_from_bytes(data)
+    assert len(packets) == 3
+    assert str(packets[2]) == str(json_packet)
+    assert str(packets[1]) == str(xml_packet)
+
+
+@pytest.mark.parametrize("data", [b"", b"garbage", b"PSPK\x02"])
+def test_invalid_data(data):
+    with pytest.raises(serialization.InvalidSerializedDataException):
+        serialization.packets_from_bytes(data)
+
+
+def test_truncated_data(json_packet):
+    with pytest.raises(serialization.InvalidSerializedDataException):
+        Packet.from_bytes(json_packet.to_bytes()[:-10])
+
+
+def test_from_bytes_requires_a_single_packet(json_packet):
+    with pytest.raises(serialization.InvalidSerializedDataException):
+        Packet.from_bytes(serialization.packets_to_bytes([json_packet, json_packet]))
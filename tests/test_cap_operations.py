@@ -7,6 +7,7 @@ from unittest import mock
 
 import pytest
 
+import pyshark
 from pyshark.packet.packet_summary import PacketSummary
 
 
@@ -80,3 +81,11 @@ def test_iterate_empty_psml_capture(simple_summary_capture):
     if p.is_alive():
         p.terminate()
     assert no_hang  # False here
+
+
+def test_raw_packets_are_attached_from_file(example_pcap_path):
+    with pyshark.FileCapture(example_pcap_path, raw_from_source=True, display_filter="icmp") as cap:
+        packets = list(cap)
+    with pyshark.FileCapture(example_pcap_path, use_json=True, include_raw=True, display_filter="icmp") as cap:
+        raw_packets = [pkt.get_raw_packet() for pkt in cap]
+    assert [pkt.get_raw_packet() for pkt in packets] == raw_packets
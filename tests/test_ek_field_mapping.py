@@ -1,3 +1,4 @@
+import json
 import pathlib
 from unittest import mock
 
@@ -50,3 +51,77 @@ def test_doesnt_cast_non_str(mapping):
     assert mapping.cast_field_value("ip", "ip_ip_hdr_len", True) is True
 
 
+
+@pytest.fixture
+def generated_mapping(fake_cache, tmp_path, data_directory):
+    fake_cache.return_value = tmp_path
+    raw_mapping = json.loads(data_directory.joinpath("ek_field_mapping.json").read_text())
+    with mock.patch.object(ek_field_mapping.tshark, "get_ek_field_mapping",
+                           return_value=raw_mapping) as get_ek_field_mapping:
+        yield get_ek_field_mapping
+    ek_field_mapping.MAPPING.clear()
+
+
+def test_generated_mapping_is_compiled_to_cache(generated_mapping, tmp_path):
+    ek_field_mapping.MAPPING.load_mapping("foo")
+    assert [p.name for p in tmp_path.iterdir()] == [ek_field_mapping._MAPPING_CACHE_NAME]
+
+    ek_field_mapping.MAPPING.clear()
+    ek_field_mapping.MAPPING.load_mapping("foo")
+    assert generated_mapping.call_count == 1
+    assert ek_field_mapping.MAPPING.get_field_type("ip", "ip_ip_hdr_len") == int
+    assert ek_field_mapping.MAPPING.get_field_type("ip", "ip_ip_src_rt") == str
+
+
+def test_mapping_reloads_on_version_change(generated_mapping, fake_cache, tmp_path):
+    def version_cache_dir(tshark_version):
+        version_dir = tmp_path.joinpath(tshark_version)
+        version_dir.mkdir(exist_ok=True)
+        return version_dir
+    fake_cache.side_effect = version_cache_dir
+
+    ek_field_mapping.MAPPING.load_mapping("foo")
+    ek_field_mapping.MAPPING.load_mapping("foo")
+    ek_field_mapping.MAPPING.load_mapping("bar")
+    assert generated_mapping.call_count == 2
+
+
+def test_partial_mapping_is_not_cached(generated_mapping, tmp_path):
+    ek_field_mapping.MAPPING.load_mapping("foo", protocols=["ip"])
+    generated_mapping.assert_called_once_with(tshark_path=None, protocols=["ip"])
+    assert not list(tmp_path.iterdir())
+
+
+def test_missing_protocol_raises(mapping):
+    with pytest.raises(ek_field_mapping.FieldNotFound):
+        mapping.get_field_type("foo", "foo_foo_bar")
+
+
+def test_field_casters_are_reused(mapping):
+    caster = mapping.get_field_caster("ip", "ip_ip_checksum")
+    assert mapping.get_field_caster("ip", "ip_ip_checksum") is caster
+    assert caster("0x3006") == 0x3006
+
+
+def test_casts_whole_layer(mapping):
+    layer_dict = {"ip_ip_hdr_len": "20", "ip_ip_src_rt": "1.1.1.1", "ip_ip_checksum": ["0x3006", "0x5"]}
+    assert mapping.cast_layer_fields("ip", layer_dict) == {"ip_ip_hdr_len": 20,
+                                                           "ip_ip_src_rt": "1.1.1.1",
+                                                           "ip_ip_checksum": [0x3006, 0x5]}
+
+
+def test_full_mapping_reloads_after_partial_mapping(generated_mapping, tmp_path):
+    ek_field_mapping.MAPPING.load_mapping("foo", protocols=["ip"])
+    ek_field_mapping.MAPPING.load_mapping("foo", protocols=["ip"])
+    assert generated_mapping.call_count == 1
+
+    ek_field_mapping.MAPPING.load_mapping("foo")
+    assert generated_mapping.call_count == 2
+    generated_mapping.assert_called_with(tshark_path=None)
+    assert [p.name for p in tmp_path.iterdir()] == [ek_field_mapping._MAPPING_CACHE_NAME]
+
+
+def test_partial_mapping_reloads_with_missing_protocols(generated_mapping):
+    ek_field_mapping.MAPPING.load_mapping("foo", protocols=["ip"])
+    ek_field_mapping.MAPPING.load_mapping("foo", protocols=["tcp"])
+    generated_mapping.assert_called_with(tshark_path=None, protocols=["ip", "tcp"])
@@ -0,0 +1,130 @@
+import pytest
+
+from pyshark import filters
+from pyshark.filters import F, Predicate, parse_display_filter, split_filter
+from pyshark.tshark.output_parser import tshark_json
+
+
+@pytest.fixture
+def packet(data_directory):
+    return tshark_json.packet_from_json_packet(data_directory.joinpath("packet.json").read_bytes())
+
+
+def _full_bpf(bpf):
+    bpf = f"({bpf}) or {filters._BPF_UNCHECKED_PACKETS}"
+    return f"({bpf}) or (vlan and ({bpf}))"
+
+
+def test_display_filter():
+    expression = ((F("ip.src") == "10.0.0.1") | (F("tcp.port") >= 1024)) & ~F("udp")
+    assert expression.to_display_filter() == "((ip.src == 10.0.0.1) or (tcp.port >= 1024)) and (not (udp))"
+
+
+def test_display_filter_quotes_strings():
+    assert (F("http.host") == 'a "b"').to_display_filter() == 'http.host == "a \\"b\\""'
+    assert F("http.host").contains("x").to_display_filter() == 'http.host contains "x"'
+    assert F("tcp.port").isin([80, 443]).to_display_filter() == "(tcp.port == 80) or (tcp.port == 443)"
+
+
+def test_split_filter_pushes_down_what_tshark_can_run():
+    def is_interesting(pkt):
+        return True
+
+    display_filter, remainder = split_filter(F("tcp") & is_interesting & (F("ip.ttl") < 64))
+    assert display_filter == "(tcp) and (ip.ttl < 64)"
+    assert isinstance(remainder, Predicate)
+
+
+def test_split_filter_keeps_or_with_predicate_in_python():
+    expression = F("tcp") | Predicate(lambda pkt: True)
+    assert split_filter(expression) == (None, expression)
+    assert split_filter(F("tcp")) == ("tcp", None)
+
+
+@pytest.mark.parametrize(["expression", "matches"], [
+    (F("tcp"), True),
+    (F("udp"), False),
+    (F("ip.src") == "192.168.1.180", True),
+    (F("ip.src") != "192.168.1.180", False),
+    (F("ip.flags.df") == 1, True),
+    (F("ip.ttl") > 63, True),
+    (F("ip.ttl") < 64, False),
+    (F("tcp.port") == 2222, True),
+    (F("ip.src").isin(["1.1.1.1", "192.168.1.180"]), True),
+    (F("ip.src").matches(r"^192\.168\."), True),
+    (F("ip.src").contains("10.0"), False),
+    (F("tcp") & ~F("ip.src").contains("168"), False),
+    (F("udp") | Predicate(lambda pkt: pkt.number == 1), True),
+])
+def test_expression_runs_in_python(packet, expression, matches):
+    assert expression(packet) == matches
+
+
+@pytest.mark.parametrize(["expression", "bpf"], [
+    (F("tcp"), "tcp"),
+    (F("ip.src") == "10.0.0.1", "ip src host 10.0.0.1"),
+    ((F("udp.port") == 53) | (F("tcp.dstport") == "53"), "(udp port 53) or (tcp dst port 53)"),
+    (F("eth.addr") == "00:11:22:33:44:55", "ether host 00:11:22:33:44:55"),
+    (F("tcp") & Predicate(lambda pkt: True), "tcp"),
+    (F("tcp.port") > 1000, "tcp"),
+    (F("ip.src") == "example.com", "ip"),
+    (F("ip.addr") == "10.0.0.0/8", "ip net 10.0.0.0/8"),
+])
+def test_bpf(expression, bpf):
+    assert expression.to_bpf() == _full_bpf(bpf)
+
+
+def test_bpf_without_vlan():
+    assert F("tcp").to_bpf(vlan=False) == "(tcp) or (ip[6:2] & 0x1fff != 0) or (ip6[6] == 0) or (ip6[6] == 43) " \
+                                          "or (ip6[6] == 44) or (ip6[6] == 60)"
+
+
+@pytest.mark.parametrize("expression", [
+    ~F("tcp"),
+    F("tcp") | Predicate(lambda pkt: True),
+    F("tcp.port") != 80,
+    F("dns.qry.name") == "example.com",
+])
+def test_no_bpf(expression):
+    assert expression.to_bpf() is None
+
+
+def test_expressions_cannot_be_combined_with_and():
+    with pytest.raises(TypeError):
+        F("tcp") and F("udp")
+
+
+@pytest.mark.parametrize(["display_filter", "bpf"], [
+    ("tcp.port == 80", "tcp port 80"),
+    ("ip.addr==10.0.0.1 && !udp", "ip host 10.0.0.1"),
+    ("(ip.src eq 10.0.0.1 or ip.dst eq 10.0.0.1) and tcp.port in {80, 443}",
+     "((ip src host 10.0.0.1) or (ip dst host 10.0.0.1)) and ((tcp port 80) or (tcp port 443))"),
+    ('http.host contains "a \\"b\\"" and tcp.flags.syn == 1', "tcp"),
+])
+def test_bpf_from_display_filter(display_filter, bpf):
+    assert parse_display_filter(display_filter).to_bpf() == _full_bpf(bpf)
+
+
+@pytest.mark.parametrize("display_filter", [
+    "udp or dns",
+    "not tcp.port == 80",
+    "tcp.port != 80",
+])
+def test_no_bpf_from_display_filter(display_filter):
+    assert parse_display_filter(display_filter).to_bpf() is None
+
+
+@pytest.mark.parametrize("display_filter", [
+    "eth.src[0:3] == 00:11:22",
+    "len(tcp) > 3",
+    "tcp.port ==",
+    "(tcp",
+    "tcp udp",
+])
+def test_unsupported_display_filters_are_not_parsed(display_filter):
+    assert parse_display_filter(display_filter) is None
+
+
+def test_parsed_display_filter_round_trips():
+    display_filter = '(ip.src == 10.0.0.1) and (not (http.host contains "a\\"b"))'
+    assert parse_display_filter(display_filter).to_display_filter() == display_filter
@@ -0,0 +1,142 @@
+from unittest import mock
+
+import pytest
+
+from pyshark.capture.capture import Capture
+from pyshark.tshark import stats
+
+CONVERSATIONS_OUTPUT = """\
+================================================================================
+TCP Conversations
+Filter:<No Filter>
+                                                           |       <-      | |       ->      | |     Total     |    Relative    |   Duration   |
+                                                           | Frames  Bytes | | Frames  Bytes | | Frames  Bytes |      Start     |              |
+192.168.1.180:38570        <-> 192.168.1.1:2222                 5 1,234 bytes       4 560 bytes         9 1,794 bytes     0.000000000         1.2345
+10.0.0.1:443               <-> 10.0.0.2:50000                   1 2 kB              0 0 bytes           1 2 kB            0.500000000         0.0000
+================================================================================
+"""
+
+ENDPOINTS_OUTPUT = """\
+================================================================================
+UDP Endpoints
+Filter:<No Filter>
+                       |  Port  ||  Packets  | |  Bytes  | | Tx Packets | | Tx Bytes | | Rx Packets | | Rx Bytes |
+10.0.0.1                  53          6         600          3             300           3             300
+================================================================================
+"""
+
+IO_OUTPUT = """\
+===================================================================
+| IO Statistics                                                   |
+|                                                                 |
+| Duration: 2.5 secs                                              |
+| Interval:   1 secs                                              |
+|                                                                 |
+| Col 1: Frames and bytes                                         |
+|     2: tcp                                                      |
+|-----------------------------------------------------------------|
+|          |1               |2               |                    |
+| Interval | Frames | Bytes | Frames | Bytes |                    |
+|--------------------------------------------|
+|  0 <>  1 |     10 |  1234 |      8 |  1000 |
+|  1 <>  2 |      5 |   600 |      5 |   600 |
+|  2 <> Dur|      1 |    60 |      0 |     0 |
+===================================================================
+"""
+
+PHS_OUTPUT = """\
+===================================================================
+Protocol Hierarchy Statistics
+Filter: 
+
+eth                                      frames:9 bytes:1794
+  ip                                     frames:9 bytes:1794
+    tcp                                  frames:9 bytes:1794
+      data                               frames:2 bytes:300
+  arp                                    frames:1 bytes:42
+===================================================================
+"""
+
+EXPERT_OUTPUT = """
+
+Errors (1)
+=============
+   Frequency      Group           Protocol  Summary
+           1   Malformed               TCP  Malformed Packet (Exception occurred)
+
+Warnings (2)
+=============
+   Frequency      Group           Protocol  Summary
+           2    Sequence               TCP  Previous segment(s) not captured (common at capture start)
+"""
+
+
+def test_parse_conversations():
+    conversations = stats.parse_stats(CONVERSATIONS_OUTPUT, ["conv,tcp"])["conv,tcp"]
+    assert conversations == [
+        stats.Conversation("192.168.1.180:38570", "192.168.1.1:2222", 5, 1234, 4, 560, 9, 1794, 0.0, 1.2345),
+        stats.Conversation("10.0.0.1:443", "10.0.0.2:50000", 1, 2000, 0, 0, 1, 2000, 0.5, 0.0),
+    ]
+
+
+def test_parse_endpoints():
+    endpoints = stats.parse_stats(ENDPOINTS_OUTPUT, ["endpoints,udp"])["endpoints,udp"]
+    assert endpoints == [stats.Endpoint("10.0.0.1", 53, 6, 600, 3, 300, 3, 300)]
+
+
+def test_parse_io_statistics():
+    io_statistics = stats.parse_stats(IO_OUTPUT, ["io,stat,1,tcp"])["io,stat,1,tcp"]
+    assert io_statistics.duration == 2.5
+    assert io_statistics.interval == 1
+    assert io_statistics.columns == ["frames_1", "bytes_1", "frames_2", "bytes_2"]
+    assert io_statistics.intervals == [
+        stats.IoInterval(0, 1, (10, 1234, 8, 1000)),
+        stats.IoInterval(1, 2, (5, 600, 5, 600)),
+        stats.IoInterval(2, 2.5, (1, 60, 0, 0)),
+    ]
+
+
+def test_parse_protocol_hierarchy():
+    entries = stats.parse_stats(PHS_OUTPUT, ["phs"])["phs"]
+    assert [entry.path for entry in entries] == ["eth", "eth:ip", "eth:ip:tcp", "eth:ip:tcp:data", "eth:arp"]
+    assert entries[3] == stats.ProtocolHierarchyEntry("data", "eth:ip:tcp:data", 2, 300)
+
+
+def test_parse_expert_info():
+    infos = stats.parse_stats(EXPERT_OUTPUT, ["expert"])["expert"]
+    assert infos == [
+        stats.ExpertInfo("error", 1, "Malformed", "TCP", "Malformed Packet (Exception occurred)"),
+        stats.ExpertInfo("warning", 2, "Sequence", "TCP",
+                         "Previous segment(s) not captured (common at capture start)"),
+    ]
+
+
+def test_parse_several_taps():
+    taps = ["phs", "expert", "conv,tcp", "endpoints,udp", "io,stat,1,tcp", "conv,udp"]
+    output = EXPERT_OUTPUT + IO_OUTPUT + ENDPOINTS_OUTPUT + CONVERSATIONS_OUTPUT + PHS_OUTPUT
+    results = stats.parse_stats(output, taps)
+    assert len(results["phs"]) == 5
+    assert len(results["expert"]) == 2
+    assert len(results["conv,tcp"]) == 2
+    assert len(results["endpoints,udp"]) == 1
+    assert len(results["io,stat,1,tcp"].intervals) == 3
+    assert results["conv,udp"] is None
+
+
+def test_unsupported_tap():
+    with pytest.raises(stats.UnsupportedTapException):
+        Capture().get_stats(["follow,tcp,ascii,0"])
+
+
+def test_run_taps_in_single_tshark_process():
+    capture = Capture()
+    process = mock.Mock()
+    process.stdout.read = mock.AsyncMock(return_value=(PHS_OUTPUT + CONVERSATIONS_OUTPUT).encode())
+    process.wait = mock.AsyncMock()
+    get_tshark_process = mock.AsyncMock(return_value=process)
+    with mock.patch.object(capture, "_get_tshark_process", get_tshark_process):
+        results = capture.get_stats(["conv,tcp", "phs"], packet_count=10)
+    get_tshark_process.assert_awaited_once_with(packet_count=10,
+                                                extra_parameters=["-q", "-z", "conv,tcp", "-z", "phs"])
+    assert len(results["conv,tcp"]) == 2
+    assert len(results["phs"]) == 5
@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 
 from pyshark import ek_field_mapping
@@ -51,3 +53,35 @@ def test_gets_layer_field_names(parsed_packet):
 
 def test_gets_field_subfield_names(parsed_packet):
     assert set(parsed_packet.tcp.options.timestamp.subfields) == {"tsecr", "tsval"}
+
+
+def test_typed_packet_has_casted_fields(data_directory):
+    ek_field_mapping.MAPPING.load_mapping(str(tshark.get_tshark_version()))
+    typed_packet = tshark_ek.packet_from_ek_packet(data_directory.joinpath("packet_ek.json").read_bytes(),
+                                                   cast_fields=True)
+    assert typed_packet.tcp.checksum.value == 0x0000b71f
+    assert typed_packet.tcp.flags.ack is True
+
+
+def test_packet_as_dict(data_directory):
+    packet_dict = tshark_ek.dict_from_ek_packet(data_directory.joinpath("packet_ek.json").read_bytes())
+    assert list(packet_dict) == ["frame", "eth", "ip", "tcp", "data"]
+    assert packet_dict["tcp"]["tcp_tcp_checksum"] == "0x0000b71f"
+
+
+def test_typed_packet_keeps_layers_missing_from_mapping(data_directory):
+    # The mapping in the data directory only has IP
+    with mock.patch.object(ek_field_mapping, "cache") as fake_cache:
+        fake_cache.get_cache_dir.return_value = data_directory
+        ek_field_mapping.MAPPING.load_mapping("foo")
+    try:
+        packet_data = data_directory.joinpath("packet_ek.json").read_bytes()
+        typed_packet = tshark_ek.packet_from_ek_packet(packet_data, cast_fields=True)
+        packet_dict = tshark_ek.dict_from_ek_packet(packet_data, cast_fields=True)
+    finally:
+        ek_field_mapping.MAPPING.clear()
+    assert typed_packet.ip._fields_casted
+    assert not typed_packet.tcp._fields_casted
+    assert typed_packet.tcp._fields_dict["tcp_tcp_checksum"] == "0x0000b71f"
+    assert packet_dict["ip"]["ip_ip_hdr_len"] == 20
+    assert packet_dict["tcp"]["tcp_tcp_checksum"] == "0x0000b71f"
@@ -21,3 +21,18 @@ def test_can_duplicate_fields(parsed_packet):
     assert parsed_packet.tcp.options_tree.timestamp_tree.option_kind == "8"
 
 
+def test_can_access_field_by_short_name(parsed_packet):
+    assert parsed_packet.tcp.options_tree.timestamp_tree.get_field("tsecr") == "360352231"
+
+
+def test_has_nested_field(parsed_packet):
+    assert parsed_packet.tcp.has_field("flags_tree.ack")
+    assert not parsed_packet.tcp.has_field("flags_tree.foo")
+    assert not parsed_packet.tcp.has_field("checksum.status")
+
+
+def test_packet_as_dict(data_directory):
+    packet_dict = tshark_json.dict_from_json_packet(data_directory.joinpath("packet.json").read_bytes())
+    assert list(packet_dict) == ["frame", "eth", "ip", "tcp", "data"]
+    assert packet_dict["tcp"]["tcp.checksum"] == "0x0000b71f"
+    assert packet_dict["frame"]["frame.len"] == "118"
@@ -0,0 +1,83 @@
+import asyncio
+import pickle
+
+from pyshark.tshark.output_parser import tshark_tabs
+
+COLUMNS = tshark_tabs.get_summary_columns(["No.", "Source", "Destination", "Protocol", "ip.ttl", "Info"])
+
+
+class FakeStream:
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+
+    async def read(self, size):
+        return self._chunks.pop(0) if self._chunks else b""
+
+
+def read_rows(parser, stream):
+    # Not asyncio.run(), which leaves no current eventloop for the captures of later tests.
+    eventloop = asyncio.new_event_loop()
+    try:
+        return eventloop.run_until_complete(_read_rows(parser, stream))
+    finally:
+        eventloop.close()
+
+
+async def _read_rows(parser, stream):
+    rows = []
+    data = b""
+    while True:
+        try:
+            row, data = await parser.get_packets_from_stream(stream, data)
+        except EOFError:
+            return rows
+        if row is not None:
+            rows.append(row)
+
+
+def test_get_summary_columns():
+    assert COLUMNS == [("No.", "%m"), ("Source", "%s"), ("Destination", "%d"), ("Protocol", "%p"),
+                       ("ip.ttl", "%Cus:ip.ttl:0:R"), ("Info", "%i")]
+    assert tshark_tabs.get_summary_columns({"TTL": "%Cus:ip.ttl"}) == [("TTL", "%Cus:ip.ttl")]
+
+
+def test_get_column_format_preference():
+    assert tshark_tabs.get_column_format_preference([("No.", "%m"), ("TTL", "%Cus:ip.ttl")]) == \
+        '"No.","%m","TTL","%Cus:ip.ttl"'
+
+
+def test_summary_row_type_names():
+    row_type = tshark_tabs.summary_row_type([title for title, _ in COLUMNS])
+    assert row_type._fields == ("no", "source", "destination", "protocol", "ip_ttl", "info")
+    assert tshark_tabs.summary_row_type([title for title, _ in COLUMNS]) is row_type
+
+
+def test_summary_row_removes_arrow_between_source_and_destination():
+    row_type = tshark_tabs.summary_row_type([title for title, _ in COLUMNS])
+    row = tshark_tabs.summary_row_from_line("    1\t10.0.0.1\t→\t10.0.0.2\tDNS\t64\tStandard query A\n", row_type)
+    assert row == row_type("1", "10.0.0.1", "10.0.0.2", "DNS", "64", "Standard query A")
+
+
+def test_summary_row_fills_missing_values():
+    row_type = tshark_tabs.summary_row_type([title for title, _ in COLUMNS])
+    row = tshark_tabs.summary_row_from_line("2\t\t\t\tARP", row_type)
+    assert row == row_type("2", "", "", "", "ARP", "")
+
+
+def test_summary_row_can_be_pickled():
+    row_type = tshark_tabs.summary_row_type(["No.", "Protocol"])
+    row = row_type("1", "TCP")
+    unpickled = pickle.loads(pickle.dumps(row))
+    assert unpickled == row
+    assert type(unpickled) is row_type
+
+
+def test_parser_reads_rows_across_batches():
+    parser = tshark_tabs.TsharkTabsParser(COLUMNS)
+    stream = FakeStream([b"1\t10.0.0.1\t\xe2\x86\x92\t10.0.0.2\tDNS\t64\tquery\n2\t10.0.0.2\t",
+                         b"\xe2\x86\x92\t10.0.0.1\tDNS\t57\tresponse\n",
+                         b"3\t10.0.0.1\t\xe2\x86\x92\t10.0.0.3\tTCP\t64\tSYN"])
+    rows = read_rows(parser, stream)
+    assert [row.no for row in rows] == ["1", "2", "3"]
+    assert rows[1].ip_ttl == "57"
+    assert rows[2].info == "SYN"
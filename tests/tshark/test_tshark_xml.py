@@ -1,5 +1,8 @@
+import lxml.objectify
 import pytest
 
+from pyshark.packet.fields import LayerFieldsContainer
+from pyshark.packet.layers.xml_layer import XmlLayer
 from pyshark.tshark.output_parser import tshark_xml
 
 
@@ -29,3 +32,20 @@ def test_can_duplicate_fields(parsed_packet):
     assert {opt.get_default_value() for opt in all_tcp_opts} == {"1", "1", "8"}
 
 
+def test_can_access_field_by_sanitized_name(parsed_packet):
+    assert parsed_packet.tcp.get_field("FLAGS.ACK") == "1"
+    assert parsed_packet.tcp.get_field("tcp.flags.ack") == "1"
+    assert parsed_packet.tcp.get_field("flags.foo") is None
+
+
+def test_fields_are_created_on_access(parsed_packet):
+    assert not isinstance(parsed_packet.tcp._all_fields["tcp.window_size"], LayerFieldsContainer)
+    assert parsed_packet.tcp.window_size == parsed_packet.tcp.get_field("tcp.window_size")
+    assert isinstance(parsed_packet.tcp._all_fields["tcp.window_size"], LayerFieldsContainer)
+
+
+def test_eager_fields_are_the_same_as_lazy(data_directory, parsed_packet):
+    xml_packet = lxml.objectify.fromstring(data_directory.joinpath("packet.xml").read_bytes())
+    eager_tcp = next(XmlLayer(proto, lazy_fields=False) for proto in xml_packet.proto if proto.attrib["name"] == "tcp")
+    assert eager_tcp.field_names == parsed_packet.tcp.field_names
+    assert str(eager_tcp) == str(parsed_packet.tcp)